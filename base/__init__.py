@@ -1,6 +1,10 @@
 import os
 import bpy
 from mathutils import Vector
+from . import registry as _registry
+from .registry import registry
+from . import levels as _levels
+from .levels import getLevelIndex, invalidateLevelIndex, getLevelObjects, invalidateLevelObjects
 
 xAxis = Vector((1., 0., 0.))
 yAxis = Vector((0., 1., 0.))
@@ -22,11 +26,8 @@ def strf(value):
 
 
 def getLevelZ(context, levelIndex):
-    prk = context.scene.prk
-    z = 0.
-    for i in range(levelIndex):
-        z += prk.levelBundles[prk.levels[i].bundle].height
-    return z
+    """Returns the z-position of the level at the position <levelIndex> in the GUI list of levels"""
+    return getLevelIndex(context).getZ(levelIndex)
 
 
 def getLevelLocation(context):
@@ -55,23 +56,13 @@ def getItem(context, op, o):
 
 def getModelParent(context):
     """Returns the parent model for the whole model or None"""
-    parent = None
-    for o in context.scene.objects:
-        if not o.parent and "t" in o and o["t"] == "model":
-            parent = o
-            break
-    return parent
+    return registry.getObject("model", context.scene)
 
 
 def getLevelHeight(context, o):
     """Returns the height of the levels where the Blender object <o> is located"""
-    prk = context.scene.prk
-    levelIndex = o.parent["level"]
-    for i,l in enumerate(prk.levels):
-        if l.index == levelIndex:
-            levelIndex = i
-            break
-    return prk.levelBundles[prk.levels[levelIndex].bundle].height
+    index = getLevelIndex(context)
+    return index.getHeight(index.getPosition(o.parent["level"]))
 
 
 def getNextLevelParent(context, o):
@@ -84,16 +75,9 @@ def getNextLevelParent(context, o):
         # return EMPTY controlling the total height of the building
         result = getTotalHeightEmpty(context, o)
     else:
-        # Iterate through the GUI list of levels to find the level
-        # on top of the level with the index equal to <index>
-        for i,l in enumerate(prk.levels):
-            if l.index == index:
-                break
-        index = prk.levels[i+1].index
-        for l in o.parent.parent.children:
-            if "level" in l and l["level"] == index:
-                result = l
-                break
+        # the level on top of the level with the index equal to <index>
+        index = prk.levels[getLevelIndex(context).getPosition(index)+1].index
+        result = registry.getChild(o.parent.parent, "level", index)
     return result
 
 
@@ -102,9 +86,7 @@ def getTotalHeightEmpty(context, o):
     Returns EMPTY object controlling the total height of the building
     in one level of which the Blender object <o> is located
     """ 
-    for l in o.parent.parent.children:
-        if "h" in l and l["h"]:
-            return l
+    return registry.getChild(o.parent.parent, "h")
 
  
 def getReferencesForAttached(o):
@@ -169,9 +151,36 @@ def init():
 init()
 
 from .ops import *
+from . import attached as _attached
+
+from bpy.app.handlers import persistent
+from kernel.drivers import functions as driverFunctions
+
+
+@persistent
+def registerDriverFunctions(*args):
+    """
+    Make the functions from <kernel.drivers> available in the expressions of the drivers
+    """
+    bpy.app.driver_namespace.update(driverFunctions)
+
 
 def register():
     bpy.utils.register_module(__name__)
+    _registry.register()
+    _attached.register()
+    _levels.register()
+    registerDriverFunctions()
+    # the drivers of a .blend file being loaded must find the functions too
+    if not registerDriverFunctions in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(registerDriverFunctions)
 
 def unregister():
-    bpy.utils.unregister_module(__name__)
\ No newline at end of file
+    bpy.utils.unregister_module(__name__)
+    _registry.unregister()
+    _attached.unregister()
+    _levels.unregister()
+    if registerDriverFunctions in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(registerDriverFunctions)
+    for name in driverFunctions:
+        bpy.app.driver_namespace.pop(name, None)
\ No newline at end of file
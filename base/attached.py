@@ -0,0 +1,203 @@
+import bpy
+from bpy.app.handlers import persistent
+from base import getReferencesForAttached, registry
+
+
+def getKey(o):
+    return ("l" if o["l"] else "r") + o["g"]
+
+
+class AttachedIndex:
+    """
+    An index of the walls attached to the wall segments of the model
+
+    The index is built once for the model parent and then updated incrementally
+    with <self.add(..)> and <self.update(..)>, so <item.area.WalkAlongWalls> doesn't have to
+    resolve the references of all attached EMPTYs each time an area is made.
+    The attached EMPTYs moved or created outside of those calls are updated by <onSceneUpdate(..)>.
+    If the registry has been rebuilt since the index was checked last time, i.e. Blender objects
+    have been added or removed, the index is synchronized with the registry, see <getAttachedIndex(..)>.
+    """
+
+    def __init__(self, modelParent):
+        self.modelParent = modelParent
+        # the version of the registry at the time the index was checked last time
+        self.version = registry.getVersion()
+        # key: (l|r)group of the corner EMPTY ending the hosting wall segment;
+        # value: list of entries for all walls attached to the wall segment
+        self.attached = {}
+        # key: group for an attached wall; value: entry from self.attached
+        self._attached = {}
+        # iterate through all attached EMPTYs of the model to build the index
+        for o in self.getAttachedEmpties():
+            self.add(o)
+
+    def getAttachedEmpties(self):
+        """
+        Returns the attached EMPTYs of the model from the registry
+        """
+        modelParent = self.modelParent
+        return [
+            o for o in registry.getObjects("wa")
+            if o.type=="EMPTY" and o.parent and o.parent.parent == modelParent
+        ]
+
+    def add(self, o):
+        """
+        Add the attached EMPTY <o> to the index. The drivers for <o> must be already set.
+        """
+        if o["g"] in self._attached:
+            return
+        o1, o2 = getReferencesForAttached(o)
+        # relative position of <o> on the edge defined by <o1> and <o2>
+        pos = (o.location - o1.location).length/(o2.location - o1.location).length
+        key = getKey(o2)
+        if not key in self.attached:
+            self.attached[key] = []
+        attached = self.attached[key]
+        numAttached = len(attached)
+        # insert new entry to <attached>
+        # all entries in <attached> are sorted by <pos>
+        # implementing bisect.insort_right(..)
+        lo = 0
+        hi = numAttached
+        while lo < hi:
+            mid = (lo+hi)//2
+            if pos < attached[mid][1]:
+                hi = mid
+            else:
+                lo = mid+1
+        # insert a list: [<o>, <pos>, <previous entry>, <next entry>, <key>]
+        entry = [o, pos, attached[lo-1] if lo else None, attached[lo] if lo<numAttached else None, key]
+        # update the neighboring entries of <attached> for the <entry> to be inserted
+        # the previous entry if available:
+        if lo:
+            attached[lo-1][3] = entry
+        # the next entry if available:
+        if lo<numAttached:
+            attached[lo][2] = entry
+        # finally, insert the new <entry> to self.attached
+        attached.insert(lo, entry)
+        # and to self._attached
+        self._attached[o["g"]] = entry
+
+    def remove(self, o):
+        """
+        Remove the attached EMPTY <o> from the index
+        """
+        entry = self._attached.pop(o["g"], None)
+        if not entry:
+            return
+        prev, next = entry[2], entry[3]
+        if prev:
+            prev[3] = next
+        if next:
+            next[2] = prev
+        attached = self.attached[entry[4]]
+        for i,e in enumerate(attached):
+            if e is entry:
+                del attached[i]
+                break
+
+    def update(self, o):
+        """
+        Update the position of the attached EMPTY <o> in the index after <o> has been moved
+        """
+        self.remove(o)
+        self.add(o)
+
+    def isValid(self):
+        """
+        Checks if all attached EMPTYs in the index still exist
+        """
+        try:
+            return all(entry[0].users for entry in self._attached.values())
+        except ReferenceError:
+            # an attached EMPTY has been removed
+            return False
+
+    def sync(self, version):
+        """
+        Synchronize the index with the registry of the <version>
+
+        Returns:
+            False if an attached EMPTY of the index has been removed, so the index must be rebuilt
+        """
+        if not self.isValid():
+            return False
+        # the attached EMPTYs created without <self.add(..)>, e.g. by copying a level
+        for o in self.getAttachedEmpties():
+            if not o["g"] in self._attached:
+                self.add(o)
+        self.version = version
+        return True
+
+
+# key: pointer of the model parent; value: an instance of AttachedIndex
+indices = {}
+
+
+def getAttachedIndex(modelParent, create=True):
+    """
+    Returns the index of the attached walls for the model defined by <modelParent>.
+    If <create> is False and the index doesn't exist, None is returned.
+    """
+    key = modelParent.as_pointer()
+    index = indices.get(key)
+    if index:
+        version = registry.getVersion()
+        # the registry has been rebuilt, since Blender objects have been added or removed,
+        # e.g. an attached wall has been deleted
+        if index.version != version and not index.sync(version):
+            del indices[key]
+            index = None
+    if not index:
+        if not create:
+            return None
+        index = AttachedIndex(modelParent)
+        indices[key] = index
+    return index
+
+
+@persistent
+def invalidateIndices(*args):
+    indices.clear()
+
+
+@persistent
+def onSceneUpdate(scene):
+    """
+    Update the positions of the attached EMPTYs moved or created by any means,
+    e.g. by moving the hosting wall segment
+    """
+    if not indices or not bpy.data.objects.is_updated:
+        return
+    for o in registry.getObjects("wa"):
+        if o.is_updated and o.parent and o.parent.parent:
+            index = indices.get(o.parent.parent.as_pointer())
+            if index:
+                index.update(o)
+
+
+handlers = (
+    bpy.app.handlers.load_post,
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post
+)
+
+
+def register():
+    for h in handlers:
+        if not invalidateIndices in h:
+            h.append(invalidateIndices)
+    if not onSceneUpdate in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.append(onSceneUpdate)
+
+
+def unregister():
+    for h in handlers:
+        if invalidateIndices in h:
+            h.remove(invalidateIndices)
+    if onSceneUpdate in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.remove(onSceneUpdate)
+    indices.clear()
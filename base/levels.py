@@ -0,0 +1,207 @@
+import bpy
+from bpy.app.handlers import persistent
+from kernel.levels import getElevations
+
+
+class LevelIndex:
+    """
+    A cache of the elevations of the levels of a scene
+
+    The elevations are calculated with a prefix sum of the level heights, so the elevation and
+    the height of a level as well as the total height of the building are available in O(1).
+    The cache must be invalidated with <invalidateLevelIndex(..)> after levels have been added or removed
+    or after the height of a level bundle has been changed. A change of the bundle or the index
+    of a level invalidates the cache through the update callback of <gui.levels.Level>.
+    """
+
+    def __init__(self, prk):
+        levels = prk.levels
+        bundles = prk.levelBundles
+        # the level heights in the order of the GUI list of levels
+        self.heights = [bundles[l.bundle].height for l in levels]
+        # the elevation of each level and the total height as the last element
+        self.elevations = getElevations(self.heights)
+        # key: the index of a level; value: the position of the level in the GUI list of levels
+        self.positions = dict((l.index, i) for i,l in enumerate(levels))
+
+    def getPosition(self, levelIndex):
+        """
+        Returns the position of the level with the index <levelIndex> in the GUI list of levels
+        """
+        return self.positions[levelIndex]
+
+    def getZ(self, position):
+        """
+        Returns the elevation of the level at the <position> in the GUI list of levels
+        """
+        return self.elevations[position]
+
+    def getHeight(self, position):
+        """
+        Returns the height of the level at the <position> in the GUI list of levels
+        """
+        return self.heights[position]
+
+    def getTotalHeight(self):
+        return self.elevations[-1]
+
+
+# key: pointer of a scene; value: an instance of LevelIndex
+indices = {}
+
+
+def getLevelIndex(context):
+    """
+    Returns the index of the levels for the scene of the <context>, the index is built if necessary
+    """
+    prk = context.scene.prk
+    key = context.scene.as_pointer()
+    index = indices.get(key)
+    # the check for the number of levels is a safety net for the changes made without invalidation
+    if not index or len(index.heights) != len(prk.levels):
+        index = LevelIndex(prk)
+        indices[key] = index
+    return index
+
+
+def invalidateLevelIndex(context=None):
+    """
+    Invalidate the index of the levels for the scene of the <context> or for all scenes if <context> is None
+    """
+    if context:
+        indices.pop(context.scene.as_pointer(), None)
+    else:
+        indices.clear()
+
+
+# key: pointer of a scene; value: a tuple (the number of Blender objects in the scene, a dictionary
+# with the pointer of a level parent as the key and the list of its descendants as the value,
+# a dictionary with the pointer of a Blender object as the key and the pointer of its level parent
+# or None as the value)
+levelObjects = {}
+
+
+def getLevelObjects(context, levelParent):
+    """
+    Returns a list of all descendants of the level parent <levelParent>
+
+    The lists for all level parents of the scene are built with a single pass over the Blender objects
+    of the scene instead of a recursive walk over <children> of each Blender object,
+    since each access to <children> iterates over all Blender objects.
+    The lists are rebuilt if the number of Blender objects in the scene has been changed,
+    after <util.blender.parent_set(..)> has been called or if a Blender object of the list for
+    <levelParent> doesn't belong to <levelParent> anymore. A Blender object reparented by any other means,
+    e.g. in the GUI, invalidates the lists on the next scene update, see <onSceneUpdate(..)>.
+    """
+    scene = context.scene
+    key = scene.as_pointer()
+    numObjects = len(scene.objects)
+    entry = levelObjects.get(key)
+    if entry and entry[0] == numObjects and not isValid(entry[1].get(levelParent.as_pointer()), levelParent):
+        entry = None
+    if not entry or entry[0] != numObjects:
+        # key: the pointer of a Blender object; value: the pointer of its level parent or None
+        owners = {}
+        objects = {}
+        for o in scene.objects:
+            owner = getOwner(o, owners)
+            if owner:
+                if not owner in objects:
+                    objects[owner] = []
+                objects[owner].append(o)
+        entry = (numObjects, objects, owners)
+        levelObjects[key] = entry
+    return entry[1].get(levelParent.as_pointer(), [])
+
+
+def getOwner(o, owners):
+    """
+    Returns the pointer of the level parent of the Blender object <o> or None
+
+    Args:
+        owners (dict): The cache of the level parents, see <getLevelObjects(..)>
+    """
+    pointer = o.as_pointer()
+    if not pointer in owners:
+        parent = o.parent
+        if not parent:
+            owners[pointer] = None
+        elif "level" in parent:
+            owners[pointer] = parent.as_pointer()
+        else:
+            owners[pointer] = getOwner(parent, owners)
+    return owners[pointer]
+
+
+def isValid(objects, levelParent):
+    """
+    Checks if all Blender <objects> are still the descendants of the level parent <levelParent>
+    """
+    if objects:
+        for o in objects:
+            parent = o.parent
+            while parent and not "level" in parent:
+                parent = parent.parent
+            if parent != levelParent:
+                return False
+    return True
+
+
+def invalidateLevelObjects(context=None):
+    """
+    Invalidate the lists of the descendants of the level parents for the scene of the <context> or
+    for all scenes if <context> is None
+    """
+    if context:
+        levelObjects.pop(context.scene.as_pointer(), None)
+    else:
+        levelObjects.clear()
+
+
+@persistent
+def invalidateIndices(*args):
+    indices.clear()
+    levelObjects.clear()
+
+
+@persistent
+def onSceneUpdate(scene):
+    """
+    Invalidate the lists of the descendants of the level parents for the <scene>
+    if an updated Blender object has got another level parent, e.g. after it has been reparented in the GUI
+    """
+    key = scene.as_pointer()
+    entry = levelObjects.get(key)
+    if not entry or not bpy.data.objects.is_updated:
+        return
+    owners = entry[2]
+    for o in scene.objects:
+        # a Blender object unknown to <owners> has been added after the lists were built
+        if o.is_updated and getOwner(o, {}) != owners.get(o.as_pointer(), 0):
+            del levelObjects[key]
+            return
+
+
+handlers = (
+    bpy.app.handlers.load_post,
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post
+)
+
+
+def register():
+    for h in handlers:
+        if not invalidateIndices in h:
+            h.append(invalidateIndices)
+    if not onSceneUpdate in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.append(onSceneUpdate)
+
+
+def unregister():
+    for h in handlers:
+        if invalidateIndices in h:
+            h.remove(invalidateIndices)
+    if onSceneUpdate in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.remove(onSceneUpdate)
+    indices.clear()
+    levelObjects.clear()
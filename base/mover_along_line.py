@@ -73,4 +73,6 @@ class AttachedMover(Mover):
         super().end()
         o = self.o
         wall = self.wall
-        addAttachedDrivers(wall, o, wall.getPrevious(o) if o["e"] else wall.getNext(o), self.e1, self.e2, False)
\ No newline at end of file
+        addAttachedDrivers(wall, o, wall.getPrevious(o) if o["e"] else wall.getNext(o), self.e1, self.e2, False)
+        # <o> has been moved along the wall segment, so its position in the index of attached walls is changed
+        wall.updateAttachedIndex(o)
\ No newline at end of file
@@ -10,4 +10,6 @@ class AlongWallMover:
         bpy.ops.transform.translate('INVOKE_DEFAULT', constraint_axis=(True, False, False), constraint_orientation='LOCAL')
     
     def end(self):
-        self.item.keepRatioCenter()
\ No newline at end of file
+        self.item.keepRatioCenter()
+        # the order of the holes along the wall segment could have been changed
+        self.item.updateCutout()
\ No newline at end of file
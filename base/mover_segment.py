@@ -27,27 +27,31 @@ def addMoverDrivers(e, o, p=None):
         # initial vector connecting <p> and <e> divided by m0.length_squared
         v0 = (e.location - p)/m0.length_squared
         
+        # p + (m0.x*(ox-p.x)+m0.y*(oy-p.y))*v0 is linear in <ox> and <oy>,
+        # so precalculate its coefficients to keep the expressions short
+        a = m0.x*v0
+        b = m0.y*v0
+        c = p - (m0.x*p.x + m0.y*p.y)*v0
+        
         # x
         x = e.driver_add("location", 0)
         addTransformsVariable(x, "ox", o, "LOC_X")
         addTransformsVariable(x, "oy", o, "LOC_Y")
-        # p.x +(m0.x*(ox-p.x)+m0.y*(oy-p.y))*v0.x
-        x.driver.expression = strf(p.x) + "+("+strf(m0.x)+"*(ox-"+strf(p.x)+")+"+strf(m0.y)+"*(oy-"+strf(p.y)+"))*"+strf(v0.x)
+        x.driver.expression = "("+strf(c.x)+")+("+strf(a.x)+")*ox+("+strf(b.x)+")*oy"
         # y
         y = e.driver_add("location", 1)
         addTransformsVariable(y, "ox", o, "LOC_X")
         addTransformsVariable(y, "oy", o, "LOC_Y")
-        # p.y +(m0.x*(ox-p.x)+m0.y*(oy-p.y))*v0.y
-        y.driver.expression = strf(p.y) + "+("+strf(m0.x)+"*(ox-"+strf(p.x)+")+"+strf(m0.y)+"*(oy-"+strf(p.y)+"))*"+strf(v0.y)
+        y.driver.expression = "("+strf(c.y)+")+("+strf(a.y)+")*ox+("+strf(b.y)+")*oy"
     else:
         # x
         x = e.driver_add("location", 0)
         addTransformsVariable(x, "x", o, "LOC_X")
-        x.driver.expression = "x+("+strf(e.location.x)+")-("+strf(o.location.x)+")"
+        x.driver.expression = "x+("+strf(e.location.x-o.location.x)+")"
         # y
         y = e.driver_add("location", 1)
         addTransformsVariable(y, "y", o, "LOC_Y")
-        y.driver.expression = "y+("+strf(e.location.y)+")-("+strf(o.location.y)+")"
+        y.driver.expression = "y+("+strf(e.location.y-o.location.y)+")"
 
 
 class SegmentMover:
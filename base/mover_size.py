@@ -5,10 +5,11 @@ class SizeMover:
     A mover to set the size (width or height) of the item
     """ 
     def __init__(self, item, o):
-        pass
+        self.item = item
     
     def start(self):
         bpy.ops.transform.translate('INVOKE_DEFAULT')
     
     def end(self):
-        pass
\ No newline at end of file
+        # the hole for the item in the wall part must get the new size
+        self.item.updateCutout()
\ No newline at end of file
@@ -0,0 +1,212 @@
+import bpy
+from bpy.app.handlers import persistent
+
+
+def getTypes(o):
+    """
+    Returns a list of types under which the Blender object <o> is stored in the registry
+
+    Besides the item type stored in o["t"], there are types for the special EMPTYs:
+    "level" for level parents, "co" for the common parent of external walls and
+    "h" for the EMPTY controlling the total height of the building
+    """
+    types = []
+    if "t" in o:
+        types.append(o["t"])
+    if "level" in o:
+        types.append("level")
+    if "co" in o and o["co"]:
+        types.append("co")
+    if "h" in o and o["h"]:
+        types.append("h")
+    return types
+
+
+def isValid(o, t):
+    """
+    Checks if the Blender object <o> still exists and still has the type <t>
+    """
+    try:
+        return t in getTypes(o)
+    except ReferenceError:
+        # <o> has been removed
+        return False
+
+
+class Registry:
+    """
+    A registry of Prokitektura Blender objects keyed by their type, see <getTypes(..)>
+
+    A lookup is a dictionary hit. A hit is checked for validity; if it isn't valid or
+    there is no hit while Blender objects have been added or removed since the registry was built,
+    the registry is rebuilt with a single pass over <bpy.data.objects>. The code creating
+    Prokitektura objects adds them to the registry with <self.add(..)> to avoid the rebuild.
+    The registry is invalidated after a .blend file is loaded and after undo and redo,
+    since the references to Blender objects aren't valid anymore, and by <onSceneUpdate(..)>
+    if a Prokitektura object has been created without <self.add(..)>.
+    """
+
+    def __init__(self):
+        # increased each time the registry is rebuilt, see <self.getVersion()>
+        self.version = 0
+        self.invalidate()
+
+    def invalidate(self):
+        # key: type; value: a list of Blender objects with the type
+        self.objects = None
+        # key: (parent pointer, type, level index or None); value: a Blender object
+        self.children = None
+        # the number of Blender objects at the time the registry was built
+        self.numObjects = 0
+        # the pointers of the Blender objects known to the registry
+        self.pointers = None
+
+    def build(self):
+        self.objects = {}
+        self.children = {}
+        self.pointers = set()
+        for o in bpy.data.objects:
+            self._add(o)
+        self.numObjects = len(bpy.data.objects)
+        self.version += 1
+
+    def add(self, o):
+        """
+        Add the Blender object <o> to the registry.
+        It's supposed to be called after an item type or a special attribute is set for <o>.
+        """
+        if self.objects is None:
+            # the registry will be built with <o> on the next lookup
+            return
+        self._add(o)
+        # <o> is known to the registry, so it doesn't have to be rebuilt because of <o>,
+        # unless other Blender objects have been added or removed since the registry was checked
+        if self.numObjects == len(bpy.data.objects) - 1:
+            self.numObjects += 1
+
+    def _add(self, o):
+        self.pointers.add(o.as_pointer())
+        for t in getTypes(o):
+            if not t in self.objects:
+                self.objects[t] = []
+            self.objects[t].append(o)
+            if o.parent:
+                self.children[self.getKey(o.parent, t, o["level"] if t == "level" else None)] = o
+
+    def getKey(self, parent, t, level):
+        return parent.as_pointer(), t, level
+
+    def isStale(self):
+        """
+        Checks if the registry has to be rebuilt, i.e. it doesn't exist yet or
+        Blender objects have been added or removed since it was built
+        """
+        return self.objects is None or self.numObjects != len(bpy.data.objects)
+
+    def getVersion(self):
+        """
+        Returns the version of the registry. The version is increased each time the registry is rebuilt,
+        i.e. after Blender objects have been added or removed without <self.add(..)>.
+        The indices depending on the set of Blender objects of the scene compare it with the version
+        they were built for.
+        """
+        if self.isStale():
+            self.build()
+        return self.version
+
+    def getObjects(self, t):
+        """
+        Returns a list of all Blender objects with the type <t>
+        """
+        if self.isStale():
+            self.build()
+        objects = self.objects.get(t, ())
+        if not all(isValid(o, t) for o in objects):
+            self.build()
+            objects = self.objects.get(t, ())
+        return objects
+
+    def getObject(self, t, scene):
+        """
+        Returns the first Blender object without a parent with the type <t>
+        linked to the <scene> or None
+        """
+        if self.objects is None:
+            self.build()
+        result = self._getObject(t, scene)
+        if not result and self.isStale():
+            self.build()
+            result = self._getObject(t, scene)
+        return result
+
+    def _getObject(self, t, scene):
+        for o in self.objects.get(t, ()):
+            if isValid(o, t) and not o.parent and o.name in scene.objects:
+                return o
+
+    def getChild(self, parent, t, level=None):
+        """
+        Returns the child of the Blender object <parent> with the type <t> or None
+
+        Args:
+            level (int): The level index if <t> is "level"
+        """
+        if self.objects is None:
+            self.build()
+        key = self.getKey(parent, t, level)
+        o = self.children.get(key)
+        if o and isValid(o, t) and o.parent == parent and (level is None or o["level"] == level):
+            return o
+        # either the hit isn't valid anymore or there was no hit
+        if o or self.isStale():
+            self.build()
+            return self.children.get(key)
+
+
+registry = Registry()
+
+
+@persistent
+def invalidateRegistry(*args):
+    registry.invalidate()
+
+
+@persistent
+def onSceneUpdate(scene):
+    """
+    Invalidate the registry if a Blender object with a Prokitektura type has appeared without
+    <registry.add(..)> while the number of Blender objects hasn't changed, e.g. if another
+    Blender object has been removed at the same time
+    """
+    if registry.isStale() or not bpy.data.objects.is_updated:
+        return
+    pointers = registry.pointers
+    for o in scene.objects:
+        # a new Blender object is updated during the first scene update after its creation
+        if o.is_updated and not o.as_pointer() in pointers and getTypes(o):
+            registry.invalidate()
+            break
+
+
+handlers = (
+    bpy.app.handlers.load_post,
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post
+)
+
+
+def register():
+    for h in handlers:
+        if not invalidateRegistry in h:
+            h.append(invalidateRegistry)
+    if not onSceneUpdate in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.append(onSceneUpdate)
+
+
+def unregister():
+    for h in handlers:
+        if invalidateRegistry in h:
+            h.remove(invalidateRegistry)
+    if onSceneUpdate in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.remove(onSceneUpdate)
+    registry.invalidate()
@@ -1,5 +1,8 @@
 import math, json
-import bpy, mathutils
+import numpy
+import bpy
+from base import registry
+from kernel.projection import TransverseMercator
 
 # ExportHelper is a helper class, defines filename and
 # invoke() function which calls the file selector.
@@ -7,37 +10,53 @@ from bpy_extras.io_utils import ExportHelper
 from bpy.props import StringProperty, BoolProperty, EnumProperty
 
 
-class TransverseMercator:
-    radius = 6378137
+def getLevel(o):
+    """
+    Returns the level index for the Blender object <o> or None if <o> isn't located on a level
+    """
+    parent = o.parent
+    return parent["level"] if parent and "level" in parent else None
 
-    def __init__(self, **kwargs):
-        # setting default values
-        self.lat = 0 # in degrees
-        self.lon = 0 # in degrees
-        self.k = 1 # scale factor
-        
-        for attr in kwargs:
-            setattr(self, attr, kwargs[attr])
-        self.latInRadians = math.radians(self.lat)
-
-    def fromGeographic(self, lat, lon):
-        lat = math.radians(lat)
-        lon = math.radians(lon-self.lon)
-        B = math.sin(lon) * math.cos(lat)
-        x = 0.5 * self.k * self.radius * math.log((1+B)/(1-B))
-        y = self.k * self.radius * ( math.atan(math.tan(lat)/math.cos(lon)) - self.latInRadians )
-        return (x,y)
-
-    def toGeographic(self, x, y):
-        x = x/(self.k * self.radius)
-        y = y/(self.k * self.radius)
-        D = y + self.latInRadians
-        lon = math.atan(math.sinh(x)/math.cos(D))
-        lat = math.asin(math.sin(D)/math.cosh(x))
-
-        lon = self.lon + math.degrees(lon)
-        lat = math.degrees(lat)
-        return (lat, lon)
+
+def getWallRings(mesh):
+    """
+    Returns the footprint of the wall part <mesh> as a list of rings of 2D points in the world coordinates:
+    a single ring for an open wall part or two rings (the outer and the inner ones) for a closed wall part
+    """
+    # key: the name of the HOOK modifier (l<group> or r<group>); value: the corner EMPTY
+    corners = dict(
+        (m.name, m.object) for m in mesh.modifiers
+        if m.type == 'HOOK' and m.object and len(m.name) > 1 and m.name[0] in "lr"
+    )
+    if not corners:
+        return ()
+    closed = not "end" in mesh
+    start = next(iter(corners))[1:] if closed else mesh["start"]
+    
+    def getSide(prefix):
+        points = []
+        group = start
+        while True:
+            e = corners[prefix+group]
+            points.append( (e.parent.matrix_world * e.location)[:2] )
+            if "e" in e and e["e"]:
+                break
+            group = e["n"]
+            if group == start:
+                break
+        return points
+    
+    left = getSide("l")
+    right = getSide("r")
+    if not closed:
+        right.reverse()
+        return (left + right,)
+    # the outer ring goes first
+    return (left, right) if getArea(left) > getArea(right) else (right, left)
+
+
+def getArea(points):
+    return abs(sum(points[i-1][0]*p[1] - p[0]*points[i-1][1] for i,p in enumerate(points)))/2.
 
 
 class GeoJson(bpy.types.Operator, ExportHelper):
@@ -51,51 +70,141 @@ class GeoJson(bpy.types.Operator, ExportHelper):
 
     # List of operator properties, the attributes will be assigned
     # to the class instance from the operator settings before calling.
-    use_setting = BoolProperty(
-            name="Example Boolean",
-            description="Example Tooltip",
-            default=True,
+    exportWalls = BoolProperty(
+            name="Walls",
+            description="Export the footprints of the walls as a separate layer",
+            default=False,
             )
 
-    type = EnumProperty(
-            name="Example Enum",
-            description="Choose between two items",
-            items=(('OPT_A', "First Option", "Description one"),
-                   ('OPT_B', "Second Option", "Description two")),
-            default='OPT_A',
+    exportOpenings = BoolProperty(
+            name="Openings",
+            description="Export windows and doors as a separate layer of points",
+            default=False,
             )
 
+    exportLevels = BoolProperty(
+            name="Levels",
+            description="Export the levels as a separate layer of features without geometry",
+            default=False,
+            )
+
+    # the number of points projected at once
+    batchSize = 65536
+
     def execute(self, context):
-        features = []
-        data = {
-            "type": "FeatureCollection",
-            "features": features
-        }
-        rotationMatrix = mathutils.Matrix.Rotation(math.radians(context.scene["heading"]), 4, "Z")
-        projection = TransverseMercator(lat=context.scene["latitude"], lon=context.scene["longitude"])
-        # iterate through all rooms
-        for o in context.scene.objects:
-            if not ("t" in o and o["t"] == "room"):
-                continue
-            coords = []
+        scene = context.scene
+        heading = math.radians(scene["heading"])
+        self.cos = math.cos(heading)
+        self.sin = math.sin(heading)
+        self.projection = TransverseMercator(lat=scene["latitude"], lon=scene["longitude"])
+        
+        # The features are written to the file one by one and projected in batches,
+        # so the memory consumption doesn't depend on the size of the model
+        with open(self.filepath, 'w', encoding="utf-8") as f:
+            self.f = f
+            self.numFeatures = 0
+            f.write('{"type": "FeatureCollection", "features": [')
+            self.writeFeatures(self.getRooms(context))
+            if self.exportWalls:
+                self.writeFeatures(self.getWalls(context))
+            if self.exportOpenings:
+                self.writeFeatures(self.getOpenings(context))
+            if self.exportLevels:
+                self.writeFeatures(self.getLevels(context))
+            f.write("\n]}")
+        
+        return {'FINISHED'}
+    
+    def getObjects(self, context, t):
+        objects = context.scene.objects
+        for o in registry.getObjects(t):
+            if o.name in objects:
+                yield o
+    
+    def getRooms(self, context):
+        """
+        Yields a tuple (geometry type, rings, properties) for each room
+        """
+        for o in self.getObjects(context, "room"):
             # iterate through EMPTYs that control the vertices of polygon of the area
-            for m in o.modifiers:
-                e = m.object
-                p = rotationMatrix * e.parent.matrix_world * e.location
-                p = projection.toGeographic(p.x, p.y)
-                coords.append( (p[1], p[0]) )
-            features.append({
-                "type": "Feature",
-                "geometry": {
-                    "type": "Polygon",
-                    "coordinates": (coords,)
-                },
-                "properties": {
-                    "name": o.name
-                }
-            })
-        f = open(self.filepath, 'w', encoding="utf-8")
-        f.write(json.dumps(data))
-        f.close()
+            ring = [
+                (m.object.parent.matrix_world * m.object.location)[:2]
+                for m in o.modifiers if m.type == 'HOOK' and m.object
+            ]
+            # skip a room without valid hooks, e.g. if the EMPTYs of its hooks have been deleted
+            if ring:
+                yield "Polygon", (ring,), {"layer": "room", "name": o.name, "level": getLevel(o)}
     
-        return {'FINISHED'}
+    def getWalls(self, context):
+        for o in self.getObjects(context, "wall_part"):
+            rings = getWallRings(o)
+            if rings:
+                yield "Polygon", rings, {"layer": "wall", "name": o.name, "level": getLevel(o)}
+    
+    def getOpenings(self, context):
+        for t in ("window", "door"):
+            for o in self.getObjects(context, t):
+                yield "Point", ((o.matrix_world.translation[:2],),), {"layer": t, "name": o.name, "level": getLevel(o)}
+    
+    def getLevels(self, context):
+        prk = context.scene.prk
+        for l in prk.levels:
+            yield None, (), {"layer": "level", "name": l.name, "level": l.index, "height": prk.levelBundles[l.bundle].height}
+    
+    def writeFeatures(self, features):
+        """
+        Project and write <features> in batches of about <self.batchSize> points
+        
+        Args:
+            features: An iterable of tuples (geometry type, rings, properties),
+                where rings is a list of lists of 2D points in the world coordinates
+        """
+        batch = []
+        numPoints = 0
+        for feature in features:
+            batch.append(feature)
+            numPoints += sum(len(ring) for ring in feature[1])
+            if numPoints >= self.batchSize:
+                self.writeBatch(batch, numPoints)
+                batch = []
+                numPoints = 0
+        if batch:
+            self.writeBatch(batch, numPoints)
+    
+    def writeBatch(self, batch, numPoints):
+        if numPoints:
+            points = numpy.fromiter(
+                (c for _,rings,_ in batch for ring in rings for p in ring for c in p),
+                dtype=numpy.float64,
+                count=2*numPoints
+            ).reshape(numPoints, 2)
+            # rotate the points by the heading angle
+            x = self.cos*points[:,0] - self.sin*points[:,1]
+            y = self.sin*points[:,0] + self.cos*points[:,1]
+            lat, lon = self.projection.toGeographicArray(x, y)
+            coords = numpy.column_stack((lon, lat)).tolist()
+        index = 0
+        f = self.f
+        for geometryType, rings, properties in batch:
+            if geometryType:
+                _rings = []
+                for ring in rings:
+                    _ring = coords[index:index+len(ring)]
+                    index += len(ring)
+                    if geometryType == "Polygon":
+                        # a GeoJSON ring is closed
+                        _ring.append(_ring[0])
+                    _rings.append(_ring)
+                geometry = {
+                    "type": geometryType,
+                    "coordinates": _rings[0][0] if geometryType == "Point" else _rings
+                }
+            else:
+                geometry = None
+            f.write(",\n" if self.numFeatures else "\n")
+            f.write(json.dumps({
+                "type": "Feature",
+                "geometry": geometry,
+                "properties": properties
+            }))
+            self.numFeatures += 1
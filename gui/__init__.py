@@ -29,6 +29,8 @@ class PanelLevels(bpy.types.Panel):
             level = prk.levels[prk.levelIndex]
             layout.prop(prk.levelBundles[level.bundle], "height")
             layout.operator("prk.level_remove", icon='ZOOMOUT')
+            layout.operator("prk.level_copy")
+            layout.operator("prk.area_make_all")
 
 
 class PanelNewWall(bpy.types.Panel):
@@ -55,6 +57,8 @@ class PanelNewWall(bpy.types.Panel):
         #row.prop(prk, "newWallHeightMode", expand=True) FIXME
         box.prop(prk, "wallAtRight")
         box.prop(prk, "newWallWidth")
+        layout.operator("prk.wall_import")
+        layout.operator("prk.wall_import_geojson")
 
 
 class PanelAddItem(bpy.types.Panel):
@@ -270,6 +274,12 @@ class PrkStudioProperties(bpy.types.PropertyGroup):
     #        ("custom", "custom", "Custom height defined by the specified levels") FIXME
     #    ]
     #) FIXME
+    cutoutOpenings = bpy.props.BoolProperty(
+        name = "Cut openings without Boolean",
+        description = "Insert rectangular holes for new windows and doors directly into the wall mesh "+
+            "instead of cutting the wall with a BOOLEAN modifier",
+        default = False
+    )
     newLevelHeight = bpy.props.FloatProperty(
         name = "Height",
         description = "Height of a new level",
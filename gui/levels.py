@@ -1,27 +1,50 @@
 import bpy
-from base import pContext, getModelParent
+from base import pContext, getModelParent, registry, getLevelIndex, invalidateLevelIndex, getLevelObjects
+from kernel.levels import getChangedOffsets
 
 
-def updateHeight(bundle, context):
-    # update height and position for all levels
+def restackLevels(context):
+    """
+    Set the z-positions of all level parents and the EMPTY controlling the total height of the building
+    out of the cumulative heights of the levels.
+
+    Only the EMPTYs whose z-position has been changed are moved, so the HOOK modifiers and drivers
+    depending on the other EMPTYs aren't invalidated.
+
+    Returns:
+        The number of Blender objects invalidated, i.e. the moved EMPTYs and their children
+    """
     prk = context.scene.prk
-    # build a dictionary of all level parents up
-    levels = {}
     parent = getModelParent(context)
-    for o in parent.children:
-        if "level" in o:
-            levels[o["level"]] = o
-        elif "h" in o:
-            totalHeight = o
-    h = 0.
-    update = False
-    for l in prk.levels:
-        if update and l.index in levels:
-            levels[l.index].location.z = h
-        else:
-            update = True
-        h += prk.levelBundles[l.bundle].height
-    totalHeight.location.z = h
+    if not parent or not prk.levels:
+        return 0
+    elevations = getLevelIndex(context).elevations
+    # the EMPTY for each elevation, the position of the lowest level parent is never changed
+    empties = [None] + [registry.getChild(parent, "level", l.index) for l in prk.levels[1:]]
+    empties.append(registry.getChild(parent, "h"))
+    numInvalidated = 0
+    for i, z in getChangedOffsets([o and o.location.z for o in empties], elevations):
+        o = empties[i]
+        o.location.z = z
+        # the descendants of a level parent are taken from the index instead of walking <o.children>,
+        # the EMPTY for the total height doesn't have children
+        numInvalidated += 1 + (len(getLevelObjects(context, o)) if "level" in o else 0)
+    return numInvalidated
+
+
+def updateHeight(bundle, context):
+    # update height and position for all levels
+    invalidateLevelIndex(context)
+    if restackLevels(context) and context.screen:
+        # the EMPTYs have been moved from the GUI panel, so redraw the 3D views
+        for area in context.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+def updateLevel(level, context):
+    # the height or the position of the level in the index of the levels has been changed
+    invalidateLevelIndex(context)
 
 
 def toggleLayerVisibility(level, context):
@@ -30,9 +53,12 @@ def toggleLayerVisibility(level, context):
     if not parent:
         return
     # find the related level parent Blender object
-    for o in parent.children:
-        if "level" in o and o["level"] == level.index:
-            toggleObjectVisibility(o, hide)
+    o = registry.getChild(parent, "level", level.index)
+    if o:
+        toggleObjectVisibility(o, hide)
+        # the descendants of the level parent are taken from the index without walking the hierarchy
+        for _o in getLevelObjects(context, o):
+            toggleObjectVisibility(_o, hide)
 
 
 def toggleObjectVisibility(o, hide):
@@ -48,8 +74,6 @@ def toggleObjectVisibility(o, hide):
             del o["_"]
         else:
             o.hide = False
-    for _o in o.children:
-        toggleObjectVisibility(_o, hide)
 
 
 class PLAN_UL_levels(bpy.types.UIList):
@@ -67,14 +91,16 @@ class PLAN_UL_levels(bpy.types.UIList):
 
 class Level(bpy.types.PropertyGroup):
     index = bpy.props.IntProperty(
-        description="Level index"
+        description="Level index",
+        update=updateLevel
     )
     name = bpy.props.StringProperty(
         description="Level name"
     )
     bundle = bpy.props.IntProperty(
         subtype='UNSIGNED',
-        description="Index of a level bundle (see LevelBundle)"
+        description="Index of a level bundle (see LevelBundle)",
+        update=updateLevel
     )
     visible = bpy.props.BoolProperty(
         description="",
@@ -125,6 +151,7 @@ class AddLevel(bpy.types.Operator):
             level.name = "Level "+str(levelIndex)
             level.bundle = bundleIndex
             levelIndex += 1
+        invalidateLevelIndex(context)
         return {'FINISHED'}
 
 
@@ -166,4 +193,62 @@ class RemoveLevel(bpy.types.Operator):
                             level.bundle -= 1
         else:
             bundles.clear()
-        return {'FINISHED'}
\ No newline at end of file
+        invalidateLevelIndex(context)
+        return {'FINISHED'}
+
+
+class CopyLevel(bpy.types.Operator):
+    bl_idname = "prk.level_copy"
+    bl_label = "Copy level"
+    bl_description = "Copy walls, areas, finishes and openings of the active level to the specified number of "+\
+        "levels above it; the missing levels are added with the bundle of the active level"
+    bl_options = {"REGISTER", "UNDO"}
+    
+    def invoke(self, context, event):
+        from base.attached import invalidateIndices
+        from item.level import getLevelParent, copyLevel, rehook
+        prk = context.scene.prk
+        levels = prk.levels
+        modelParent = getModelParent(context)
+        if not (modelParent and levels):
+            return {'CANCELLED'}
+        position = prk.levelIndex
+        source = registry.getChild(modelParent, "level", levels[position].index)
+        if not source:
+            self.report({'ERROR'}, "The active level is empty")
+            return {'CANCELLED'}
+        numCopies = prk.numNewLevels
+        # add the missing levels
+        bundle = levels[position].bundle
+        levelIndex = max(l.index for l in levels) + 1
+        for _ in range(position + numCopies + 1 - len(levels)):
+            level = levels.add()
+            level.index = levelIndex
+            level.name = "Level "+str(levelIndex)
+            level.bundle = bundle
+            levelIndex += 1
+        invalidateLevelIndex(context)
+        numInvalidated = restackLevels(context)
+        
+        # the Blender objects of the source level are collected only once
+        objects = getLevelObjects(context, source)
+        # the level parent or the EMPTY for the total height on top of the source level
+        nextSource = getLevelParent(context, modelParent, position+1)
+        # If the source level was the top level when its walls and finishes were created, their tops
+        # are hooked to the EMPTY controlling the total height of the building. The levels have been
+        # added on top of the source level, so its tops are hooked to the level parent above it.
+        # The copies get the level parent above each of them through the mapping below,
+        # the copy on the top level gets the EMPTY for the total height.
+        hEmpty = registry.getChild(modelParent, "h")
+        if hEmpty and nextSource != hEmpty:
+            rehook(objects, hEmpty, nextSource)
+        for _position in range(position+1, position+numCopies+1):
+            copyLevel(context, objects, {
+                source.name: getLevelParent(context, modelParent, _position),
+                nextSource.name: getLevelParent(context, modelParent, _position+1)
+            })
+        # the attached walls of the copies must be indexed
+        invalidateIndices()
+        if numInvalidated:
+            self.report({'INFO'}, "%s Blender objects have been moved to restack the levels" % numInvalidated)
+        return {'FINISHED'}
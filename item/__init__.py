@@ -2,10 +2,18 @@ from .wall.ops import *
 from .window.ops import *
 from .door.ops import *
 from .area.ops import *
+from .area import metrics
+from . import cutter, cutout
 
 
 def register():
     bpy.utils.register_module(__name__)
+    metrics.register()
+    cutter.register()
+    cutout.register()
 
 def unregister():
-    bpy.utils.unregister_module(__name__)
\ No newline at end of file
+    bpy.utils.unregister_module(__name__)
+    metrics.unregister()
+    cutter.unregister()
+    cutout.unregister()
\ No newline at end of file
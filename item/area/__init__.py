@@ -1,8 +1,11 @@
-import bpy, bmesh, mathutils
-from base import zero, defaultUvMap, zAxis, getLevelHeight, getNextLevelParent, getControlEmptyFromLoop
+import bpy, bmesh
+from base import zero, defaultUvMap, zAxis, getLevelHeight, getNextLevelParent, getControlEmptyFromLoop, registry,\
+    getReferencesForAttached
+from base.attached import getAttachedIndex
+from kernel.faces import findFaces
 from base.item import Item
-from util.blender import createMeshObject, createEmptyObject, getBmesh, setBmesh,\
-    assignGroupToVerts, addHookModifier, parent_set
+from util.blender import createMeshObject, createEmptyObject, getBmesh,\
+    assignGroupToVerts, addHookModifier, addHookModifiers, parent_set
 from item.wall import getWallFromEmpty, Wall
 
 
@@ -17,50 +20,13 @@ class WalkAlongWalls:
     
     def __init__(self, parent):
         self.parent = parent
+        # the index of the attached walls is kept for the model parent between the calls
+        index = getAttachedIndex(parent.parent)
         # key: (l|r)group; value: list of entries for all walls attached to the wall with the given key
-        self.attached = {}
+        self.attached = index.attached
         # key: group for an attached wall; value: entry from self.attached
-        self._attached = {}
+        self._attached = index._attached
         self.wallParts = {}
-        self.init()
-    
-    def init(self):
-        # iterate through all attached EMPTYs to build a registry of attached wall parts
-        for o in self.parent.children:
-            if not (o.type=="EMPTY" and "t" in o and o["t"]=="wa") or o["g"] in self._attached:
-                continue
-            o1, o2 = self.getWallPart(o).getReferencesForAttached(o)
-            # relative position of <o> on the edge defined by <o1> and <o2>
-            pos = (o.location - o1.location).length/(o2.location - o1.location).length
-            key = self.getKey(o2)
-            if not key in self.attached:
-                self.attached[key] = []
-            attached = self.attached[key]
-            numAttached = len(attached)
-            # insert new entry to <attached>
-            # all entries in <attached> are sorted by <pos>
-            # implementing bisect.insort_right(..)
-            lo = 0
-            hi = numAttached
-            while lo < hi:
-                mid = (lo+hi)//2
-                if pos < attached[mid][1]:
-                    hi = mid
-                else:
-                    lo = mid+1
-            # insert a list: [<o>, <pos>, <previous entry>, <next entry>]  
-            entry = [o, pos, attached[lo-1] if lo else None, attached[lo] if lo<numAttached else None]
-            # update the neighboring entries of <attached> for the <entry> to be inserted
-            # the previous entry if available:
-            if lo:
-                attached[lo-1][3] = entry
-            # the next entry if available:
-            if lo<numAttached:
-                attached[lo][2] = entry
-            # finally, insert the new <entry> to self.attached
-            attached.insert(lo, entry)
-            # and to self._attached
-            self._attached[o["g"]] = entry
     
     def walk(self, o, wall):
         # self.direction is None means we should walk along the attached wall starting
@@ -172,6 +138,119 @@ class WalkAlongWalls:
             (not a["l"] and ((not a["al"] and not a["e"]) or (a["al"] and a["e"])))
 
 
+class AreaFinder:
+    """
+    Finds all areas surrounded by walls in a single pass of the planar face finding
+    
+    The nodes of the planar graph are the corner EMPTYs of the walls,
+    the edges are the sides of the wall segments and the free ends of the walls.
+    A wall segment hosting attached walls is split by their attached EMPTYs,
+    the same way as <WalkAlongWalls.init()> does it.
+    """
+    
+    def __init__(self, parents):
+        """
+        Args:
+            parents (list): Blender parent objects for the walls, e.g. a level parent and
+                the common parent for external walls
+        """
+        # key: (mesh index, left, group); value: corner EMPTY
+        corners = {}
+        for parent in parents:
+            for o in parent.children:
+                if o.type == "EMPTY" and "t" in o and o["t"] in ("wc", "wa"):
+                    corners[(o["m"], bool(o["l"]), o["g"])] = o
+        self.corners = corners
+        self.empties = list(corners.values())
+        # key: the name of a corner EMPTY; value: its node index
+        self.nodes = dict((e.name, i) for i,e in enumerate(self.empties))
+        self.points = [self.getLocation(e) for e in self.empties]
+        self.edges = []
+    
+    def find(self):
+        """
+        Returns:
+            A list of lists of corner EMPTYs for each area,
+            the corner EMPTYs are ordered counterclockwise
+        """
+        empties = self.empties
+        nodes = self.nodes
+        points = self.points
+        
+        # key: (node index of <o1>, node index of <o2>) for the wall segment defined by
+        # the corner EMPTYs <o1> and <o2>; value: a list of (relative position, node index)
+        # for each attached EMPTY located on the wall segment
+        splits = {}
+        for e in empties:
+            if not "al" in e:
+                continue
+            o1, o2 = getReferencesForAttached(e)
+            if not (o1.name in nodes and o2.name in nodes):
+                continue
+            i1, i2 = nodes[o1.name], nodes[o2.name]
+            p1, p2, p = points[i1], points[i2], points[nodes[e.name]]
+            # relative position of <e> on the wall segment
+            pos = ( (p[0]-p1[0])*(p2[0]-p1[0]) + (p[1]-p1[1])*(p2[1]-p1[1]) ) / \
+                ( (p2[0]-p1[0])*(p2[0]-p1[0]) + (p2[1]-p1[1])*(p2[1]-p1[1]) )
+            key = (i1, i2)
+            if not key in splits:
+                splits[key] = []
+            splits[key].append((pos, nodes[e.name]))
+        
+        for e in empties:
+            n = self.getNext(e)
+            if n:
+                # the wall body is located on the side of the neighbor of <e>
+                self.addEdge(nodes[e.name], nodes[n.name], self.getNeighbor(e), splits)
+            if "e" in e and not "al" in e and e["l"]:
+                # the free end of the wall, the wall body is located on the side of the adjacent EMPTY
+                self.addEdge(
+                    nodes[e.name],
+                    nodes[self.getNeighbor(e).name],
+                    self.getNext(e) if not e["e"] else self.getPrevious(e),
+                    splits
+                )
+        return [ [empties[i] for i in face] for face, area in findFaces(points, self.edges) ]
+    
+    def addEdge(self, i1, i2, body, splits):
+        """
+        Add the edge between the nodes <i1> and <i2> directed so that
+        the wall body defined by the corner EMPTY <body> is located to the right from it
+        """
+        points = self.points
+        p1, p2, p = points[i1], points[i2], self.getLocation(body)
+        # is the wall body located to the left from the edge?
+        left = (p2[0]-p1[0])*(p[1]-p1[1]) - (p2[1]-p1[1])*(p[0]-p1[0]) > 0.
+        chain = [i1]
+        if (i1, i2) in splits:
+            chain.extend(i for pos,i in sorted(splits[(i1, i2)]))
+        chain.append(i2)
+        empties = self.empties
+        for j in range(len(chain)-1):
+            a, b = chain[j], chain[j+1]
+            # skip the part of the wall segment between both EMPTYs of the same attached end
+            if "al" in empties[a] and "al" in empties[b] and \
+                empties[a]["m"] == empties[b]["m"] and empties[a]["g"] == empties[b]["g"]:
+                continue
+            self.edges.append((b, a) if left else (a, b))
+    
+    def getLocation(self, e):
+        return (e.matrix_parent_inverse * e.location)[:2]
+    
+    def getNeighbor(self, e):
+        return self.corners[(e["m"], not e["l"], e["g"])]
+    
+    def getNext(self, e):
+        if "e" in e and e["e"]:
+            return None
+        return self.corners.get((e["m"], bool(e["l"]), e["n"]))
+    
+    def getPrevious(self, e):
+        if "e" in e and not e["e"]:
+            return None
+        return self.corners.get((e["m"], bool(e["l"]), e["p"]))
+
+
 class Area(Item):
     """A base class for item.Room and item.Floor"""
     
@@ -188,7 +267,16 @@ class Area(Item):
         # go through all EMPTYs and create an area from them
         return self.makeFromEmpties( WalkAlongWalls(o.parent).walk(o, wall) )
     
-    def makeFromEmpties(self, empties):
+    def makeFromEmpties(self, empties, update=True, parent=None):
+        """
+        Make an area Blender object out of the list of corner EMPTYs <empties>
+        
+        Args:
+            update (bool): Perform scene updates; it can be set to False if
+                a number of areas is created in a batch
+            parent: The level parent for the area; the parent of the first EMPTY
+                from <empties> is used if it isn't given
+        """
         context = self.context
         
         obj = createMeshObject(self.name)
@@ -214,16 +302,19 @@ class Area(Item):
         bm.free()
         
         # without scene.update() hook modifiers will not work correctly
-        context.scene.update()
+        if update:
+            context.scene.update()
         # perform parenting
-        self.parent_set(empties[0].parent, obj)
+        self.parent_set(parent or empties[0].parent, obj)
         # one more update
-        context.scene.update()
+        if update:
+            context.scene.update()
         
         # add HOOK modifiers
-        for e in empties:
-            group = e["g"]
-            addHookModifier(obj, group, e, group)
+        addHookModifiers(obj, [(e["g"], e, e["g"]) for e in empties])
+        
+        from .metrics import updateMetrics
+        updateMetrics(obj)
         return obj
     
     def create(self, o):
@@ -319,10 +410,8 @@ class Area(Item):
         # without scene.update() hook modifiers will not work correctly
         # this step is probably optional here, however it's required in AreaBegin.execute()
         context.scene.update()
-        if inbetweens:
-            for e,g in inbetweens:
-                addHookModifier(obj, g, e, g)
-        addHookModifier(obj, group, empty, group)
+        inbetweens.append((empty, group))
+        addHookModifiers(obj, [(g, e, g) for e,g in inbetweens])
     
     def finish(self):
         obj = getAreaObject(self.context)
@@ -337,6 +426,9 @@ class Area(Item):
         # perform cleanup
         del obj["last"]
         self.context.scene.prk.areaName = ""
+        
+        from .metrics import updateMetrics
+        updateMetrics(obj)
         return obj
         
     def getLocation(self, empty):
@@ -346,16 +438,13 @@ class Area(Item):
         if "co" in parent:
             modelParent = parent.parent
             # <parent> must be for the level with the index zero
-            parent = None
-            for levelParent in modelParent.children:
-                if "level" in levelParent and not levelParent["level"]:
-                    parent = levelParent
-                    break
+            parent = registry.getChild(modelParent, "level", 0)
             if not parent:
                 # create a Blender parent object for the level with the index zero
                 parent = createEmptyObject("level0", (0., 0., 0.), True, **Wall.emptyPropsLevel)
                 parent["level"] = 0
                 parent_set(modelParent, parent)
+                registry.add(parent)
         parent_set(parent, obj)
     
     def getControls(self):
@@ -380,49 +469,20 @@ class Area(Item):
         return controls
     
     def assignUv(self, uvMap=None):
+        """
+        Assign the UV coordinates in the area coordinate system, where the x-axis is oriented along
+        the first loop of the area face, the y-axis lies in the plane of the area and
+        the z-axis is parallel to the z-axis of the level coordinate system.
+        The UV coordinates are kept up to date by <item.area.metrics>.
+        """
+        from .metrics import updateUv
         if not uvMap:
             uvMap = defaultUvMap
         o = self.obj
         # create a new UV map if necessary
-        if not uvMap in o:
+        if not uvMap in o.data.uv_layers:
             o.data.uv_textures.new(uvMap)
-        
-        bm = getBmesh(self.obj)
-        bm.verts.ensure_lookup_table()
-        layer = bm.loops.layers.uv[uvMap]
-        
-        # the initial loop
-        origin = bm.verts[0]
-        start = origin.link_loops[0]
-        # vector along the x-Axis of the area coordinate system
-        firstLoopVector = start.link_loop_next.vert.co - origin.co
-        firstLoopVector.normalize()
-        
-        # Calculate the transformation matrix from the level coordinate system to the area coordinate system,
-        # where the x-axis is oriented along the first loop of <bm>,
-        # y-axis lies in the plane of the area,
-        # z-axis is parallel to the z-axis of the level coordinate system
-        # translationMatrix is inversed translation matrix from the origin of the global coordinate system to the shape origin
-        translationMatrix = mathutils.Matrix.Translation(-origin.co)
-        # now calculate the inversed rotation matrix
-        # create a rotation matrix instance with default values (i.e. a unit matrix)
-        rotationMatrix = mathutils.Matrix()
-        # cosine and sine of the angle between <xAxis> and <firstLoopVector>
-        cos = firstLoopVector[0]
-        sin = firstLoopVector[1]
-        # rotation matrix from <firstLoopVector> to <xAxis> with -<zAxis> as the rotation axis
-        rotationMatrix[0][0:2] = cos, sin
-        rotationMatrix[1][0:2] = -sin, cos
-        # remember inversed(TRS) = inversed(S)*inversed(R)*inversed(T), so in our case:
-        matrix = rotationMatrix*translationMatrix
-        
-        loop = start
-        while True:
-            loop[layer].uv = (matrix*loop.vert.co)[:2]
-            loop = loop.link_loop_next
-            if loop == start:
-                break
-        setBmesh(o, bm)
+        updateUv(o, uvMap)
 
 
 import item.area.room
\ No newline at end of file
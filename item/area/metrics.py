@@ -0,0 +1,94 @@
+import bpy
+from bpy.app.handlers import persistent
+from base import pContext, registry, defaultUvMap, zero2
+from kernel.area import getPolygonMetrics, getUvOrigin, getUvs
+from util.blender import makeSingleUser
+from . import Area
+
+
+def getAreaTypes():
+    return [t for t in pContext.items if issubclass(pContext.items[t][0], Area)]
+
+
+def updateMetrics(obj):
+    """
+    Recompute the metrics of the area Blender object <obj> out of the locations of the EMPTYs
+    controlling its vertices and cache them as the custom attributes of <obj>:
+        area, perimeter, centroid: in the coordinate system of the area parent
+        uvOrigin: the origin (x, y) and the angle of the x-axis of the area coordinate system
+            used in <updateUv(..)>
+
+    Returns:
+        The list of 2D locations of the vertices of <obj> in the order of the vertices
+        or None if <obj> has less than 3 vertices
+    """
+    # the HOOK modifiers are created in the order of the area verts
+    points = [
+        (m.object.matrix_parent_inverse * m.object.location)[:2]
+        for m in obj.modifiers if m.type == 'HOOK' and m.object
+    ]
+    if len(points) < 3:
+        return None
+    area, perimeter, centroid = getPolygonMetrics(points)
+    obj["area"] = abs(area)
+    obj["perimeter"] = perimeter
+    obj["centroid"] = centroid
+    obj["uvOrigin"] = getUvOrigin(points, area)
+    return points
+
+
+def updateUv(obj, uvMap, points=None):
+    """
+    Set the UV coordinates of the area Blender object <obj> for the UV map <uvMap> out of
+    the locations of the EMPTYs controlling its vertices, since the HOOK modifiers don't change
+    the vertices of the mesh itself. The mesh is only written if the UV coordinates have been changed,
+    so no extra update of the scene is triggered.
+
+    Args:
+        points (list): The list returned by <updateMetrics(..)>; <updateMetrics(..)> is called if
+            it isn't given
+    """
+    if points is None:
+        points = updateMetrics(obj)
+        if not points:
+            return
+    uvs = getUvs(points, obj["uvOrigin"])
+    loops = obj.data.loops
+    layer = obj.data.uv_layers[uvMap].data
+    if all(
+            abs(layer[i].uv[0]-uvs[l.vertex_index][0]) < zero2 and abs(layer[i].uv[1]-uvs[l.vertex_index][1]) < zero2
+            for i,l in enumerate(loops)
+        ):
+        return
+    # the mesh could be shared with other Blender objects, e.g. with the copies of a level
+    makeSingleUser(obj)
+    layer = obj.data.uv_layers[uvMap].data
+    for i,l in enumerate(obj.data.loops):
+        layer[i].uv = uvs[l.vertex_index]
+
+
+@persistent
+def onSceneUpdate(scene):
+    if not bpy.data.objects.is_updated:
+        return
+    for t in getAreaTypes():
+        for obj in registry.getObjects(t):
+            # An area Blender object is tagged for the update of its data
+            # if any of the EMPTYs controlling its vertices via HOOK modifiers has moved,
+            # so only the affected areas are recomputed.
+            # An area still being created has the attribute <last>
+            if obj.is_updated_data and not "last" in obj:
+                points = updateMetrics(obj)
+                # the UV coordinates follow the EMPTYs if they have been assigned
+                if points and defaultUvMap in obj.data.uv_layers:
+                    updateUv(obj, defaultUvMap, points)
+
+
+def register():
+    if not onSceneUpdate in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.append(onSceneUpdate)
+
+
+def unregister():
+    if onSceneUpdate in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.remove(onSceneUpdate)
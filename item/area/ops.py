@@ -1,6 +1,7 @@
 import bpy, bgl
-from base import pContext, getItem
-from util.blender import makeActiveSelectedfrom . import getAreaObject
+from base import pContext, getItem, getModelParent, registry
+from base.levels import getLevelObjects
+from util.blender import makeActiveSelectedfrom . import getAreaObject, AreaFinder
 from item.wall import getWallFromEmpty
 from item.finish.flat import FinFlat
 
@@ -56,6 +57,56 @@ class AreaMake(bpy.types.Operator):
             layout.prop(self, "assignUv")
     
 
+class AreaMakeAll(bpy.types.Operator):
+    bl_idname = "prk.area_make_all"
+    bl_label = "Make all areas"
+    bl_description = "Make all areas surrounded by walls on the active level"
+    bl_options = {"REGISTER", "UNDO"}
+    
+    assignUv = bpy.props.BoolProperty(
+        name = "Assign UV",
+        description = "Assign UV coordinates for the areas",
+        default = True
+    )
+    
+    def execute(self, context):
+        from item.level import getLevelParent
+        prk = context.scene.prk
+        modelParent = getModelParent(context)
+        if not (modelParent and prk.levels):
+            self.report({"ERROR"}, "There are no walls to make areas from")
+            return {'CANCELLED'}
+        levelParent = registry.getChild(modelParent, "level", prk.levels[prk.levelIndex].index)
+        commonParent = registry.getChild(modelParent, "co")
+        parents = [p for p in (levelParent, commonParent) if p]
+        # The sets of control EMPTYs of the existing areas of the active level, so the areas aren't created twice.
+        # An area surrounded only by external walls has the same control EMPTYs on each level,
+        # so the areas of the other levels must not be taken into account
+        existing = set(
+            frozenset(m.object.name for m in o.modifiers if m.type == 'HOOK' and m.object)
+            for o in getLevelObjects(context, levelParent) if o.get("t") == prk.areaType
+        ) if levelParent else set()
+        
+        area = getAreaInstance(context, self)
+        objects = []
+        for empties in AreaFinder(parents).find():
+            if frozenset(e.name for e in empties) in existing:
+                continue
+            if not levelParent:
+                # the level has only external walls
+                levelParent = getLevelParent(context, modelParent, prk.levelIndex)
+            # the area is parented to the level parent even if it's surrounded only by external walls
+            objects.append( area.makeFromEmpties(empties, False, levelParent) )
+        context.scene.update()
+        
+        if self.assignUv:
+            for o in objects:
+                getItem(context, self, o).assignUv()
+        
+        self.report({"INFO"}, "{} area(s) have been created".format(len(objects)))
+        return {'FINISHED'}
+
+
 def draw_callback_area(op, context):
     area = getAreaObject(context)
     if not area:
@@ -7,6 +7,9 @@ class GuiRoom:
     def draw(self, context, layout):
         o = context.scene.objects.active
         layout.prop(o, "name")
+        # the metrics are kept up to date by <item.area.metrics>
+        if "area" in o:
+            layout.label("Area: {:.2f}, perimeter: {:.2f}".format(o["area"], o["perimeter"]))
         layout.operator("prk.set_material_from_texture")
         layout.operator("prk.extruded_add")
 
@@ -0,0 +1,415 @@
+import bpy, bmesh, mathutils
+from bpy.app.handlers import persistent
+from base import registry
+from item.cutter import Cutter
+from item.wall import getWallFromEmpty, getFaceFortVerts
+from util.blender import getBmesh, setBmesh, getMatrixWorld, addBooleanModifier
+
+# the prefix for the names of the vertex groups and HOOK modifiers of the holes
+prefix = "cutout#"
+# a tolerance in meters
+zero = 0.001
+
+
+def getMatrixRelative(o, ancestor):
+    """
+    Calculates the matrix of the Blender object <o> relative to its <ancestor> out of the local matrices,
+    so it doesn't depend on the current world matrices.
+
+    Returns:
+        The matrix or None if <ancestor> isn't an ancestor of <o>
+    """
+    matrix = mathutils.Matrix.Identity(4)
+    while o != ancestor:
+        if not o:
+            return None
+        matrix = o.matrix_parent_inverse * o.matrix_basis * matrix
+        o = o.parent
+    return matrix
+
+
+def getRectangle(item):
+    """
+    Get the rectangle of the envelope of the opening <item> (an instance of <item.opening.Opening>)
+    in the coordinate system of <item.obj>
+
+    The HOOK modifiers of the envelope are taken into account.
+
+    Returns:
+        A tuple (x1, x2, z1, z2) or None if the envelope isn't a box aligned with the axes of <item.obj>
+    """
+    obj = item.obj
+    env = item.envelope
+    envMatrix = getMatrixRelative(env, obj)
+    # key: the index of a vertex group of <env>; value: the matrix to transform its vertices
+    hookMatrices = {}
+    for m in env.modifiers:
+        if m.type == 'HOOK' and m.object and m.vertex_group in env.vertex_groups:
+            matrix = getMatrixRelative(m.object, obj)
+            if not matrix:
+                return None
+            hookMatrices[env.vertex_groups[m.vertex_group].index] = matrix * m.matrix_inverse
+    bm = getBmesh(env)
+    layer = bm.verts.layers.deform.active
+    coords = []
+    for v in bm.verts:
+        matrix = envMatrix
+        if layer:
+            for i,w in v[layer].items():
+                if i in hookMatrices and w > 0.:
+                    matrix = hookMatrices[i]
+                    break
+        coords.append(matrix * v.co)
+    bm.free()
+    if not coords:
+        return None
+    x1 = min(co.x for co in coords)
+    x2 = max(co.x for co in coords)
+    z1 = min(co.z for co in coords)
+    z2 = max(co.z for co in coords)
+    # each vertex of a box aligned with the axes is located at a corner of the rectangle
+    for co in coords:
+        if min(abs(co.x-x1), abs(co.x-x2)) > zero or min(abs(co.z-z1), abs(co.z-z2)) > zero:
+            return None
+    return x1, x2, z1, z2
+
+
+class Cutouts:
+    """
+    Rectangular holes for the openings inserted directly into the mesh of a wall part
+
+    It's an alternative to <item.cutter.Cutter> for the openings with an envelope in the shape of a box,
+    i.e. no BOOLEAN modifier is evaluated for them.
+    The side faces of the wall segment are replaced by the faces around the holes,
+    the holes on both sides are connected with four faces.
+    The vertices of a hole on the control side of the wall segment are controlled by a HOOK modifier
+    with the EMPTY <int> of the opening, the ones on the opposite side by a HOOK modifier with the EMPTY <ext>.
+    So the holes follow the openings when they are moved and when the wall width is changed without any update
+    from Python. The faces of the wall segment are rebuilt only if the size of an opening or the order of
+    the openings along the wall segment is changed, see <self.update()>.
+    The vertex groups and the HOOK modifiers for the holes are named cutout#<key>#<opening name>#int and
+    cutout#<key>#<opening name>#ext, where <key> is (l|r)group of the corner EMPTY ending the wall segment.
+    """
+
+    def __init__(self, wall, o2):
+        """
+        Args:
+            wall (item.wall.Wall): The wall initialized for the wall part hosting the openings
+            o2: The corner EMPTY ending the wall segment
+        """
+        self.wall = wall
+        self.mesh = wall.mesh
+        self.o2 = o2
+        self.o1 = wall.getPrevious(o2)
+        self.prefix = prefix + ("l" if o2["l"] else "r") + o2["g"] + "#"
+
+    def getOpenings(self, context):
+        """
+        Returns:
+            A list of the Blender objects of the openings in the scene with holes in the wall segment
+        """
+        objects = context.scene.objects
+        openings = []
+        for g in self.mesh.vertex_groups:
+            if g.name.startswith(self.prefix) and g.name.endswith("#int"):
+                obj = objects.get(g.name[len(self.prefix):-4])
+                if obj:
+                    openings.append(obj)
+        return openings
+
+    def add(self, item):
+        """
+        Add a hole for the opening <item> (an instance of <item.opening.Opening>)
+
+        Returns:
+            True if the hole has been inserted, False if the envelope of <item> isn't a box
+            or the hole doesn't fit into the wall segment
+        """
+        obj = item.obj
+        obj["cutout"] = 1
+        self.update(item)
+        return "cutout" in obj
+
+    def update(self, item=None):
+        """
+        Rebuild the faces of the wall segment with the holes for its openings.
+        The openings that don't fit anymore get cut by <item.cutter.Cutter>.
+
+        Args:
+            item: An optional opening to be added
+        """
+        from base import getItem
+
+        context = item.context if item else bpy.context
+        openings = [
+            getItem(context, None, obj) for obj in self.getOpenings(context)\
+            if not item or obj != item.obj
+        ]
+        if item:
+            openings.append(item)
+
+        self.removeHoles()
+
+        holes = []
+        for opening in openings:
+            hole = self.getHole(opening)
+            if hole:
+                holes.append(hole)
+            else:
+                self.fallback(opening)
+        # sort the holes along the wall segment and skip the ones overlapping with the previous hole
+        holes.sort(key=lambda hole: hole[0])
+        _holes = []
+        for hole in holes:
+            if _holes and hole[0] < _holes[-1][1] + zero:
+                self.fallback(hole[2])
+            else:
+                _holes.append(hole)
+
+        self.makeFaces(_holes)
+
+    def fallback(self, item):
+        """
+        Cut the wall part with the envelope of <item> via <item.cutter.Cutter>
+        """
+        if "cutout" in item.obj:
+            del item.obj["cutout"]
+        Cutter(self.mesh).add(item)
+
+    def removeHoles(self):
+        """
+        Remove the holes from the wall segment, the faces around them are removed too
+        """
+        mesh = self.mesh
+        groups = mesh.vertex_groups
+        names = [g.name for g in groups if g.name.startswith(self.prefix)]
+        if not names:
+            return
+        groupIndices = set(groups[name].index for name in names)
+        bm = getBmesh(mesh)
+        layer = bm.verts.layers.deform[0]
+        bmesh.ops.delete(
+            bm,
+            geom = [v for v in bm.verts if any(i in v[layer] for i in groupIndices)],
+            context = 1 # DEL_VERTS
+        )
+        # the vertex groups must be removed after the BMesh is written to the mesh,
+        # since the indices of the remaining vertex groups are changed
+        setBmesh(mesh, bm)
+        for name in names:
+            groups.remove(groups[name])
+            m = mesh.modifiers.get(name)
+            if m:
+                mesh.modifiers.remove(m)
+
+    def getHole(self, item):
+        """
+        Get the hole for the opening <item> if it fits into the wall segment
+
+        Returns:
+            A tuple (u1, u2, item, x1, x2, z1, z2) or None. <u1> and <u2> are the distances from
+            the corner EMPTY <self.o1> to the ends of the hole along the wall segment, <x1>, <x2>, <z1>, <z2>
+            define the rectangle of the hole in the coordinate system of <item.obj>.
+        """
+        rect = getRectangle(item)
+        if not rect:
+            return None
+        x1, x2, z1, z2 = rect
+        wall = self.wall
+        o1 = self.o1
+        o2 = self.o2
+        obj = item.obj
+        origin = o1.location.to_2d()
+        d = o2.location.to_2d() - origin
+        l = d.length
+        d = d/l
+        # the x-axis of <obj> is directed from <o2> to <o1> if <o1["l"]>, otherwise from <o1> to <o2>
+        sign = 1. if o1["l"] else -1.
+        u = (obj.location.to_2d() - origin).dot(d)
+        u1 = u - sign*(x2 if o1["l"] else x1)
+        u2 = u - sign*(x1 if o1["l"] else x2)
+        # the hole must be located between the ends of the wall segment on both sides
+        start = max(0., (wall.getNeighbor(o1).location.to_2d() - origin).dot(d))
+        end = min(l, (wall.getNeighbor(o2).location.to_2d() - origin).dot(d))
+        if u1 < start + zero or u2 > end - zero:
+            return None
+        # check if the hole is located between the bottom and the top of the wall segment
+        mesh = self.mesh
+        bm = getBmesh(mesh)
+        bottom, top = wall.getVertsForVertexGroup(bm, ("l" if o1["l"] else "r") + o1["g"])
+        bottom = bottom.co.copy()
+        top = top.co.copy()
+        bm.free()
+        matrix = getMatrixWorld(mesh)
+        m = mesh.modifiers.get("t")
+        if m and m.object:
+            top = getMatrixWorld(m.object) * m.matrix_inverse * top
+        else:
+            top = matrix * top
+        bottom = (matrix * bottom).z
+        matrix = getMatrixWorld(obj)
+        if (matrix * mathutils.Vector((0., 0., z1))).z < bottom + zero or\
+            (matrix * mathutils.Vector((0., 0., z2))).z > top.z - zero:
+            return None
+        return u1, u2, item, x1, x2, z1, z2
+
+    def makeFaces(self, holes):
+        """
+        Replace the side faces of the wall segment with the faces around the <holes>
+        and the faces connecting the holes on both sides of the wall segment
+
+        Args:
+            holes (list): Holes sorted along the wall segment, see <self.getHole(..)>
+        """
+        wall = self.wall
+        mesh = self.mesh
+        o1 = self.o1
+        o2 = self.o2
+        groups = mesh.vertex_groups
+        # create the vertex groups for the holes before any operation with bmesh
+        for hole in holes:
+            name = self.prefix + hole[2].obj.name
+            groups.new(name + "#int")
+            groups.new(name + "#ext")
+
+        bm = getBmesh(mesh)
+        layer = bm.verts.layers.deform[0]
+        # the prefixes for the vertex groups of the control side and the opposite one
+        prefix1, prefix2 = ("l", "r") if o1["l"] else ("r", "l")
+        # verts (bottom, top) of the corners on the control side and on the opposite one
+        a1 = wall.getVertsForVertexGroup(bm, prefix1 + o1["g"])
+        a2 = wall.getVertsForVertexGroup(bm, prefix1 + o2["g"])
+        b1 = wall.getVertsForVertexGroup(bm, prefix2 + o1["g"])
+        b2 = wall.getVertsForVertexGroup(bm, prefix2 + o2["g"])
+        # remove the side faces without holes
+        for verts1, verts2 in ((a1, a2), (b1, b2)):
+            face = getFaceFortVerts(verts1, verts2)
+            if face:
+                bm.faces.remove(face)
+        # The side face without holes is (bottom1, top1, top2, bottom2) or the reversed one,
+        # the top face of the wall segment contains the edge top1-top2 in the other direction
+        top = getFaceFortVerts((a1[1], a2[1]), (b1[1], b2[1]))
+        topVerts = list(top.verts)
+        def isReversed(top1, top2):
+            i = topVerts.index(top2)
+            return topVerts[(i+1) % len(topVerts)] != top1
+        reversed1 = isReversed(a1[1], a2[1])
+        reversed2 = isReversed(b1[1], b2[1])
+
+        # the verts of the holes (bottom1, bottom2, top2, top1) on the control side and on the opposite one
+        holeVerts1 = []
+        holeVerts2 = []
+        for u1, u2, item, x1, x2, z1, z2 in holes:
+            if o1["l"]:
+                x1, x2 = x2, x1
+            name = self.prefix + item.obj.name
+            for hookObj, suffix, holeVerts in ((item.int, "#int", holeVerts1), (item.ext, "#ext", holeVerts2)):
+                groupIndex = groups[name + suffix].index
+                # the coordinates of the verts are given in the coordinate system of <hookObj>
+                matrix = getMatrixRelative(hookObj, item.obj)
+                y = matrix.translation.y
+                matrix = matrix.inverted()
+                verts = []
+                for x,z in ((x1, z1), (x2, z1), (x2, z2), (x1, z2)):
+                    v = bm.verts.new(matrix * mathutils.Vector((x, y, z)))
+                    v[layer][groupIndex] = 1.
+                    verts.append(v)
+                holeVerts.append(verts)
+
+        # faces for each side
+        for (bottom1, top1), (bottom2, top2), holeVerts, _reversed in (
+                (a1, a2, holeVerts1, reversed1),
+                (b1, b2, holeVerts2, reversed2)
+            ):
+            if holeVerts:
+                # the faces to the left and to the right from the holes and between them
+                faces = [(bottom1, top1, holeVerts[0][3], holeVerts[0][0])]
+                for h1, h2 in zip(holeVerts[:-1], holeVerts[1:]):
+                    faces.append((h1[1], h1[2], h2[3], h2[0]))
+                faces.append((holeVerts[-1][1], holeVerts[-1][2], top2, bottom2))
+                # the face above the holes
+                faces.append( [top1, top2] + [v for h in reversed(holeVerts) for v in (h[2], h[3])] )
+                # the face below the holes
+                faces.append( [bottom1] + [v for h in holeVerts for v in (h[0], h[1])] + [bottom2] )
+            else:
+                faces = [(bottom1, top1, top2, bottom2)]
+            for verts in faces:
+                bm.faces.new(tuple(reversed(verts)) if _reversed else verts)
+        # faces connecting the holes on both sides
+        for h1, h2 in zip(holeVerts1, holeVerts2):
+            for verts in (
+                    (h1[1], h1[0], h2[0], h2[1]),
+                    (h1[3], h1[2], h2[2], h2[3]),
+                    (h1[0], h1[3], h2[3], h2[0]),
+                    (h1[2], h1[1], h2[1], h2[2])
+                ):
+                bm.faces.new(tuple(reversed(verts)) if reversed1 else verts)
+        setBmesh(mesh, bm)
+
+        # add the HOOK modifiers for the holes,
+        # the inverse matrices are the identity ones since the coordinates are given in the coordinate systems
+        # of the hook objects
+        for hole in holes:
+            item = hole[2]
+            name = self.prefix + item.obj.name
+            for hookObj, suffix in ((item.int, "#int"), (item.ext, "#ext")):
+                m = mesh.modifiers.new(name=name+suffix, type='HOOK')
+                m.vertex_group = name+suffix
+                m.object = hookObj
+                m.matrix_inverse = mathutils.Matrix.Identity(4)
+        # the BOOLEAN modifier of the cutter must be evaluated after the HOOK modifiers
+        m = mesh.modifiers.get(Cutter.modifierName)
+        if m and m != mesh.modifiers[-1]:
+            cutter = m.object
+            mesh.modifiers.remove(m)
+            addBooleanModifier(mesh, Cutter.modifierName, cutter)
+
+
+def cleanup(mesh, context):
+    """
+    Rebuild the wall segments of the wall part <mesh> with holes for the openings that have been deleted
+    from the scene
+    """
+    scene = context.scene
+    keys = set(
+        m.name.split("#")[1] for m in mesh.modifiers
+        if m.type == 'HOOK' and m.name.startswith(prefix) and (not m.object or not m.object.name in scene.objects)
+    )
+    if not keys:
+        return
+    wall = None
+    for key in keys:
+        # find the corner EMPTY ending the wall segment
+        m = mesh.modifiers.get(key)
+        if not (m and m.object):
+            continue
+        if not wall:
+            wall = getWallFromEmpty(context, None, m.object)
+        Cutouts(wall, m.object).update()
+
+
+# key: the name of a scene; value: the number of Blender objects in the scene
+numObjects = {}
+
+
+@persistent
+def onSceneUpdate(scene):
+    # an opening could have been deleted only if the number of Blender objects in the scene has changed
+    _numObjects = len(scene.objects)
+    if numObjects.get(scene.name) == _numObjects:
+        return
+    numObjects[scene.name] = _numObjects
+    for mesh in registry.getObjects("wall_part"):
+        if mesh.name in scene.objects:
+            cleanup(mesh, bpy.context)
+
+
+def register():
+    if not onSceneUpdate in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.append(onSceneUpdate)
+
+
+def unregister():
+    if onSceneUpdate in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.remove(onSceneUpdate)
+    numObjects.clear()
@@ -0,0 +1,178 @@
+import bpy, bmesh, mathutils
+from bpy.app.handlers import persistent
+from base import registry
+from util.blender import createMeshObject, getBmesh, setBmesh, addBooleanModifier, parent_set
+
+
+class Cutter:
+    """
+    A single mesh joining the envelopes of all openings that cut a Blender object (a wall part or a finish)
+
+    Instead of a BOOLEAN modifier for each opening, the Blender object gets a single BOOLEAN modifier
+    with the cutter mesh, so only one Boolean operation is evaluated for it.
+    The vertices of the envelope of each opening are copied to the cutter in the coordinate system
+    of the envelope and are controlled by HOOK modifiers:
+    the vertices controlled by a HOOK modifier of the envelope get a HOOK modifier with the same
+    hook object and the same inverse matrix, the other vertices get a HOOK modifier with the envelope itself.
+    So the cutter follows the openings when they are moved or resized without any update from Python.
+    It's supposed that the HOOK modifiers of an envelope move its vertices rigidly
+    (i.e. without falloff and partial weights) and don't overlap.
+    """
+
+    # the name of the BOOLEAN modifier of the Blender object to be cut
+    modifierName = "cutter"
+
+    def __init__(self, obj, create=True):
+        """
+        Args:
+            obj: The Blender object to be cut
+            create (bool): Create the cutter if it doesn't exist yet
+        """
+        self.obj = obj
+        m = obj.modifiers.get(self.modifierName)
+        self.cutter = m.object if m and m.object else None
+        if not self.cutter and create:
+            self.create(m)
+
+    def create(self, m):
+        obj = self.obj
+        cutter = createMeshObject(obj.name + "_cutter")
+        cutter["t"] = "cutter"
+        cutter.draw_type = 'WIRE'
+        cutter.hide = True
+        cutter.hide_select = True
+        cutter.hide_render = True
+        # vertex groups are in the deform layer, create one before any operation with bmesh
+        bm = getBmesh(cutter)
+        bm.verts.layers.deform.new()
+        setBmesh(cutter, bm)
+        parent_set(obj.parent, cutter)
+        if m:
+            m.object = cutter
+        else:
+            addBooleanModifier(obj, self.modifierName, cutter)
+        registry.add(cutter)
+        self.cutter = cutter
+
+    def add(self, item):
+        """
+        Add the envelope of the opening <item> (an instance of <item.opening.Opening>) to the cutter
+        """
+        env = item.envelope
+        cutter = self.cutter
+        # the name of the vertex group for the vertices of <env> not controlled by its HOOK modifiers
+        group = env.name
+        if group in cutter.vertex_groups:
+            return
+        groups = cutter.vertex_groups
+        # HOOK modifiers of <env>
+        hooks = [m for m in env.modifiers if m.type == 'HOOK' and m.object and m.vertex_group in env.vertex_groups]
+        # key: the index of a vertex group of <env>; value: the index of the related vertex group of <cutter>
+        hookGroups = dict(
+            (env.vertex_groups[m.vertex_group].index, groups.new(group + "#" + m.name).index)
+            for m in hooks
+        )
+        groupIndex = groups.new(group).index
+
+        bm = getBmesh(cutter)
+        layer = bm.verts.layers.deform[0]
+        _bm = getBmesh(env)
+        _layer = _bm.verts.layers.deform.active
+        verts = []
+        for _v in _bm.verts:
+            v = bm.verts.new(_v.co)
+            # find the HOOK modifier of <env> controlling <_v>
+            index = None
+            if _layer:
+                for i,w in _v[_layer].items():
+                    if i in hookGroups and w > 0.:
+                        index = hookGroups[i]
+                        break
+            v[layer][groupIndex if index is None else index] = 1.
+            verts.append(v)
+        _bm.verts.index_update()
+        for f in _bm.faces:
+            bm.faces.new([verts[v.index] for v in f.verts])
+        _bm.free()
+        setBmesh(cutter, bm)
+
+        # the vertices are given in the coordinate system of <env>,
+        # so the inverse matrix for the HOOK modifier with <env> is the identity one
+        m = cutter.modifiers.new(name=group, type='HOOK')
+        m.vertex_group = group
+        m.object = env
+        m.matrix_inverse = mathutils.Matrix.Identity(4)
+        for _m in hooks:
+            name = group + "#" + _m.name
+            m = cutter.modifiers.new(name=name, type='HOOK')
+            m.vertex_group = name
+            m.object = _m.object
+            m.matrix_inverse = _m.matrix_inverse.copy()
+
+    def remove(self, group):
+        """
+        Remove the envelope added to the cutter under the name <group> (i.e. the name of the envelope)
+        """
+        removeEnvelope(self.cutter, group)
+
+
+def removeEnvelope(cutter, group):
+    """
+    Remove the envelope added to the Blender object <cutter> under the name <group>, see <Cutter.add(..)>
+    """
+    groups = cutter.vertex_groups
+    # the names of the vertex groups and HOOK modifiers for the envelope
+    names = [g.name for g in groups if g.name == group or g.name.startswith(group + "#")]
+    groupIndices = set(groups[name].index for name in names)
+    bm = getBmesh(cutter)
+    layer = bm.verts.layers.deform[0]
+    bmesh.ops.delete(
+        bm,
+        geom = [v for v in bm.verts if any(i in v[layer] for i in groupIndices)],
+        context = 1 # DEL_VERTS
+    )
+    setBmesh(cutter, bm)
+    for name in names:
+        groups.remove(groups[name])
+        m = cutter.modifiers.get(name)
+        if m:
+            cutter.modifiers.remove(m)
+
+
+def cleanup(cutter, scene):
+    """
+    Remove the envelopes of the openings that have been deleted from the <scene> from the Blender object <cutter>
+    """
+    groups = set(
+        m.name.split("#")[0] for m in cutter.modifiers
+        if m.type == 'HOOK' and (not m.object or not m.object.name in scene.objects)
+    )
+    for group in groups:
+        removeEnvelope(cutter, group)
+
+
+# key: the name of a scene; value: the number of Blender objects in the scene
+numObjects = {}
+
+
+@persistent
+def onSceneUpdate(scene):
+    # an opening could have been deleted only if the number of Blender objects in the scene has changed
+    _numObjects = len(scene.objects)
+    if numObjects.get(scene.name) == _numObjects:
+        return
+    numObjects[scene.name] = _numObjects
+    for cutter in registry.getObjects("cutter"):
+        if cutter.name in scene.objects:
+            cleanup(cutter, scene)
+
+
+def register():
+    if not onSceneUpdate in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.append(onSceneUpdate)
+
+
+def unregister():
+    if onSceneUpdate in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.remove(onSceneUpdate)
+    numObjects.clear()
@@ -9,6 +9,8 @@ class GuiDoor:
     
     def draw(self, context, layout):
         layout.label("A door")
+        layout.operator("prk.wall_instance_opening")
+        layout.prop(context.scene.prk, "cutoutOpenings")
         
     def draw_workshop(self, context, layout):
         common(context, layout, self)
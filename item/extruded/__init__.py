@@ -1,5 +1,5 @@
 from base.item import Item
-from util.blender import createMeshObject, getBmesh, parent_set, assignGroupToVerts, addHookModifier
+from util.blender import createMeshObject, getBmesh, parent_set, assignGroupToVerts, addHookModifiers
 from util.inset import Corner
 
 class Extruded(Item):
@@ -58,9 +58,7 @@ class Extruded(Item):
         context.scene.update()
         
         # add hook modifiers
-        for c in controls:
-            group = c["g"]
-            addHookModifier(obj, group, c, group)
+        addHookModifiers(obj, [(c["g"], c, c["g"]) for c in controls])
 
     def getProfileData(self, profile):
         coords = []
@@ -3,7 +3,7 @@ from base.item import Item
 from base import defaultUvMap, pContext, zAxis, getItem, getLevelHeight, getNextLevelParent,\
     getReferencesForAttached, getControlEmptyFromLoop
 from util.blender import createMeshObject, getBmesh, setBmesh, assignGroupToVerts,\
-    addHookModifier, addSolidifyModifier, addBooleanModifier, parent_set, getVertsForVertexGroup
+    addHookModifiers, addSolidifyModifier, parent_set, getVertsForVertexGroup
 
 
 class GuiFinish:
@@ -64,11 +64,10 @@ class FinFlat(Item):
         context.scene.update()
         
         # add HOOK modifiers
-        for c in controls:
-            group = c["g"]
-            addHookModifier(obj, group, c, group)
+        hooks = [(c["g"], c, c["g"]) for c in controls]
         # add a HOOK modifier controlling the top vertices
-        addHookModifier(obj, "t", getNextLevelParent(context, obj), "t")
+        hooks.append(("t", getNextLevelParent(context, obj), "t"))
+        addHookModifiers(obj, hooks)
         # add a SOLIDIFY modifier
         addSolidifyModifier(obj, "solidify", thickness=0.001, offset=1.)
         self.treatInsertions(controls)
@@ -76,9 +75,11 @@ class FinFlat(Item):
     def treatInsertions(self, controls):
         """
         The function treats insertions (e.g. windows, doors) relevant for the finish.
-        Namely, a BOOLEAN modifier is created for each relevant opening.
+        Namely, the envelope of each relevant opening is added to the cutter of the finish,
+        see <item.cutter.Cutter>.
         """
         from item.opening import getReferencesForOpening
+        from item.cutter import Cutter
         # build a list of EMPTYs that defines each wall part that forms the finish
         walls = {}
         _c = controls[-1]
@@ -131,6 +132,8 @@ class FinFlat(Item):
             walls[o2["g"]] = [o1, o2, _c, c]
             _c = c
         
+        # the cutter is created on demand
+        cutter = None
         # iterate through immediate children of the parent Blender object of the finish
         for o in self.obj.parent.children:
             if "t" in o and (o["t"] == "window" or o["t"] == "door"):
@@ -166,7 +169,9 @@ class FinFlat(Item):
                         if not e[2] < l2 <e [3]:
                             addModifier = False
                     if addModifier:
-                        addBooleanModifier(self.obj, o.name, item.envelope)
+                        if not cutter:
+                            cutter = Cutter(self.obj)
+                        cutter.add(item)
     
     def assignUv(self, uvMap=None):
         if not uvMap:
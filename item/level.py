@@ -0,0 +1,151 @@
+from base import pContext, getItem, getLevelZ, registry
+from item.opening import Opening
+from item.cutter import Cutter
+from item.cutout import Cutouts, prefix as cutoutPrefix
+from item.wall import getWallFromEmpty, Wall
+from util.blender import createEmptyObject, duplicateObjects, getMatrixWorld, parent_set
+
+# the custom properties of the Blender objects storing a group or a mesh index of a wall part
+idProperties = ("g", "n", "p", "m", "start", "end", "last")
+
+
+def getLevelParent(context, modelParent, position):
+    """
+    Returns the level parent for the level at the <position> in the GUI list of levels or
+    the EMPTY controlling the total height of the building if <position> is after the last level.
+    The Blender object is created if it doesn't exist.
+    """
+    levels = context.scene.prk.levels
+    wall = Wall(context, None)
+    wall.parent = modelParent
+    if position == len(levels):
+        return wall.getTotalHeightEmpty()
+    index = levels[position].index
+    levelParent = registry.getChild(modelParent, "level", index)
+    if not levelParent:
+        levelParent = createEmptyObject("level "+str(index), (0., 0., getLevelZ(context, position)), True, **Wall.emptyPropsLevel)
+        levelParent["level"] = index
+        parent_set(modelParent, levelParent)
+        registry.add(levelParent)
+    return levelParent
+
+
+def renameId(name, ids, offset):
+    """
+    Shift the group or the mesh index in the <name> of a vertex group or a modifier by <offset>
+    if the group or the mesh index is in the set <ids>.
+    The names are <group>, l<group>, r<group> and cutout#(l|r)<group>#...
+    """
+    if name.isdigit():
+        return str(int(name) + offset) if int(name) in ids else name
+    if name[:1] in ("l", "r") and name[1:].isdigit():
+        return name[0] + renameId(name[1:], ids, offset)
+    parts = name.split("#")
+    if len(parts) > 1 and parts[0] + "#" == cutoutPrefix:
+        parts[1] = renameId(parts[1], ids, offset)
+        return "#".join(parts)
+    return name
+
+
+def rehook(objects, hookObj, newHookObj):
+    """
+    Replace the Blender object <hookObj> with <newHookObj> in the HOOK modifiers of <objects>
+
+    The inverse matrices of the HOOK modifiers are kept, since the level parents and the EMPTY
+    controlling the total height of the building differ only by their elevation. So the vertices
+    hooked to <newHookObj> are placed at its elevation in the same way as they were placed
+    at the elevation of <hookObj>.
+    """
+    for o in objects:
+        for m in o.modifiers:
+            if m.type == 'HOOK' and m.object == hookObj:
+                m.object = newHookObj
+
+
+def copyLevel(context, objects, mapping):
+    """
+    Copy the Blender objects of a level (walls, areas, finishes, openings) to another level
+
+    The copies are linked duplicates, i.e. they share meshes with the original Blender objects,
+    a mesh gets its own copy only when it's changed, see <util.blender.setBmesh(..)>.
+    The groups and mesh indices of the wall parts are shifted to keep them unique for the model.
+
+    Args:
+        objects (list): The Blender objects of the source level, see <base.getLevelObjects(..)>
+        mapping (dict): The name of the source level parent as the key and the target level parent
+            as the value; the same for the level parent (or the EMPTY controlling the total height
+            of the building) on top of the source level and on top of the target level
+
+    Returns:
+        A dictionary with the name of an original Blender object as the key and its copy as the value
+    """
+    modelParent = list(mapping.values())[0].parent
+    duplicates = duplicateObjects(objects, mapping)
+    # Blender objects of the target level
+    copies = set(o.as_pointer() for o in duplicates.values())
+    copies.update(o.as_pointer() for o in mapping.values())
+    # the names of the copies
+    names = dict((name, o.name) for name, o in duplicates.items())
+
+    # the groups and the mesh indices of the wall parts of the source level
+    ids = set()
+    for o in objects:
+        if o.get("t") in ("wc", "wa", "ws"):
+            ids.add(int(o["g"]))
+            if "m" in o:
+                ids.add(o["m"])
+        elif o.get("t") == "wall_part":
+            ids.add(o["m"])
+    offset = modelParent["counter"] + 1 - min(ids) if ids else 0
+
+    for o in objects:
+        _o = duplicates[o.name]
+        if offset:
+            for key in idProperties:
+                if key in _o:
+                    value = _o[key]
+                    if isinstance(value, str):
+                        if value.isdigit() and int(value) in ids:
+                            _o[key] = str(int(value) + offset)
+                    elif isinstance(value, int) and value in ids:
+                        _o[key] = value + offset
+        # rename the vertex groups and the modifiers
+        isCutter = _o.get("t") == "cutter"
+        def rename(name):
+            if offset:
+                name = renameId(name, ids, offset)
+            parts = name.split("#")
+            # the name of a copied opening or envelope, see <item.cutout.Cutouts> and <item.cutter.Cutter>
+            index = 0 if isCutter else (2 if len(parts) > 2 and parts[0] + "#" == cutoutPrefix else None)
+            if not index is None:
+                parts[index] = names.get(parts[index], parts[index])
+                name = "#".join(parts)
+            return name
+        for item in _o.vertex_groups:
+            item.name = rename(item.name)
+        for m in _o.modifiers:
+            m.name = rename(m.name)
+            # the renamed vertex groups aren't updated in the modifiers
+            if hasattr(m, "vertex_group") and m.vertex_group:
+                m.vertex_group = rename(m.vertex_group)
+        # the HOOK modifiers with a Blender object outside of the target level
+        # must keep the vertices at the same place relative to <_o>
+        for m in _o.modifiers:
+            if m.type == 'HOOK' and m.object and not m.object.as_pointer() in copies:
+                matrix = getMatrixWorld(m.object)
+                m.matrix_inverse = matrix.inverted() * getMatrixWorld(_o) * getMatrixWorld(o).inverted() * matrix *\
+                    m.matrix_inverse
+    if ids:
+        modelParent["counter"] = max(ids) + offset
+
+    # the openings inserted into the wall parts outside of the source level (e.g. external walls)
+    # must cut the wall parts too
+    for o in objects:
+        t = o.get("t")
+        if t in pContext.items and issubclass(pContext.items[t][0], Opening):
+            item = getItem(context, None, duplicates[o.name])
+            if not item.o2.as_pointer() in copies:
+                wall = getWallFromEmpty(context, None, item.o2)
+                if not ("cutout" in item.obj and Cutouts(wall, item.o2).add(item)):
+                    Cutter(wall.mesh).add(item)
+    return duplicates
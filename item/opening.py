@@ -2,8 +2,11 @@ import bpy
 from base.item import Item
 from base.mover_along_wall import AlongWallMover
 from base.mover_size import SizeMover
-from item.wall import addTransformsVariable, addLocDiffVariable, addSinglePropVariable
-from util.blender import addBooleanModifier, getLastOperator, hide,\
+from workshop.compiler import MeshCompiler
+from item.cutter import Cutter
+from item.cutout import Cutouts
+from item.wall import getWallFromEmpty, addTransformsVariable, addLocDiffVariable, addSinglePropVariable
+from util.blender import getLastOperator, hide,\
     createMeshObject, createEmptyObject, getBmesh, setBmesh, parent_set, addEdgeSplitModifier
 
 
@@ -27,7 +30,15 @@ class Opening(Item):
             self.o1, self.o2 = getReferencesForOpening(o)
             self.lookup()
     
-    def create(self, obj, wall, o1, o2):
+    def create(self, obj, wall, o1, o2, k=None, z=None):
+        """
+        Insert the Blender object <obj> of the item into the wall segment defined by the corner EMPTYs <o1> and <o2>
+        
+        Args:
+            k (float): If given, the ratio of the distance from <o1> to the center of the item
+                to the length of the wall segment, otherwise the item is placed at the middle of the wall segment
+            z (float): If given, the z-coordinate of the item, otherwise <self.floorToWindow> is used
+        """
         self.obj = obj
         self.o1 = o1
         self.o2 = o2
@@ -36,8 +47,12 @@ class Opening(Item):
         left = o1["l"]
         # set the initial locaton of the object at the middle of the wall segment
         sign = 1. if left else -1.
-        obj.location = (o1.location + o2.location + sign*self.width.location.x*(o2.location-o1.location).normalized())/2.
-        obj.location.z = self.floorToWindow
+        if k is None:
+            obj.location = (o1.location + o2.location + sign*self.width.location.x*(o2.location-o1.location).normalized())/2.
+        else:
+            l = o2.location - o1.location
+            obj.location = o1.location + (k*l.length + sign*self.width.location.x/2.)*l.normalized()
+        obj.location.z = self.floorToWindow if z is None else z
         
         # set drivers for EMPTYs controlling interior and exterior parts of the window
         # the interior part
@@ -49,7 +64,10 @@ class Opening(Item):
         addSinglePropVariable(e, "w", o2, "[\"w\"]")
         e.driver.expression = "w/2."
         
-        addBooleanModifier(wall.mesh, o2["g"], self.envelope)
+        # Either a rectangular hole is inserted directly into the mesh of the wall part or
+        # the envelope cuts the wall part via the single cutter mesh of the wall part
+        if not (self.context.scene.prk.cutoutOpenings and Cutouts(wall, o2).add(self)):
+            Cutter(wall.mesh).add(self)
         
         rz = obj.driver_add("rotation_euler", 2)
         addTransformsVariable(rz, "x1", o2 if left else o1, "LOC_X")
@@ -87,8 +105,9 @@ class Opening(Item):
         # half width of the item
         w = self.width.location.x/2.
         k = ( (k-w) if left else (k+w) ) / l
-        sign1 = "+" if left else "-"
-        sign2 = "-" if left else "+"
+        # the expressions call <kernel.drivers.opening(..)> registered in <bpy.app.driver_namespace>
+        sign1 = "1" if left else "-1"
+        sign2 = "-1" if left else "1"
         
         x = self.obj.driver_add("location", 0)
         addTransformsVariable(x, "x1", o1, "LOC_X")
@@ -100,7 +119,7 @@ class Opening(Item):
         addTransformsVariable(x, "wi", self.width, "LOC_X")
         # the width of the wall
         addSinglePropVariable(x, "wa", o2, "[\"w\"]")
-        x.driver.expression = "x1+(x2-x1)*("+str(k)+sign1+"wi/2/d)"+sign1+"(y2-y1)*wa/2/d"
+        x.driver.expression = "prk_opening(x1,x2,y1,y2,"+str(k)+",wi,wa,d,"+sign1+","+sign1+")"
         
         y = self.obj.driver_add("location", 1)
         addTransformsVariable(y, "y1", o1, "LOC_Y")
@@ -112,7 +131,16 @@ class Opening(Item):
         addTransformsVariable(y, "wi", self.width, "LOC_X")
         # the width of the wall
         addSinglePropVariable(y, "wa", o2, "[\"w\"]")
-        y.driver.expression = "y1+(y2-y1)*("+str(k)+sign1+"wi/2/d)"+sign2+"(x2-x1)*wa/2/d"
+        y.driver.expression = "prk_opening(y1,y2,x1,x2,"+str(k)+",wi,wa,d,"+sign1+","+sign2+")"
+    
+    def updateCutout(self):
+        """
+        Rebuild the hole for the opening in the mesh of the wall part after
+        the opening has been moved or resized, see <item.cutout.Cutouts>
+        """
+        if "cutout" in self.obj:
+            wall = getWallFromEmpty(self.context, self.op, self.o2)
+            Cutouts(wall, self.o2).update()
     
     def move_invoke(self, op, context, event, o):
         op.allowZ = False
@@ -172,16 +200,15 @@ class Opening(Item):
         o = createMeshObject(name + "_mesh")
         t.meshObject = o
         
-        context.scene.update()
         # perform parenting
         parent_set(p, o)
         if t.parentTemplate:
             parent_set(pt.meshParent, p)
-        context.scene.update()
-        context.scene.objects.active = o
         
         t.prepareOffsets()
         
+        # the meshes of the nodes are transformed and merged in memory
+        compiler = MeshCompiler()
         # iterate through the vertices of the template Blender object
         numVerts = 0
         for v in verts:
@@ -191,8 +218,10 @@ class Opening(Item):
                 continue
             # Blender object for the node at the vertex
             j = bpy.data.objects[_o[vid]]
-            t.setNode(v, j, o, context, hooksForNodes = hooksForNodes)
+            t.setNode(v, j, compiler, context, hooksForNodes = hooksForNodes)
             numVerts += 1
+        # write the mesh of the template only once
+        compiler.write(o)
         
         # final operations: bridging or extruding edges loops of the nodes, making surfaces
         bm = getBmesh(o)
@@ -1,6 +1,7 @@
 import bmesh
-from base import pContext, getLevelLocation, getLevelZ, getModelParent, xAxis, yAxis, zAxis, zero, getReferencesForAttached
+from base import pContext, getLevelLocation, getLevelZ, getLevelIndex, getModelParent, xAxis, yAxis, zAxis, zero, getReferencesForAttached, registry
 from base.item import Item
+from base.attached import getAttachedIndex
 from util.blender import *
 
 
@@ -94,7 +95,7 @@ def addAttachedDrivers(wallAttached, o1, o2, e1, e2, both=True):
         addTransformsVariable(x, "e1y", e1, "LOC_Y")
         addTransformsVariable(x, "e2y", e2, "LOC_Y")
         addSinglePropVariable(x, "w", o1 if end else o2, "[\"w\"]")
-        x.driver.expression = "o1x"+sign+"w*do*(e2x-e1x)/( (o2y-o1y)*(e2x-e1x)+(o1x-o2x)*(e2y-e1y) )"
+        x.driver.expression = "prk_attached_x(o1x,o2x,o1y,o2y,e1x,e2x,e1y,e2y,"+sign+"w,do)"
         # y
         y = _o1.driver_add("location", 1)
         addTransformsVariable(y, "o1x", o1, "LOC_X")
@@ -107,7 +108,7 @@ def addAttachedDrivers(wallAttached, o1, o2, e1, e2, both=True):
         addTransformsVariable(y, "e1y", e1, "LOC_Y")
         addTransformsVariable(y, "e2y", e2, "LOC_Y")
         addSinglePropVariable(y, "w", o1 if end else o2, "[\"w\"]")
-        y.driver.expression = "o1y"+sign+"w*do*(e2y-e1y)/( (o2y-o1y)*(e2x-e1x)+(o1x-o2x)*(e2y-e1y) )"
+        y.driver.expression = "prk_attached_y(o1x,o2x,o1y,o2y,e1x,e2x,e1y,e2y,"+sign+"w,do)"
 
 
 def getFaceFortVerts(verts1, verts2):
@@ -194,6 +195,8 @@ class Wall(Item):
         # self.inheritLevelFrom indicates if need to inherit the level height and
         # the level z-position from the given EMPTY or take it from GUI
         self.inheritLevelFrom = None
+        # the index of the corner and segment EMPTYs, see self.buildIndex()
+        self.resetIndex()
     
     def init(self, o):
         if o["t"] == self.type:
@@ -256,14 +259,8 @@ class Wall(Item):
             group1 = str(counter+1)
             meshIndex = counter+2
         else:
-            # parent one vert mesh
-            parent = createOneVertObject("Model", loc)
+            parent = self.createModelParent(loc)
             loc = Vector((0., 0., 0.))
-            # type
-            parent["t"] = "model"
-            parent["container"] = 1
-            parent.dupli_type = "VERTS"
-            parent.hide_select = True
             group0 = "0"
             group1 = "1"
             meshIndex = 2
@@ -373,16 +370,18 @@ class Wall(Item):
         # this step is probably optional here, however it's required in self.extend(..)
         context.scene.update()
         
-        # add a HOOK modifier controlling the wall height
-        addHookModifier(obj, "t",
-            self.getTotalHeightEmpty() if (external or prk.levelIndex == len(prk.levels)-1) else self.getLevelParent(1),
-            "t"
-        )
-        # add hook modifiers
-        addHookModifier(obj, "l"+group0, l0, "l"+group0)
-        addHookModifier(obj, "r"+group0, r0, "r"+group0)
-        addHookModifier(obj, "l"+group1, l1, "l"+group1)
-        addHookModifier(obj, "r"+group1, r1, "r"+group1)
+        addHookModifiers(obj, (
+            # a HOOK modifier controlling the wall height
+            ("t",
+                self.getTotalHeightEmpty() if (external or prk.levelIndex == len(prk.levels)-1) else self.getLevelParent(1),
+                "t"
+            ),
+            # HOOK modifiers for the corner EMPTYs
+            ("l"+group0, l0, "l"+group0),
+            ("r"+group0, r0, "r"+group0),
+            ("l"+group1, l1, "l"+group1),
+            ("r"+group1, r1, "r"+group1)
+        ))
         
         # add drivers
         if atRight:
@@ -402,7 +401,171 @@ class Wall(Item):
         makeActiveSelected(context, l1 if atRight else r1)
         
         return (alongX, not alongX, False)
-    
+
+    def createModelParent(self, loc):
+        # parent one vert mesh
+        parent = createOneVertObject("Model", loc)
+        # type
+        parent["t"] = "model"
+        parent["container"] = 1
+        parent.dupli_type = "VERTS"
+        parent.hide_select = True
+        registry.add(parent)
+        return parent
+
+    def createFromPolylines(self, polylines):
+        """
+        Create a wall part for each polyline in one pass.
+
+        Each wall part is built as a single BMesh, all corner and segment EMPTYs, drivers and
+        hook modifiers are created without intermediate scene updates.
+
+        Args:
+            polylines (list): A list of polylines in the coordinate system of the model,
+                see <kernel.plan.makePolyline(..)>
+
+        Returns:
+            A list of Blender objects for the created wall parts
+        """
+        from mathutils import Vector
+        from kernel.wall import WallGraph
+
+        context = self.context
+        prk = context.scene.prk
+
+        self.external = prk.newWallType == "external"
+        atRight = prk.wallAtRight
+        h = self.getHeight()
+
+        parent = getModelParent(context)
+        if not parent:
+            parent = self.createModelParent(getLevelLocation(context))
+            parent["counter"] = -1
+        self.parent = parent
+
+        # calculate the outlines for all wall parts at once
+        graph = WallGraph()
+        for p in polylines:
+            graph.addWall(p["points"], p["widths"] or prk.newWallWidth, p["closed"], atRight)
+        graph.build()
+        points, opposite = graph.compute()
+        widths = graph.widths
+
+        # the prefix for the corner EMPTYs on the control side of the wall and on the opposite one
+        prefix1, prefix2 = ("l", "r") if atRight else ("r", "l")
+
+        hEmpty = self.getTotalHeightEmpty() \
+            if (self.external or prk.levelIndex == len(prk.levels)-1) \
+            else self.getLevelParent(1)
+        directParent = self.getCommonParent() if self.external else self.getLevelParent()
+
+        meshes = []
+        # a list of tuples (mesh, hooks) to add the hook modifiers after all objects are created
+        hooks = []
+        counter = parent["counter"]
+        for start, count, closed in graph.parts:
+            indices = range(start, start+count)
+            groups = [str(counter+1+i) for i in range(count)]
+            meshIndex = counter+count+1
+            counter = meshIndex
+
+            obj = createMeshObject("wall_part")
+            obj["t"] = "wall_part"
+            obj["m"] = meshIndex
+            if not closed:
+                obj["start"] = groups[0]
+                obj["end"] = groups[-1]
+            obj.hide_select = True
+
+            bm = getBmesh(obj)
+            # vertex groups are in the deform layer, create one before any operation with bmesh:
+            layer = bm.verts.layers.deform.new()
+            # BMesh vertices for each corner: (control bottom, control top, opposite bottom, opposite top)
+            verts = []
+            for i, g in zip(indices, groups):
+                v1 = Vector((points[i][0], points[i][1], 0.))
+                v2 = Vector((opposite[i][0], opposite[i][1], 0.))
+                v = (bm.verts.new(v1), bm.verts.new(v1 + h*zAxis), bm.verts.new(v2), bm.verts.new(v2 + h*zAxis))
+                assignGroupToVerts(obj, layer, prefix1+g, v[0], v[1])
+                assignGroupToVerts(obj, layer, prefix2+g, v[2], v[3])
+                assignGroupToVerts(obj, layer, "t", v[1], v[3])
+                verts.append(v)
+            # create faces
+            for i in range(count if closed else count-1):
+                c1, c2 = verts[i], verts[(i+1) % count]
+                # bottom
+                bm.faces.new((c1[0], c2[0], c2[2], c1[2]))
+                # top
+                bm.faces.new((c1[1], c1[3], c2[3], c2[1]))
+                # control side
+                bm.faces.new((c1[0], c1[1], c2[1], c2[0]))
+                # opposite side
+                bm.faces.new((c1[2], c2[2], c2[3], c1[3]))
+            if not closed:
+                # the faces at the open ends of the wall
+                c = verts[0]
+                bm.faces.new((c[0], c[2], c[3], c[1]))
+                c = verts[-1]
+                bm.faces.new((c[0], c[1], c[3], c[2]))
+            bmesh.ops.recalc_face_normals(bm, faces=bm.faces)
+            setBmesh(obj, bm)
+
+            # create corner EMPTYs
+            controls = []
+            neighbors = []
+            for j, (i, g) in enumerate(zip(indices, groups)):
+                # the width of the wall segment ending at the corner EMPTY
+                w = widths[graph.prev[i]] if j or closed else widths[i]
+                e1 = self.createCornerEmptyObject(prefix1+g, Vector((points[i][0], points[i][1], 0.)), False)
+                e2 = self.createCornerEmptyObject(prefix2+g, Vector((opposite[i][0], opposite[i][1], 0.)), True)
+                for e, l in ((e1, atRight), (e2, not atRight)):
+                    setCustomAttributes(e, l=1 if l else 0, g=g, w=w, m=meshIndex)
+                    if closed or j:
+                        e["p"] = groups[j-1]
+                    if closed or j < count-1:
+                        e["n"] = groups[(j+1) % count]
+                    if not closed and not j:
+                        e["e"] = 0
+                    elif not closed and j == count-1:
+                        e["e"] = 1
+                controls.append(e1)
+                neighbors.append(e2)
+            parent_set(directParent, obj, *controls)
+            parent_set(directParent, *neighbors)
+
+            # drivers for the corner EMPTYs on the opposite side of the wall
+            for j in range(count):
+                if closed or 0 < j < count-1:
+                    self.addInternalEdgeDrivers(
+                        neighbors[j], controls[j-1], controls[j], controls[(j+1) % count], 1, atRight, False
+                    )
+                elif j:
+                    self.addEndEdgeDrivers(neighbors[j], controls[j-1], controls[j], True, atRight)
+                else:
+                    self.addEndEdgeDrivers(neighbors[j], controls[j], controls[j+1], False, atRight)
+
+            # segment EMPTYs
+            for j in range(0 if closed else 1, count):
+                for empties, hide in ((controls, False), (neighbors, True)):
+                    s = self.createSegmentEmptyObject(empties[j-1], empties[j], directParent, hide)
+                    setCustomAttributes(s, m=meshIndex)
+
+            _hooks = [("t", hEmpty, "t")]
+            for g, c, n in zip(groups, controls, neighbors):
+                _hooks.append((prefix1+g, c, prefix1+g))
+                _hooks.append((prefix2+g, n, prefix2+g))
+            hooks.append((obj, _hooks))
+            meshes.append(obj)
+        parent["counter"] = counter
+
+        # the only scene update
+        context.scene.update()
+        for obj, _hooks in hooks:
+            addHookModifiers(obj, _hooks)
+
+        bpy.ops.object.select_all(action="DESELECT")
+        return meshes
+
     def extend(self, o, locEnd = None):
         if locEnd:
             # convert the end location to the coordinate system of the wall
@@ -423,7 +586,8 @@ class Wall(Item):
         v = (o if end else self.getNext(o)).location
         # vector along the current wall segment
         u = (v - _v).normalized()
-        extendLeft = True if u.cross(locEnd - _v)[2]>=0 else False
+        # without <locEnd> (e.g. the operator <prk.wall_extend>) the wall is extended to the left side
+        extendLeft = True if not locEnd or u.cross(locEnd - _v)[2]>=0 else False
         
         # normal to the current wall segment in the direction of the new wall segment to be extended
         n = ( zAxis.cross(u) if extendLeft else u.cross(zAxis) ).normalized()
@@ -555,11 +719,13 @@ class Wall(Item):
         # without scene.update() parenting and hook modifiers will not work correctly
         context.scene.update()
         
-        # add HOOK modifier controlling the top vertices (i.e the height of the level)
-        addHookModifier(mesh, "t", hEmpty, "t")
-        # add HOOK modifiers
-        addHookModifier(mesh, group1, e1, group1)
-        addHookModifier(mesh, group2, e2, group2)
+        addHookModifiers(mesh, (
+            # a HOOK modifier controlling the top vertices (i.e the height of the level)
+            ("t", hEmpty, "t"),
+            # HOOK modifiers for the new corner EMPTYs
+            (group1, e1, group1),
+            (group2, e2, group2)
+        ))
         
         # create Blender EMPTY objects for the just created wall segment:
         if end:
@@ -571,6 +737,8 @@ class Wall(Item):
         setCustomAttributes(s1, m=meshIndex)
         setCustomAttributes(s2, m=meshIndex)
         
+        self.resetIndex()
+        
         return e1, e2
     
     def createAttachment(self, verts, attachLeft, freeEnd):
@@ -643,24 +811,24 @@ class Wall(Item):
         context.scene.update()
         # perform parenting
         directParent = self.parent_set(obj, l0, r0, l1, r1)
-        # add a HOOK modifier controlling the wall height
-        addHookModifier(obj, "t",
-            self.getTotalHeightEmpty() \
-            if (
-                self.external or
-                (self.inheritLevelFrom and self.inheritLevelFrom.parent["level"]==prk.levels[-1].index) or
-                (not self.inheritLevelFrom and prk.levelIndex == len(prk.levels)-1)
-            ) \
-            else self.getLevelParent(1),
-            "t"
-        )
-        context.scene.update()
-        
-        # add hook modifiers
-        addHookModifier(obj, "l"+group0, l0, "l"+group0)
-        addHookModifier(obj, "r"+group0, r0, "r"+group0)
-        addHookModifier(obj, "l"+group1, l1, "l"+group1)
-        addHookModifier(obj, "r"+group1, r1, "r"+group1)
+        addHookModifiers(obj, (
+            # a HOOK modifier controlling the wall height
+            ("t",
+                self.getTotalHeightEmpty() \
+                if (
+                    self.external or
+                    (self.inheritLevelFrom and self.inheritLevelFrom.parent["level"]==prk.levels[-1].index) or
+                    (not self.inheritLevelFrom and prk.levelIndex == len(prk.levels)-1)
+                ) \
+                else self.getLevelParent(1),
+                "t"
+            ),
+            # HOOK modifiers for the corner EMPTYs
+            ("l"+group0, l0, "l"+group0),
+            ("r"+group0, r0, "r"+group0),
+            ("l"+group1, l1, "l"+group1),
+            ("r"+group1, r1, "r"+group1)
+        ))
         
         # add drivers
         if freeEnd:
@@ -737,6 +905,8 @@ class Wall(Item):
         s2 = self.createSegmentEmptyObject(self.getNeighbor(end), self.getNeighbor(start), mesh.parent, not start.hide)
         setCustomAttributes(s1, m=meshIndex)
         setCustomAttributes(s2, m=meshIndex)
+        
+        self.resetIndex()
     
     def flipControls(self, o):
         left = o["l"]
@@ -816,19 +986,11 @@ class Wall(Item):
             hide_select(m2, False)
         
         # 2) deal with segment empties 
-        o = _o
-        meshIndex = o["m"]
-        neighbor = None
-        for obj in o.parent.children:
-            if obj.type == "EMPTY" and "t" in obj and obj["t"]=="ws" and obj["m"]==meshIndex:
-                hide_select(obj, False if obj["l"]==left else True)
-                # find the neighbor of <o> if <o> is a segment EMPTY 
-                if o["t"] == "ws" and not neighbor and obj["g"] == o["g"] and o!=obj:
-                    neighbor = obj
+        for (l, group), obj in self.getIndex()[1].items():
+            hide_select(obj, l != left)
         
         # select the neighbor of <o>
-        o = neighbor if neighbor else self.getNeighbor(o)
-        makeActiveSelected(self.context, o)
+        makeActiveSelected(self.context, self.getNeighbor(_o))
     
     def isAttached(self, o):
         """
@@ -836,27 +998,64 @@ class Wall(Item):
         """
         return o and "al" in o
             
+    def resetIndex(self):
+        """
+        Invalidate the index of the corner and segment EMPTYs,
+        it will be rebuilt on the next lookup
+        """
+        self.corners = None
+        self.segments = None
+        self.indexedMesh = None
+    
+    def buildIndex(self):
+        """
+        Build the index of the corner and segment EMPTYs of the wall part <self.mesh>
+        
+        The keys of both dictionaries <self.corners> and <self.segments> are tuples (left, group),
+        so the neighbors of EMPTYs are found without scanning the children of the wall parent or
+        looking up HOOK modifiers by their names.
+        """
+        mesh = self.mesh
+        corners = {}
+        for m in mesh.modifiers:
+            # the HOOK modifiers for the corner EMPTYs are named l<group> and r<group>
+            if m.type == 'HOOK' and m.object and len(m.name) > 1 and m.name[0] in "lr":
+                corners[(m.name[0] == "l", m.name[1:])] = m.object
+        segments = {}
+        meshIndex = mesh["m"]
+        for obj in mesh.parent.children:
+            if obj.type == "EMPTY" and "t" in obj and obj["t"]=="ws" and obj["m"]==meshIndex:
+                segments[(bool(obj["l"]), obj["g"])] = obj
+        self.corners = corners
+        self.segments = segments
+        self.indexedMesh = mesh
+    
+    def getIndex(self, key=None, segment=False):
+        """
+        Returns:
+            A tuple of dictionaries <self.corners> and <self.segments>, see <self.buildIndex()>.
+            The index is (re)built if it doesn't exist yet, if it was built for another wall part
+            or if <key> isn't found in <self.segments> (<segment> is True) or in <self.corners>.
+        """
+        if self.corners is None or self.indexedMesh != self.mesh or \
+            (key and not key in (self.segments if segment else self.corners)):
+            self.buildIndex()
+        return self.corners, self.segments
+    
     def getNeighbor(self, o):
-        if o["t"] == "ws":
-            # we have to iterate through all segment EMPTYs to find the neighbor
-            for obj in self.parent.children:
-                if obj.type == "EMPTY" and "t" in obj and obj["t"]=="ws" and obj["m"]==o["m"] and obj["g"] == o["g"] and obj["l"] != o["l"]:
-                    return obj
-        else:
-            prefix = "r" if o["l"] else "l"
-            return self.mesh.modifiers[prefix+o["g"]].object
+        key = (not o["l"], o["g"])
+        segment = o["t"] == "ws"
+        return self.getIndex(key, segment)[1 if segment else 0][key]
     
     def getNext(self, o):
         if "e" in o and o["e"]:
             return None
-        prefix = "l" if o["l"] else "r"
-        return self.mesh.modifiers[prefix+o["n"]].object
+        return self.getEmpty(o["n"], o["l"])
 
     def getPrevious(self, o):
         if "e" in o and not o["e"]:
             return None
-        prefix = "l" if o["l"] else "r"
-        return self.mesh.modifiers[prefix+o["p"]].object
+        return self.getEmpty(o["p"], o["l"])
     
     def getStart(self, left=True):
         return None if self.isClosed() else self.getEmpty(self.mesh["start"], left)
@@ -865,8 +1064,8 @@ class Wall(Item):
         return None if self.isClosed() else self.getEmpty(self.mesh["end"], left)
     
     def getEmpty(self, group, left):
-        prefix = "l" if left else "r"
-        return self.mesh.modifiers[prefix+group].object
+        key = (bool(left), group)
+        return self.getIndex(key)[0][key]
     
     def getCornerEmpty(self, o):
         if o["t"] == "ws":
@@ -910,11 +1109,10 @@ class Wall(Item):
                 levelIndex = prk.levelIndex
         return self.getTotalHeight() \
             if self.external else \
-            prk.levelBundles[prk.levels[levelIndex].bundle].height
+            getLevelIndex(self.context).getHeight(levelIndex)
     
     def getTotalHeight(self):
-        prk = self.context.scene.prk
-        return sum(prk.levelBundles[level.bundle].height for level in prk.levels)
+        return getLevelIndex(self.context).getTotalHeight()
     
     def setWidth(self, o, value):
         o = self.getCornerEmpty(o)
@@ -1032,8 +1230,8 @@ class Wall(Item):
             y.driver.expression = "y" +sign+ "w1*(x0-x1)/max(d1, 0.001)" if end else "y" +sign+ "w2*(x1-x2)/max(d2, 0.001)"
 
     def addInternalEdgeDrivers(self, slave, m0, m1, m2, end, left, update=True):
-        sign1 = "+" if left else "-"
-        sign2 = "-" if left else "+"
+        # the expressions call the functions from <kernel.drivers> registered in <bpy.app.driver_namespace>
+        sign = "1" if left else "-1"
         
         if not update:
             self.addEndEdgeDrivers(slave, m0, m1, end, left, False)
@@ -1053,7 +1251,7 @@ class Wall(Item):
         # w2 or w1: width
         addSinglePropVariable(x, "w2" if end else "w1", m2 if end else m1, "[\"w\"]")
         # expression
-        x.driver.expression = "x" +sign1+ "w2*(y2-y1)/max(d2,0.001)" +sign2+ "(w1-w2*((x1-x0)*(x2-x1)+(y1-y0)*(y2-y1))/max(d1,0.001)/max(d2,0.001)) * (x2-x1) * d1 / ((x1-x0)*(y2-y1)-(y1-y0)*(x2-x1) if abs((x1-x0)*(y2-y1)-(y1-y0)*(x2-x1))>0.001 else 0.001)"
+        x.driver.expression = "prk_inset_x(x,x0,x1,x2,y0,y1,y2,d1,d2,w1,w2,"+sign+")"
 
         # update the driver for slave.location.y
         y = slave.animation_data.drivers[1]
@@ -1070,11 +1268,13 @@ class Wall(Item):
         # w2 or w1: width
         addSinglePropVariable(y, "w2" if end else "w1", m2 if end else m1, "[\"w\"]")
         # expression
-        y.driver.expression = "y" +sign1+ "w2*(x1-x2)/max(d2,0.001)" +sign2+ "(w1-w2*((x1-x0)*(x2-x1)+(y1-y0)*(y2-y1))/max(d1,0.001)/max(d2,0.001)) * (y2-y1) * d1 / ((x1-x0)*(y2-y1)-(y1-y0)*(x2-x1) if abs((x1-x0)*(y2-y1)-(y1-y0)*(x2-x1))>0.001 else 0.001)"
+        y.driver.expression = "prk_inset_y(y,x0,x1,x2,y0,y1,y2,d1,d2,w1,w2,"+sign+")"
     
     def resetHookModifiers(self):
         objects = bpy.context.scene.objects
         mesh = self.mesh
+        # a modifier can't be applied to multi-user data
+        makeSingleUser(mesh)
         # keep a reference to the current active object
         active = objects.active
         objects.active = mesh
@@ -1150,6 +1350,8 @@ class Wall(Item):
         # create drivers
         addAttachedDrivers(wallAttached, a1, a2, o1, o2, True)
         
+        self.updateAttachedIndex(a1)
+        
         return a
     
     def completeAttachedWall(self, o, targetWall, target):
@@ -1186,6 +1388,8 @@ class Wall(Item):
         
         addAttachedDrivers(self, _e1, o, e1, e2)
         
+        self.updateAttachedIndex(_e1)
+        
         return e1
     
     def connect(self, wall2, o1, o2):
@@ -1284,9 +1488,21 @@ class Wall(Item):
         addAttachedDrivers(wallAttached, a1, a2, o11, o12, True)
         addAttachedDrivers(wallAttached, a2, a1, o21, o22, True)
         
+        self.updateAttachedIndex(a1, a2)
+        
         return a
     
-    def insert(self, o, obj, constructor):
+    def updateAttachedIndex(self, *attached):
+        """
+        Add the attached EMPTYs to the index of the attached walls or
+        update their positions in the index if it has been already built
+        """
+        index = getAttachedIndex(self.parent, False)
+        if index:
+            for o in attached:
+                index.update(o)
+    
+    def insert(self, o, obj, constructor, **kwargs):
         o2 = self.getCornerEmpty(o)
         o1 = self.getPrevious(o2)
         if self.external:
@@ -1296,7 +1512,7 @@ class Wall(Item):
             self.inheritLevelFrom = o
         self.parent_set(obj)
         # create an item instance with <constructor> and init the instance
-        constructor(self.context, self.op).create(obj, self, o1, o2)
+        constructor(self.context, self.op).create(obj, self, o1, o2, **kwargs)
     
     def move_invoke(self, op, context, event, o):
         from base.mover_segment import SegmentMover
@@ -1358,51 +1574,39 @@ class Wall(Item):
         # levelIndex is GUI level index in the GUI list of levels
         levelIndex = prk.levelIndex
         if self.inheritLevelFrom:
-            for i,l in enumerate(prk.levels):
-                if l.index == index:
-                    levelIndex = i
-                    break
+            levelIndex = getLevelIndex(context).getPosition(index)
         if levelOffset:
             levelIndex += levelOffset
             index = prk.levels[levelIndex].index
-        levelParent = None
-        for o in parent.children:
-            if "level" in o and o["level"] == index:
-                levelParent = o
-                break
+        levelParent = registry.getChild(parent, "level", index)
         if not levelParent:
             # create a Blender parent object for the level
             levelParent = createEmptyObject("level "+str(index), (0., 0., getLevelZ(context, levelIndex)), True, **self.emptyPropsLevel)
             levelParent["level"] = index
             parent_set(parent, levelParent)
+            registry.add(levelParent)
         return levelParent
     
     def getCommonParent(self):
         parent = self.parent
-        commonParent = None
-        for o in parent.children:
-            if "co" in o and o["co"]:
-                commonParent = o
-                break
+        commonParent = registry.getChild(parent, "co")
         if not commonParent:
             # create a Blender parent object for external walls
             commonParent = createEmptyObject("common", (0., 0., 0.), True, **self.emptyPropsLevel)
             commonParent["co"] = 1
             parent_set(parent, commonParent)
+            registry.add(commonParent)
         return commonParent
     
     def getTotalHeightEmpty(self):
         """Get a Blender EMPTY that controls the height of the whole building"""
         parent = self.parent
-        hEmpty = None
-        for o in parent.children:
-            if "h" in o and o["h"]:
-                hEmpty = o
-                break
+        hEmpty = registry.getChild(parent, "h")
         if not hEmpty:
             hEmpty = createEmptyObject("h", (0., 0., self.getTotalHeight()), True, **self.emptyPropsLevel)
             hEmpty["h"] = 1
             parent_set(parent, hEmpty)
+            registry.add(hEmpty)
         return hEmpty
 
 
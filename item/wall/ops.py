@@ -1,4 +1,5 @@
 import bpy
+from bpy_extras.io_utils import ImportHelper
 
 from util.blender import cursor_2d_to_location_3d, getLastOperator
 from . import Wall, getWallFromEmpty
@@ -283,3 +284,225 @@ class WallFlipControls(bpy.types.Operator):
             return {'CANCELLED'}
         wall.flipControls(empty)
         return {'FINISHED'}
+
+
+class WallImport(bpy.types.Operator, ImportHelper):
+    bl_idname = "prk.wall_import"
+    bl_label = "Import walls..."
+    bl_description = "Import walls from polylines of a floor plan (.csv or .json)"
+    bl_options = {"REGISTER", "UNDO"}
+    
+    filename_ext = ".csv"
+    
+    filter_glob = bpy.props.StringProperty(default="*.csv;*.json", options={'HIDDEN'})
+    
+    def execute(self, context):
+        from kernel.plan import readPolylines
+        if not context.scene.prk.levels:
+            self.report({'ERROR'}, "To import walls add at least one level")
+            return {'CANCELLED'}
+        try:
+            polylines = readPolylines(self.filepath)
+        except (OSError, ValueError, KeyError, IndexError) as e:
+            self.report({'ERROR'}, "Unable to read polylines from the file: %s" % e)
+            return {'CANCELLED'}
+        polylines = [p for p in polylines if len(p["points"]) > 1]
+        if not polylines:
+            self.report({'ERROR'}, "No polylines found in the file")
+            return {'CANCELLED'}
+        Wall(context, self).createFromPolylines(polylines)
+        return {'FINISHED'}
+
+
+class WallImportGeoJson(bpy.types.Operator, ImportHelper):
+    bl_idname = "prk.wall_import_geojson"
+    bl_label = "Import footprints..."
+    bl_description = "Import building footprints from a GeoJSON file as walls"
+    bl_options = {"REGISTER", "UNDO"}
+    
+    filename_ext = ".geojson"
+    
+    filter_glob = bpy.props.StringProperty(default="*.geojson;*.json", options={'HIDDEN'})
+    
+    inside = bpy.props.BoolProperty(
+        name = "Walls inside footprints",
+        description = "Place the walls inside the footprint polygons, otherwise the side defined by the wall settings is used",
+        default = True
+    )
+    
+    def execute(self, context):
+        from kernel.plan import readGeoJson, getGeographicCenter, projectGeoJson
+        from kernel.projection import TransverseMercator
+        from kernel.area import getPolygonMetrics
+        from base import getModelParent, getLevelLocation
+        scene = context.scene
+        if not scene.prk.levels:
+            self.report({'ERROR'}, "To import walls add at least one level")
+            return {'CANCELLED'}
+        try:
+            with open(self.filepath, "r", encoding="utf-8") as f:
+                lines = readGeoJson(f)
+        except (OSError, ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+            self.report({'ERROR'}, "Unable to read footprints from the file: %s" % e)
+            return {'CANCELLED'}
+        lines = [l for l in lines if len(l[0]) > 1]
+        if not lines:
+            self.report({'ERROR'}, "No footprints found in the file")
+            return {'CANCELLED'}
+        # the same scene attributes are used by the GeoJSON export
+        if not ("latitude" in scene and "longitude" in scene):
+            scene["latitude"], scene["longitude"] = getGeographicCenter(lines)
+            scene["heading"] = 0.
+        projection = TransverseMercator(lat=scene["latitude"], lon=scene["longitude"])
+        # the polylines must be given in the coordinate system of the model
+        modelParent = getModelParent(context)
+        origin = modelParent.matrix_world.translation if modelParent else getLevelLocation(context)
+        polylines = projectGeoJson(
+            lines,
+            projection,
+            scene.get("heading", 0.),
+            (origin.x, origin.y)
+        )
+        polylines = [p for p in polylines if len(p["points"]) > 1]
+        if self.inside:
+            # the walls are located to the right from a clockwise footprint
+            atRight = scene.prk.wallAtRight
+            for p in polylines:
+                if p["closed"] and len(p["points"]) > 2:
+                    counterclockwise = getPolygonMetrics(p["points"])[0] > 0.
+                    if counterclockwise == atRight:
+                        p["points"].reverse()
+                        if p["widths"]:
+                            # a width is given for the wall segment starting at the point
+                            widths = p["widths"]
+                            p["widths"] = widths[-2::-1] + widths[-1:]
+        Wall(context, self).createFromPolylines(polylines)
+        return {'FINISHED'}
+
+
+def clearOpeningDrivers(obj):
+    """
+    Remove the drivers binding the opening <obj> and its interior and exterior parts
+    to a wall segment, they are set anew in <item.opening.Opening.create(..)>.
+    The mark of a hole in the wall segment of the source opening is removed too,
+    it's set anew by <item.cutout.Cutouts.add(..)>.
+    """
+    if "cutout" in obj:
+        del obj["cutout"]
+    obj.driver_remove("location")
+    obj.driver_remove("rotation_euler")
+    for o in obj.children:
+        if o.get("t") in ("int", "ext"):
+            o.driver_remove("location")
+
+
+class WallInstanceOpening(bpy.types.Operator):
+    bl_idname = "prk.wall_instance_opening"
+    bl_label = "Instance along walls"
+    bl_description = "Place linked duplicates of the selected window or door evenly along the wall segments"
+    bl_options = {"REGISTER", "UNDO"}
+    
+    spacing = bpy.props.FloatProperty(
+        name = "Spacing",
+        description = "The distance between the centers of the neighboring items, it is at least the item width plus the margin",
+        default = 3.,
+        min = 0.1,
+        unit = "LENGTH"
+    )
+    
+    margin = bpy.props.FloatProperty(
+        name = "Margin",
+        description = "The minimal distance from the wall corners and from the other items",
+        default = 0.5,
+        min = 0.,
+        unit = "LENGTH"
+    )
+    
+    allSegments = bpy.props.BoolProperty(
+        name = "All wall segments",
+        description = "Place the items along all segments of the wall part, otherwise only along the wall segment of the selected item",
+        default = True
+    )
+    
+    @classmethod
+    def poll(cls, context):
+        o = context.object
+        return context.mode == "OBJECT" and o and o.get("t") in ("window", "door")
+    
+    def execute(self, context):
+        from base import pContext, registry
+        from item.opening import getReferencesForOpening
+        from util.blender import duplicateHierarchy, makeActiveSelected
+        from kernel.plan import getOpeningPositions
+        
+        source = context.object
+        constructor = pContext.items[source["t"]][0]
+        item = constructor(context, self)
+        item.init(source)
+        width = item.width.location.x
+        
+        o1, o2 = getReferencesForOpening(source)
+        wall = getWallFromEmpty(context, self, o2)
+        external = wall.external
+        left = bool(o1["l"])
+        if self.allSegments:
+            segments = []
+            for (l, _), o in wall.getIndex()[0].items():
+                if l == left:
+                    _o = wall.getPrevious(o)
+                    if _o:
+                        segments.append((_o, o))
+        else:
+            segments = ((o1, o2),)
+        
+        # key: the name of the corner EMPTY ending a wall segment;
+        # value: the list of intervals along the wall segment occupied by the openings
+        occupied = dict((_o2.name, []) for _,_o2 in segments)
+        for t in ("window", "door"):
+            for o in registry.getObjects(t):
+                _o1, _o2 = getReferencesForOpening(o)
+                if not _o2.name in occupied:
+                    continue
+                opening = pContext.items[t][0](context, self)
+                opening.init(o)
+                w = opening.width.location.x
+                direction = (_o2.location - _o1.location).normalized()
+                # the distance of the opening center from <_o1>, see <Opening.create(..)>
+                center = (o.location - _o1.location).dot(direction) - (w/2. if _o1["l"] else -w/2.)
+                occupied[_o2.name].append((center - w/2., center + w/2.))
+        
+        # The positions for all wall segments are calculated at once before any Blender object
+        # is created, the instances share the mesh data with <source>
+        positions = [
+            (_o2, getOpeningPositions(
+                    (_o2.location - _o1.location).length,
+                    width,
+                    self.spacing,
+                    occupied[_o2.name],
+                    self.margin
+                )
+            )
+            for _o1, _o2 in segments
+        ]
+        z = source.location.z
+        numInstances = 0
+        for _o2, centers in positions:
+            length = (_o2.location - wall.getPrevious(_o2).location).length
+            for center in centers:
+                obj = duplicateHierarchy(source)
+                clearOpeningDrivers(obj)
+                # <wall.insert(..)> changes those attributes
+                wall.external = external
+                wall.inheritLevelFrom = None
+                wall.insert(_o2, obj, constructor, k=center/length, z=z)
+                numInstances += 1
+        
+        # The operator <prk.add_window> calls <bpy.ops.transform.translate()> after the insertion
+        # to initialize the modifiers of the wall part. A single scene update does the same
+        # for all instances.
+        if numInstances:
+            context.scene.update()
+        
+        makeActiveSelected(context, source)
+        self.report({'INFO'}, "%s instances have been added" % numInstances)
+        return {'FINISHED'}
@@ -12,6 +12,8 @@ class GuiWindow:
     
     def draw(self, context, layout):
         layout.label("A window")
+        layout.operator("prk.wall_instance_opening")
+        layout.prop(context.scene.prk, "cutoutOpenings")
     
     def draw_workshop(self, context, layout):
         props = context.scene.prk.item
@@ -0,0 +1,7 @@
+"""
+The package contains pure Python code that doesn't depend on Blender.
+
+Modules of the package must not import <bpy>, <bmesh>, <mathutils> or any other package
+of Prokitektura that imports them. That allows to use the code outside of Blender
+(e.g. for unit tests under plain CPython). The Blender side only mirrors the results.
+"""
@@ -0,0 +1,67 @@
+import math
+
+# must be the same as <base.zero>
+zero = 0.000001
+
+
+def getPolygonMetrics(points):
+    """
+    Calculates the metrics of the simple polygon defined by the list of 2D <points>
+
+    Returns:
+        A tuple (area, perimeter, centroid). The area is positive if the polygon
+        is counterclockwise and negative otherwise.
+    """
+    area = 0.
+    perimeter = 0.
+    cx = 0.
+    cy = 0.
+    x0, y0 = points[-1][0], points[-1][1]
+    for p in points:
+        x1, y1 = p[0], p[1]
+        # the cross product for the shoelace formula
+        c = x0*y1 - x1*y0
+        area += c
+        cx += (x0+x1)*c
+        cy += (y0+y1)*c
+        perimeter += math.hypot(x1-x0, y1-y0)
+        x0, y0 = x1, y1
+    if abs(area) < zero:
+        # a degenerate polygon, take the average of its points
+        numPoints = len(points)
+        centroid = (sum(p[0] for p in points)/numPoints, sum(p[1] for p in points)/numPoints)
+    else:
+        centroid = (cx/3./area, cy/3./area)
+    return area/2., perimeter, centroid
+
+
+def getUvOrigin(points, area):
+    """
+    Returns the origin (x, y) and the angle of the x-axis of the area coordinate system for
+    the UV coordinates of the polygon defined by the list of 2D <points>
+
+    The origin is the first point, the x-axis goes along the first edge of the face of the polygon
+    oriented counterclockwise, i.e. to the next point if <area> returned by <getPolygonMetrics(..)>
+    is positive and to the previous one otherwise.
+    """
+    x0, y0 = points[0][0], points[0][1]
+    p = points[1] if area > 0. else points[-1]
+    return x0, y0, math.atan2(p[1]-y0, p[0]-x0)
+
+
+def getUvs(points, uvOrigin):
+    """
+    Returns the list of UV coordinates for the list of 2D <points>
+
+    Args:
+        uvOrigin (tuple): The origin and the angle of the x-axis of the area coordinate system
+            returned by <getUvOrigin(..)>
+    """
+    x0, y0, angle = uvOrigin
+    cos = math.cos(angle)
+    sin = math.sin(angle)
+    # the inversed rotation of the translated point
+    return [
+        ( (p[0]-x0)*cos + (p[1]-y0)*sin, (p[1]-y0)*cos - (p[0]-x0)*sin )
+        for p in points
+    ]
@@ -0,0 +1,73 @@
+"""
+Functions used in the expressions of Blender drivers.
+
+The functions are registered in <bpy.app.driver_namespace> under the names from <functions>,
+so a driver expression is a short call of a shared function instead of
+a long Python expression built as a string for each driver.
+"""
+
+# must be the same as the guard used in the driver expressions in <item.wall>
+minLength = 0.001
+
+
+def attachedX(o1x, o2x, o1y, o2y, e1x, e2x, e1y, e2y, w, do):
+    """
+    X-coordinate of the neighbor of the attached corner EMPTY <o1>.
+    The neighbor is located on the wall segment defined by <e1> and <e2>.
+    <w> is the signed width of the attached wall, <do> is the distance between <o1> and <o2>.
+    """
+    return o1x + w*do*(e2x-e1x)/( (o2y-o1y)*(e2x-e1x)+(o1x-o2x)*(e2y-e1y) )
+
+
+def attachedY(o1x, o2x, o1y, o2y, e1x, e2x, e1y, e2y, w, do):
+    """
+    Y-coordinate of the neighbor of the attached corner EMPTY <o1>, see <attachedX(..)>
+    """
+    return o1y + w*do*(e2y-e1y)/( (o2y-o1y)*(e2x-e1x)+(o1x-o2x)*(e2y-e1y) )
+
+
+def insetFactor(x0, x1, x2, y0, y1, y2, d1, d2, w1, w2):
+    # the denominator is the cross product of the vectors along the wall segments
+    cross = (x1-x0)*(y2-y1)-(y1-y0)*(x2-x1)
+    if abs(cross) <= minLength:
+        cross = minLength
+    return (w1-w2*((x1-x0)*(x2-x1)+(y1-y0)*(y2-y1))/max(d1, minLength)/max(d2, minLength)) * d1 / cross
+
+
+def insetX(x, x0, x1, x2, y0, y1, y2, d1, d2, w1, w2, s):
+    """
+    X-coordinate of the slave corner EMPTY for the internal vertical edge of the wall
+
+    The master corner EMPTYs are <0>, <1> and <2>, <x> is the X-coordinate of the master corner EMPTY <1>,
+    <d1> and <d2> are the lengths of the wall segments 0-1 and 1-2, <w1> and <w2> are their widths,
+    <s> is 1 if the slave is on the left side of the wall or -1 otherwise.
+    """
+    return x + s*( w2*(y2-y1)/max(d2, minLength) - insetFactor(x0, x1, x2, y0, y1, y2, d1, d2, w1, w2)*(x2-x1) )
+
+
+def insetY(y, x0, x1, x2, y0, y1, y2, d1, d2, w1, w2, s):
+    """
+    Y-coordinate of the slave corner EMPTY for the internal vertical edge of the wall, see <insetX(..)>
+    """
+    return y + s*( w2*(x1-x2)/max(d2, minLength) - insetFactor(x0, x1, x2, y0, y1, y2, d1, d2, w1, w2)*(y2-y1) )
+
+
+def opening(a1, a2, b1, b2, k, wi, wa, d, s, t):
+    """
+    A coordinate of the center of the opening on the wall segment defined by
+    the corner EMPTYs <1> and <2>; <a> and <b> are either X and Y coordinates or Y and X coordinates.
+
+    <k> is the relative position of the opening on the wall segment, <wi> is the width of the opening,
+    <wa> is the width of the wall, <d> is the length of the wall segment, <s> and <t> are signs (1 or -1).
+    """
+    return a1+(a2-a1)*(k+s*wi/2/d)+t*(b2-b1)*wa/2/d
+
+
+# names under which the functions are available in the driver expressions
+functions = {
+    "prk_attached_x": attachedX,
+    "prk_attached_y": attachedY,
+    "prk_inset_x": insetX,
+    "prk_inset_y": insetY,
+    "prk_opening": opening
+}
@@ -0,0 +1,66 @@
+import math
+
+from kernel.area import getPolygonMetrics
+
+
+def findFaces(points, edges):
+    """
+    Find the faces of the planar graph defined by <points> and <edges>
+
+    The faces are traced along the half-edges: each edge (a, b) from <edges> is a half-edge
+    directed so that the face to be found is located to the left from it. The half-edge
+    following (u, v) is (v, w), where the edge v-w is the first edge clockwise from the edge v-u
+    around the node <v>. A face that needs to go along an edge in the direction opposite to
+    the one given in <edges> is discarded, e.g. the body of a wall.
+
+    Args:
+        points (list): 2D coordinates of the nodes
+        edges (list): Pairs of node indices (a, b)
+
+    Returns:
+        A list of tuples (nodes, area) for each counterclockwise face, where <nodes> is the list of
+        node indices of the face in the counterclockwise order and <area> is the face area.
+        Clockwise faces (the outer boundaries of the connected parts of the graph) aren't returned.
+    """
+    # key: node index; value: a list of neighbor node indices sorted by the angle
+    neighbors = {}
+    for a, b in set( (a, b) if a < b else (b, a) for a, b in edges ):
+        neighbors.setdefault(a, []).append(b)
+        neighbors.setdefault(b, []).append(a)
+    # key: (node index, neighbor node index); value: the position of the neighbor in neighbors[node]
+    positions = {}
+    for v in neighbors:
+        x, y = points[v]
+        _neighbors = neighbors[v]
+        _neighbors.sort(key = lambda w: math.atan2(points[w][1]-y, points[w][0]-x))
+        for i, w in enumerate(_neighbors):
+            positions[(v, w)] = i
+
+    halfEdges = set(edges)
+    visited = set()
+    faces = []
+    for edge in edges:
+        if edge in visited:
+            continue
+        nodes = []
+        valid = True
+        u, v = edge
+        while True:
+            visited.add((u, v))
+            nodes.append(u)
+            # the first edge clockwise from v-u around <v>
+            _neighbors = neighbors[v]
+            w = _neighbors[positions[(v, u)]-1]
+            u, v = v, w
+            if (u, v) == edge:
+                break
+            if not (u, v) in halfEdges or (u, v) in visited:
+                # the face goes along an edge in the wrong direction or the tracing went astray
+                valid = False
+                break
+        if not valid or len(nodes) < 3:
+            continue
+        area = getPolygonMetrics([points[i] for i in nodes])[0]
+        if area > 0.:
+            faces.append((nodes, area))
+    return faces
@@ -0,0 +1,35 @@
+from itertools import accumulate
+
+# must be the same as <base.zero>
+zero = 0.000001
+
+
+def getElevations(heights):
+    """
+    Calculates the elevations of the levels stacked on top of each other with a prefix sum of their <heights>
+
+    Args:
+        heights (list): The heights of the levels from the bottom to the top
+
+    Returns:
+        A list of len(heights)+1 elements: the elevation of the bottom of each level
+        followed by the total height of the stack
+    """
+    return [0.] + list(accumulate(heights))
+
+
+def getChangedOffsets(current, elevations):
+    """
+    Compares the <current> elevations with the new <elevations>
+
+    Args:
+        current (list): The current elevations or None for the missing ones
+        elevations (list): The new elevations, see <getElevations(..)>
+
+    Returns:
+        A list of tuples (index, elevation) only for the elevations that have been changed
+    """
+    return [
+        (i, z) for i, (_z, z) in enumerate(zip(current, elevations))
+        if not _z is None and abs(z - _z) > zero
+    ]
@@ -0,0 +1,72 @@
+import math
+from bisect import bisect_left, bisect_right
+
+# must be the same as <base.zero2>
+zero2 = 0.0001
+
+
+def getAngle(n, baseVec, vec):
+    """
+    Returns the polar angle in radians of the vector <vec> counted counterclockwise from
+    the vector <baseVec> around the normal <n>, the angle is in the range [0, 2*pi)
+
+    The vectors must provide the methods <dot(..)> and <cross(..)> like <mathutils.Vector>.
+    """
+    angle = math.atan2(n.dot(baseVec.cross(vec)), baseVec.dot(vec))
+    return angle if angle >= 0. else angle + 2.*math.pi
+
+
+def getAngles(n, edges):
+    """
+    Calculate the polar angles of <edges> for the binary search in
+    <getNeighborEdges(..)> and <getEdgeIndex(..)>
+
+    Args:
+        n: The normal to the plane of <edges>
+        edges (list): Entries for the edges as in <workshop.node.Node.edges> ordered counterclockwise
+            starting from the base edge, the first element of each entry is the unit vector along the edge
+    """
+    baseVec = edges[0][0]
+    # the base edge has exactly zero angle
+    angles = [0.]
+    angles.extend(getAngle(n, baseVec, e[0]) for e in edges[1:])
+    return angles
+
+
+def getNeighborEdges(n, edges, angles, vec):
+    """
+    Returns two neighbor edges from <edges> for the vector <vec>
+
+    Args:
+        n: The normal to the plane of <edges>
+        edges (list): See <getAngles(..)>
+        angles (list): The polar angles of <edges> returned by <getAngles(..)>
+        vec: A vector that starts at the template vertex
+
+    Returns:
+        A tuple of two edges, <vec> is located between them going counterclockwise
+        from the first edge to the second one
+    """
+    # the index of the first edge located counterclockwise after <vec>
+    i = bisect_right(angles, getAngle(n, edges[0][0], vec))
+    return edges[i-1], edges[i % len(edges)]
+
+
+def getEdgeIndex(n, edges, angles, edgeVector):
+    """
+    Get <index> of <edges> for which <edges[index][0] == edgeVector> or None if there is no such edge.
+    <edgeVector> must be normalized!
+
+    Args:
+        n: The normal to the plane of <edges>
+        edges (list): See <getAngles(..)>
+        angles (list): The polar angles of <edges> returned by <getAngles(..)>
+        edgeVector: A unit vector that starts at the template vertex
+    """
+    numEdges = len(edges)
+    i = bisect_left(angles, getAngle(n, edges[0][0], edgeVector))
+    # <edgeVector> is located between the edges with the indices <i-1> and <i>,
+    # the index <numEdges> stands for the base edge approached from the other side
+    for index in (i % numEdges, i-1):
+        if abs( 1.-edgeVector.dot(edges[index][0]) ) < zero2:
+            return index
@@ -0,0 +1,215 @@
+import os, csv, json, math
+
+
+def isClosed(points):
+    return len(points) > 2 and tuple(points[0]) == tuple(points[-1])
+
+
+def makePolyline(points, widths=None, closed=False):
+    """
+    Returns a polyline entry as expected by <item.wall.Wall.createFromPolylines(..)>
+
+    A closed polyline can be also given with the last point equal to the first one.
+    """
+    points = [(float(p[0]), float(p[1])) for p in points]
+    if isClosed(points):
+        points.pop()
+        closed = True
+    if widths:
+        # keep widths only for the wall segments
+        widths = widths[:len(points) if closed else len(points)-1]
+        widths = None if None in widths else [float(w) for w in widths]
+    return {
+        "points": points,
+        "widths": widths,
+        "closed": closed
+    }
+
+
+def readPolylines(filepath):
+    """
+    Read polylines of a floor plan from a .json or a .csv file
+
+    The JSON file contains a list of polylines (or an object with the list under the key <walls>).
+    Each polyline is either a list of points [[x, y], ...] or an object
+    {"points": [[x, y], ...], "closed": false, "width": 0.3} (or "widths": [...] for each wall segment).
+
+    Each row of the CSV file is "polyline id, x, y[, width]". Rows with the same polyline id
+    going one after another form a polyline, the optional width is given for the wall segment
+    starting at the point. A header row is skipped.
+
+    A polyline is closed if its last point is equal to the first one.
+
+    Returns:
+        A list of polylines, see <makePolyline(..)>
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    with open(filepath, "r", encoding="utf-8", newline="") as f:
+        return readJson(f) if ext == ".json" else readCsv(f)
+
+
+def readJson(f):
+    data = json.load(f)
+    if isinstance(data, dict):
+        data = data["walls"]
+    polylines = []
+    for p in data:
+        if isinstance(p, dict):
+            widths = p.get("widths")
+            if not widths and "width" in p:
+                widths = (p["width"],)*len(p["points"])
+            polylines.append( makePolyline(p["points"], widths, p.get("closed", False)) )
+        else:
+            polylines.append( makePolyline(p) )
+    return polylines
+
+
+def readCsv(f):
+    polylines = []
+    _id = None
+    points = []
+    widths = []
+    for row in csv.reader(f):
+        if not row or row[0].startswith("#"):
+            continue
+        try:
+            point = (float(row[1]), float(row[2]))
+        except ValueError:
+            # a header row
+            continue
+        if row[0] != _id:
+            if points:
+                polylines.append( makePolyline(points, widths) )
+            _id = row[0]
+            points = []
+            widths = []
+        points.append(point)
+        widths.append(float(row[3]) if len(row) > 3 and row[3] else None)
+    if points:
+        polylines.append( makePolyline(points, widths) )
+    return polylines
+
+
+def readGeoJson(f):
+    """
+    Read building footprints from a GeoJSON file
+
+    Polygon and MultiPolygon features give closed polylines (only the outer ring of each polygon
+    is used), LineString and MultiLineString features give open polylines. The optional property
+    <width> of a feature sets the width for all its wall segments.
+
+    Returns:
+        A list of tuples (coordinates, closed, width), where <coordinates> is a list of
+        geographic coordinates [lon, lat] as given in the file
+    """
+    data = json.load(f)
+    if data.get("type") == "FeatureCollection":
+        features = data["features"]
+    elif data.get("type") == "Feature":
+        features = (data,)
+    else:
+        # a bare geometry
+        features = ({"geometry": data},)
+    lines = []
+    for feature in features:
+        geometry = feature.get("geometry")
+        if not geometry:
+            continue
+        properties = feature.get("properties") or {}
+        width = properties.get("width")
+        geometryType = geometry["type"]
+        coordinates = geometry["coordinates"]
+        if geometryType == "Polygon":
+            lines.append( (coordinates[0], True, width) )
+        elif geometryType == "MultiPolygon":
+            lines.extend( (polygon[0], True, width) for polygon in coordinates )
+        elif geometryType == "LineString":
+            lines.append( (coordinates, False, width) )
+        elif geometryType == "MultiLineString":
+            lines.extend( (line, False, width) for line in coordinates )
+    return lines
+
+
+def getGeographicCenter(lines):
+    """
+    Returns the center (lat, lon) of the bounding box of <lines> returned by <readGeoJson(..)>
+    """
+    lons = [c[0] for coordinates,_,_ in lines for c in coordinates]
+    lats = [c[1] for coordinates,_,_ in lines for c in coordinates]
+    return ( (min(lats)+max(lats))/2., (min(lons)+max(lons))/2. )
+
+
+def projectGeoJson(lines, projection, heading=0., origin=(0., 0.)):
+    """
+    Project <lines> returned by <readGeoJson(..)> onto the plane. All points are projected at once.
+
+    Args:
+        projection: An instance of <kernel.projection.TransverseMercator>
+        heading (float): The heading of the scene in degrees, the projected points are rotated
+            by -<heading> (the export rotates them by <heading>)
+        origin (tuple): The location (x, y) of the model parent, it's subtracted from
+            the projected points
+
+    Returns:
+        A list of polylines, see <makePolyline(..)>
+    """
+    import numpy
+    if not lines:
+        return []
+    numPoints = sum(len(coordinates) for coordinates,_,_ in lines)
+    coords = numpy.fromiter(
+        (c for coordinates,_,_ in lines for p in coordinates for c in p[:2]),
+        dtype=numpy.float64,
+        count=2*numPoints
+    ).reshape(numPoints, 2)
+    x, y = projection.fromGeographicArray(coords[:,1], coords[:,0])
+    heading = math.radians(heading)
+    cos = math.cos(heading)
+    sin = math.sin(heading)
+    points = numpy.column_stack((
+        cos*x + sin*y - origin[0],
+        -sin*x + cos*y - origin[1]
+    )).tolist()
+    polylines = []
+    index = 0
+    for coordinates, closed, width in lines:
+        numPoints = len(coordinates)
+        polylines.append(makePolyline(
+            points[index:index+numPoints],
+            (width,)*numPoints if width else None,
+            closed
+        ))
+        index += numPoints
+    return polylines
+
+
+def getOpeningPositions(length, width, spacing, occupied=(), margin=0.):
+    """
+    Distribute openings of the same <width> evenly along a wall segment of the given <length>
+
+    Args:
+        spacing (float): The distance between the centers of the neighboring openings, it's increased
+            to <width> + <margin> if it's smaller, so the openings don't overlap
+        occupied (list): Intervals (start, end) along the wall segment occupied by other openings
+        margin (float): The minimal distance from the ends of the wall segment and
+            from the occupied intervals
+
+    Returns:
+        A list of distances of the opening centers from the start of the wall segment
+    """
+    available = length - 2.*margin
+    if available < width or spacing <= 0.:
+        return []
+    # the gap between the neighboring openings must be at least <margin>
+    spacing = max(spacing, width + margin)
+    numOpenings = int( (available - width)//spacing ) + 1
+    # center the openings on the wall segment
+    start = (length - (numOpenings-1)*spacing)/2.
+    positions = []
+    for i in range(numOpenings):
+        center = start + i*spacing
+        a = center - width/2. - margin
+        b = center + width/2. + margin
+        if not any(a < _b and b > _a for _a, _b in occupied):
+            positions.append(center)
+    return positions
@@ -0,0 +1,70 @@
+import math
+import numpy
+
+
+class TransverseMercator:
+    radius = 6378137
+
+    def __init__(self, **kwargs):
+        # setting default values
+        self.lat = 0 # in degrees
+        self.lon = 0 # in degrees
+        self.k = 1 # scale factor
+
+        for attr in kwargs:
+            setattr(self, attr, kwargs[attr])
+        # constants used by all projection methods
+        self.latInRadians = math.radians(self.lat)
+        self.lonInRadians = math.radians(self.lon)
+        self.kR = self.k * self.radius
+
+    def fromGeographic(self, lat, lon):
+        lat = math.radians(lat)
+        lon = math.radians(lon) - self.lonInRadians
+        B = math.sin(lon) * math.cos(lat)
+        x = 0.5 * self.kR * math.log((1+B)/(1-B))
+        y = self.kR * ( math.atan(math.tan(lat)/math.cos(lon)) - self.latInRadians )
+        return (x,y)
+
+    def toGeographic(self, x, y):
+        x = x/self.kR
+        y = y/self.kR
+        D = y + self.latInRadians
+        lon = math.atan(math.sinh(x)/math.cos(D))
+        lat = math.asin(math.sin(D)/math.cosh(x))
+
+        lon = self.lon + math.degrees(lon)
+        lat = math.degrees(lat)
+        return (lat, lon)
+
+    def fromGeographicArray(self, lat, lon):
+        """
+        The same as <self.fromGeographic(..)> but for NumPy arrays <lat> and <lon>
+
+        Returns:
+            A tuple of NumPy arrays (x, y)
+        """
+        lat = numpy.radians(lat)
+        lon = numpy.radians(lon) - self.lonInRadians
+        B = numpy.sin(lon) * numpy.cos(lat)
+        # arctanh(B) is equal to 0.5*log((1+B)/(1-B))
+        x = self.kR * numpy.arctanh(B)
+        y = self.kR * ( numpy.arctan(numpy.tan(lat)/numpy.cos(lon)) - self.latInRadians )
+        return (x, y)
+
+    def toGeographicArray(self, x, y):
+        """
+        The same as <self.toGeographic(..)> but for NumPy arrays <x> and <y>
+
+        Returns:
+            A tuple of NumPy arrays (lat, lon)
+        """
+        x = x/self.kR
+        y = y/self.kR
+        D = y + self.latInRadians
+        lon = numpy.arctan(numpy.sinh(x)/numpy.cos(D))
+        lat = numpy.arcsin(numpy.sin(D)/numpy.cosh(x))
+
+        lon = self.lon + numpy.degrees(lon)
+        lat = numpy.degrees(lat)
+        return (lat, lon)
@@ -0,0 +1,217 @@
+import numpy
+
+# must be the same as <base.zero>
+zero = 0.000001
+# must be the same as the guard used in the driver expressions in <item.wall>
+minLength = 0.001
+
+
+def normalize(vectors):
+    """
+    Normalizes in place an array of 2D vectors with the shape (N, 2)
+    """
+    lengths = numpy.sqrt(numpy.einsum("ij,ij->i", vectors, vectors))
+    vectors /= numpy.maximum(lengths, minLength)[:,None]
+    return vectors
+
+
+def cross(a, b):
+    """
+    Z-component of the cross products for the arrays of 2D vectors <a> and <b>
+    """
+    return a[:,0]*b[:,1] - a[:,1]*b[:,0]
+
+
+class WallGraph:
+    """
+    A Blender independent model of all walls of a floor plan.
+
+    Each wall part is a polyline of corner nodes, those are the control points of the wall part
+    (i.e. the side of the wall part with selectable corner EMPTYs). The wall is located either
+    to the left or to the right from its control points.
+
+    After <self.build()> all data is stored in flat arrays:
+        self.points (numpy.ndarray): (N, 2) array of coordinates of all corner nodes
+        self.widths (numpy.ndarray): The width of the wall segment starting at the corner node;
+            for the open end of a wall part it's the width of the wall segment ending at the corner node
+        self.prev (numpy.ndarray): Index of the previous corner node or -1 for the start of a wall part
+        self.next (numpy.ndarray): Index of the next corner node or -1 for the end of a wall part
+        self.side (numpy.ndarray): 1. if the wall is located to the left from the corner node, -1. otherwise
+        self.attached (numpy.ndarray): Indices of the corner nodes attached to a wall segment
+        self.hosts (numpy.ndarray): Index of the corner node that starts the wall segment
+            hosting the related corner node from <self.attached>
+        self.distances (numpy.ndarray): Distance between the related corner node from <self.attached>
+            and the start of its hosting wall segment
+
+    The inset math is the same as in <util.inset.Corner>.
+    """
+
+    def __init__(self):
+        # a list of tuples (start, count, closed) for each wall part
+        self.parts = []
+        self._points = []
+        self._widths = []
+        self._side = []
+        self._attached = []
+        self.dirty = True
+
+    def addWall(self, points, widths, closed=False, atRight=True):
+        """
+        Add a wall part
+
+        Args:
+            points (list): A list of 2D coordinates of the corner nodes
+            widths: Either a single width for all wall segments or a list of widths
+                for each wall segment (the wall segment starts at the corner node with the same index)
+            closed (bool): Is the wall part closed?
+            atRight (bool): The wall is at the right (True) from the corner nodes or at the left (False)
+
+        Returns:
+            Index of the wall part
+        """
+        start = len(self._points)
+        count = len(points)
+        numSegments = count if closed else count-1
+        if isinstance(widths, (int, float)):
+            widths = [widths]*numSegments
+        widths = list(widths[:numSegments])
+        if not closed:
+            # the open end of the wall part takes the width of the last wall segment
+            widths.append(widths[-1])
+        self._points.extend((p[0], p[1]) for p in points)
+        self._widths.extend(widths)
+        self._side.extend( (-1. if atRight else 1.,)*count )
+        self.parts.append((start, count, closed))
+        self.dirty = True
+        return len(self.parts)-1
+
+    def attach(self, wall, end, hostWall, hostSegment, distance):
+        """
+        Attach the start (<end> is False) or the end (<end> is True) of the open wall part <wall>
+        to the wall segment <hostSegment> of the wall part <hostWall>.
+        <distance> is measured from the start of the hosting wall segment.
+        """
+        start, count, closed = self.parts[wall]
+        if closed:
+            raise ValueError("A closed wall part can't be attached")
+        hostStart = self.parts[hostWall][0]
+        self._attached.append( (start+count-1 if end else start, hostStart+hostSegment, distance) )
+        self.dirty = True
+
+    def build(self):
+        """
+        Convert the data supplied via <self.addWall(..)> and <self.attach(..)> to flat arrays
+        """
+        numNodes = len(self._points)
+        self.points = numpy.array(self._points, dtype=numpy.float64).reshape(numNodes, 2)
+        self.widths = numpy.array(self._widths, dtype=numpy.float64)
+        self.side = numpy.array(self._side, dtype=numpy.float64)
+        indices = numpy.arange(numNodes)
+        prev = indices - 1
+        next = indices + 1
+        for start, count, closed in self.parts:
+            end = start+count-1
+            prev[start] = end if closed else -1
+            next[end] = start if closed else -1
+        self.prev = prev
+        self.next = next
+        if self._attached:
+            attached, hosts, distances = zip(*self._attached)
+        else:
+            attached, hosts, distances = (), (), ()
+        self.attached = numpy.array(attached, dtype=numpy.intp)
+        self.hosts = numpy.array(hosts, dtype=numpy.intp)
+        self.distances = numpy.array(distances, dtype=numpy.float64)
+        self.dirty = False
+
+    def compute(self):
+        """
+        Compute the outlines of all wall parts in one vectorized pass
+
+        Returns:
+            A tuple of (N, 2) arrays: locations of the corner nodes (attached corner nodes are moved
+            to their hosting wall segments) and locations of their neighbors on the opposite side of the wall
+        """
+        if self.dirty:
+            self.build()
+        points = self.points.copy()
+        prev = self.prev
+        next = self.next
+
+        attached = self.attached
+        if len(attached):
+            # keep the attached corner nodes on their hosting wall segments
+            hosts = self.hosts
+            hostVectors = normalize(points[next[hosts]] - points[hosts])
+            points[attached] = points[hosts] + self.distances[:,None]*hostVectors
+
+        hasPrev = prev >= 0
+        hasNext = next >= 0
+        # <vec1> is a unit vector along the incoming wall segment,
+        # <vec2> is a unit vector along the outgoing wall segment;
+        # for the open ends of a wall part both of them are along the only wall segment
+        vec1 = points - points[prev]
+        vec2 = points[next] - points
+        vec1[~hasPrev] = vec2[~hasPrev]
+        vec2[~hasNext] = vec1[~hasNext]
+        normalize(vec1)
+        normalize(vec2)
+
+        widths = self.widths
+        # widths of the incoming and outgoing wall segments
+        w1 = numpy.where(hasPrev, widths[prev], widths)
+        w2 = numpy.where(hasNext, widths, w1)
+        # <d1> and <d2> are the related signed insets
+        d1 = w1*self.side
+        d2 = w2*self.side
+
+        # normal to <vec1>, i.e. vec1.cross(zAxis)
+        normal = numpy.column_stack((vec1[:,1], -vec1[:,0]))
+        # sine of the angle between <vec1> and <vec2> (negative for a concave corner)
+        sin = cross(vec1, vec2)
+        # cosine of the angle between -<vec1> and <vec2>
+        cos = -numpy.einsum("ij,ij->i", vec1, vec2)
+        isLine = numpy.abs(sin) < zero
+        k = numpy.where(isLine, 0., (d2 + d1*cos)/numpy.where(isLine, 1., sin))
+        opposite = points - d1[:,None]*normal - k[:,None]*vec1
+
+        if len(attached):
+            # the neighbor of an attached corner node is located on the hosting wall segment too
+            _normal = normal[attached]
+            dot = numpy.einsum("ij,ij->i", hostVectors, _normal)
+            valid = numpy.abs(dot) > zero
+            t = -d1[attached]/numpy.where(valid, dot, 1.)
+            opposite[attached[valid]] = points[attached[valid]] + t[valid,None]*hostVectors[valid]
+
+        return points, opposite
+
+    def getOutlines(self, result=None):
+        """
+        Get the outlines of all wall parts
+
+        Args:
+            result (tuple): The result of <self.compute()>; it will be calculated if not given
+
+        Returns:
+            A list with an entry for each wall part: a tuple of two (count, 2) arrays
+            for the control side and the opposite side of the wall part and a boolean
+            variable that defines if the wall part is closed
+        """
+        points, opposite = result or self.compute()
+        return [
+            (points[start:start+count], opposite[start:start+count], closed)
+            for start, count, closed in self.parts
+        ]
+
+    def getFootprint(self, wall, result=None):
+        """
+        Get the footprint polygon of the open wall part <wall> or
+        a tuple of the outer and inner polygons for the closed wall part <wall>
+        """
+        points, opposite = result or self.compute()
+        start, count, closed = self.parts[wall]
+        control = points[start:start+count]
+        opposite = opposite[start:start+count]
+        if closed:
+            return control, opposite
+        return numpy.concatenate((control, opposite[::-1]))
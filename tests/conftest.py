@@ -0,0 +1,68 @@
+import os, sys
+import pytest
+
+# The modules of the add-on import each other as top level packages (e.g. <kernel.wall>),
+# so the directory of the add-on must be in <sys.path>.
+# Only the modules of the package <kernel> can be imported under plain CPython,
+# the tests for the other modules are skipped if <bpy> isn't available.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Op:
+    """
+    A stand-in for the operators calling the methods of <item.wall.Wall>
+    """
+    length = 2.
+    
+    def report(self, type, message):
+        raise AssertionError(message)
+
+
+def addLevels(context, numLevels, height=3.):
+    """
+    Add <numLevels> levels of the given <height> in a new level bundle in the same way as
+    the operator <gui.levels.AddLevel> does
+    """
+    from gui.levels import bundleSymbols
+    from base.levels import invalidateLevelIndex
+    prk = context.scene.prk
+    levels = prk.levels
+    bundles = prk.levelBundles
+    bundleIndex = len(bundles)
+    bundle = bundles.add()
+    bundle.symbol = bundleSymbols[bundleIndex % len(bundleSymbols)]
+    bundle.height = height
+    for _ in range(numLevels):
+        level = levels.add()
+        level.index = len(levels)-1
+        level.name = "Level " + str(level.index)
+        level.bundle = bundleIndex
+    invalidateLevelIndex(context)
+
+
+@pytest.fixture
+def context():
+    """
+    Blender context with an empty scene that has a single level
+
+    The tests using the fixture are skipped under plain CPython. To run them, start pytest
+    from Blender with the add-on enabled, e.g.
+    blender --background --python-expr "import sys, pytest; sys.exit(pytest.main(['tests']))"
+    """
+    bpy = pytest.importorskip("bpy")
+    if not hasattr(bpy.types.Scene, "prk"):
+        pytest.skip("The add-on must be enabled in Blender")
+    context = bpy.context
+    scene = context.scene
+    for o in list(scene.objects):
+        scene.objects.unlink(o)
+        bpy.data.objects.remove(o)
+    prk = scene.prk
+    prk.levels.clear()
+    prk.levelBundles.clear()
+    prk.levelIndex = 0
+    # the caches of the add-on are reset in the same way as after loading a .blend file
+    for handler in list(bpy.app.handlers.load_post):
+        handler(scene)
+    addLevels(context, 1)
+    return context
@@ -0,0 +1,52 @@
+import math
+from kernel.area import getPolygonMetrics, getUvOrigin, getUvs
+
+
+def assertPoint(p1, p2):
+    assert abs(p1[0]-p2[0]) < 1e-9 and abs(p1[1]-p2[1]) < 1e-9
+
+
+# an L-shaped polygon oriented counterclockwise
+polygon = [(0., 0.), (4., 0.), (4., 1.), (1., 1.), (1., 3.), (0., 3.)]
+
+
+def test_metrics_counterclockwise():
+    area, perimeter, centroid = getPolygonMetrics(polygon)
+    assert abs(area - 6.) < 1e-9
+    assert abs(perimeter - 14.) < 1e-9
+    # the centroid of the rectangles 4x1 and 1x2 weighted by their areas
+    assertPoint(centroid, ((4.*2. + 2.*0.5)/6., (4.*0.5 + 2.*2.)/6.))
+
+
+def test_metrics_clockwise():
+    area, perimeter, centroid = getPolygonMetrics(list(reversed(polygon)))
+    assert abs(area + 6.) < 1e-9
+    assert abs(perimeter - 14.) < 1e-9
+    assertPoint(centroid, getPolygonMetrics(polygon)[2])
+
+
+def test_metrics_degenerate():
+    # all points on a line
+    area, perimeter, centroid = getPolygonMetrics([(0., 0.), (1., 1.), (3., 3.)])
+    assert abs(area) < 1e-9
+    assert abs(perimeter - 2.*math.hypot(3., 3.)) < 1e-9
+    assertPoint(centroid, (4./3., 4./3.))
+
+
+def test_uvs():
+    # the polygon rotated by 30 degrees and translated
+    angle = math.radians(30.)
+    cos, sin = math.cos(angle), math.sin(angle)
+    points = [(2. + x*cos - y*sin, -1. + x*sin + y*cos) for x, y in polygon]
+    for p in (points, list(reversed(points))):
+        area = getPolygonMetrics(p)[0]
+        uvOrigin = getUvOrigin(p, area)
+        assertPoint(uvOrigin[:2], p[0])
+        uvs = getUvs(p, uvOrigin)
+        assertPoint(uvs[0], (0., 0.))
+        # the x-axis goes along the first edge of the counterclockwise face
+        nextIndex = 1 if area > 0. else -1
+        assert abs(uvs[nextIndex][1]) < 1e-9 and uvs[nextIndex][0] > 0.
+        # the distances are preserved
+        for uv, q in zip(uvs, p):
+            assert abs(math.hypot(uv[0], uv[1]) - math.hypot(q[0]-p[0][0], q[1]-p[0][1])) < 1e-9
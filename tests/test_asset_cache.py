@@ -0,0 +1,58 @@
+"""
+Tests for <workshop.template.AssetCache>: an asset file is appended only once for all placements
+of the asset and again after the file has been changed.
+Blender with the add-on enabled is needed, see the fixture <context> in conftest.py
+"""
+import os
+
+
+# the number of placements of the asset, e.g. the hinges of a window
+numPlacements = 8
+
+
+def writeAsset(context, filepath):
+    """
+    Write an asset file with a parent Blender object, its child and another root Blender object
+    """
+    import bpy
+    from util.blender import createMeshObject, createEmptyObject, parent_set
+    parent = createEmptyObject("hinge", (0., 0., 0.))
+    child = createMeshObject("hinge_part")
+    parent_set(parent, child)
+    other = createEmptyObject("hinge_other", (1., 0., 0.))
+    objects = (parent, child, other)
+    bpy.data.libraries.write(filepath, set(objects))
+    # the asset is used only from the file
+    for o in objects:
+        context.scene.objects.unlink(o)
+        bpy.data.objects.remove(o)
+
+
+def getPlacements(context, prefix):
+    return [o for o in context.scene.objects if o.name.startswith(prefix)]
+
+
+def test_asset_cache(context, tmp_path):
+    from workshop.template import AssetCache
+    filepath = str(tmp_path / "hinge.blend")
+    writeAsset(context, filepath)
+    cache = AssetCache()
+    placements = [cache.get(filepath) for _ in range(numPlacements)]
+    assert cache.misses == 1 and cache.hits == numPlacements - 1
+    # each placement is a separate hierarchy
+    assert len(set(placements)) == numPlacements
+    for a in placements:
+        assert [o.name.split(".")[0] for o in a.children] == ["hinge_part"]
+        assert not AssetCache.sourceKey in a
+    # the other root is placed too
+    assert len(getPlacements(context, "hinge_other")) == numPlacements
+    # the source Blender objects aren't linked to the scene
+    assert all(not AssetCache.sourceKey in o for o in context.scene.objects)
+
+    # a changed asset file is appended again
+    mtime = os.path.getmtime(filepath) + 10.
+    os.utime(filepath, (mtime, mtime))
+    cache.get(filepath)
+    assert cache.misses == 2 and cache.hits == numPlacements - 1
+    cache.get(filepath)
+    assert cache.misses == 2 and cache.hits == numPlacements
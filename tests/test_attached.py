@@ -0,0 +1,67 @@
+"""
+Tests for the invalidation of <base.attached.AttachedIndex>.
+Blender with the add-on enabled is needed, see the fixture <context> in conftest.py
+"""
+from kernel.plan import makePolyline
+from conftest import Op
+
+
+def createAttachedWall(context):
+    """
+    Create a closed wall and a wall attached to one of its segments
+
+    Returns:
+        A tuple with the model parent and the segment EMPTY of the attached wall
+    """
+    from mathutils import Vector
+    from base import getModelParent
+    from item.wall import Wall, getWallFromEmpty
+    op = Op()
+    polyline = makePolyline([(0., 0.), (4., 0.), (4., 3.), (0., 3.)], closed=True)
+    Wall(context, op).createFromPolylines([polyline])
+    context.scene.update()
+    ws = next(o for o in context.scene.objects if o.get("t") == "ws")
+    # the end of the attached wall is inside the closed wall
+    a = getWallFromEmpty(context, op, ws).startAttachedWall(ws, Vector((2., 1.5, 0.)))
+    context.scene.update()
+    return getModelParent(context), a
+
+
+def getAttached(context):
+    return [o for o in context.scene.objects if o.get("t") == "wa"]
+
+
+def test_index_after_removal(context):
+    import bpy
+    from base.attached import getAttachedIndex
+    from util.blender import createEmptyObject
+    modelParent, a = createAttachedWall(context)
+    index = getAttachedIndex(modelParent)
+    attached = getAttached(context)
+    assert set(index._attached) == set(o["g"] for o in attached)
+    # remove an attached EMPTY and add another Blender object,
+    # so the number of Blender objects stays the same
+    removed = attached[0]
+    g = removed["g"]
+    context.scene.objects.unlink(removed)
+    bpy.data.objects.remove(removed)
+    createEmptyObject("cutter", (0., 0., 0.), True)["t"] = "cutter"
+    context.scene.update()
+    index = getAttachedIndex(modelParent)
+    assert not g in index._attached
+    assert index.isValid()
+
+
+def test_index_after_move(context):
+    from base import getReferencesForAttached
+    from base.attached import getAttachedIndex
+    modelParent, a = createAttachedWall(context)
+    index = getAttachedIndex(modelParent)
+    o = getAttached(context)[0]
+    o1, o2 = getReferencesForAttached(o)
+    # move the attached wall along the wall segment it's attached to
+    a.location += 0.5*(o2.location - o1.location).normalized()
+    context.scene.update()
+    # the position in the index is updated by the handler for <scene_update_post>
+    pos = (o.location - o1.location).length/(o2.location - o1.location).length
+    assert abs(index._attached[o["g"]][1] - pos) < 0.0001
@@ -0,0 +1,175 @@
+"""
+The functions from <kernel.drivers> must give the same values as the long driver expressions
+they replaced. The benchmark evaluates the driver expressions in the same way as Blender does:
+each expression is compiled once and then evaluated with the driver variables on each scene update.
+"""
+import math, random, time
+import pytest
+from kernel.drivers import functions
+
+
+# the expressions built as strings before the functions from <kernel.drivers> were introduced
+def oldInsetExpressions(left):
+    sign1 = "+" if left else "-"
+    sign2 = "-" if left else "+"
+    return (
+        "x" +sign1+ "w2*(y2-y1)/max(d2,0.001)" +sign2+ "(w1-w2*((x1-x0)*(x2-x1)+(y1-y0)*(y2-y1))/max(d1,0.001)/max(d2,0.001)) * (x2-x1) * d1 / ((x1-x0)*(y2-y1)-(y1-y0)*(x2-x1) if abs((x1-x0)*(y2-y1)-(y1-y0)*(x2-x1))>0.001 else 0.001)",
+        "y" +sign1+ "w2*(x1-x2)/max(d2,0.001)" +sign2+ "(w1-w2*((x1-x0)*(x2-x1)+(y1-y0)*(y2-y1))/max(d1,0.001)/max(d2,0.001)) * (y2-y1) * d1 / ((x1-x0)*(y2-y1)-(y1-y0)*(x2-x1) if abs((x1-x0)*(y2-y1)-(y1-y0)*(x2-x1))>0.001 else 0.001)"
+    )
+
+
+def newInsetExpressions(left):
+    sign = "1" if left else "-1"
+    return (
+        "prk_inset_x(x,x0,x1,x2,y0,y1,y2,d1,d2,w1,w2,"+sign+")",
+        "prk_inset_y(y,x0,x1,x2,y0,y1,y2,d1,d2,w1,w2,"+sign+")"
+    )
+
+
+def oldAttachedExpressions(sign):
+    return (
+        "o1x"+sign+"w*do*(e2x-e1x)/( (o2y-o1y)*(e2x-e1x)+(o1x-o2x)*(e2y-e1y) )",
+        "o1y"+sign+"w*do*(e2y-e1y)/( (o2y-o1y)*(e2x-e1x)+(o1x-o2x)*(e2y-e1y) )"
+    )
+
+
+def newAttachedExpressions(sign):
+    return (
+        "prk_attached_x(o1x,o2x,o1y,o2y,e1x,e2x,e1y,e2y,"+sign+"w,do)",
+        "prk_attached_y(o1x,o2x,o1y,o2y,e1x,e2x,e1y,e2y,"+sign+"w,do)"
+    )
+
+
+def oldOpeningExpressions(k, left):
+    sign1 = "+" if left else "-"
+    sign2 = "-" if left else "+"
+    return (
+        "x1+(x2-x1)*("+str(k)+sign1+"wi/2/d)"+sign1+"(y2-y1)*wa/2/d",
+        "y1+(y2-y1)*("+str(k)+sign1+"wi/2/d)"+sign2+"(x2-x1)*wa/2/d"
+    )
+
+
+def newOpeningExpressions(k, left):
+    sign1 = "1" if left else "-1"
+    sign2 = "-1" if left else "1"
+    return (
+        "prk_opening(x1,x2,y1,y2,"+str(k)+",wi,wa,d,"+sign1+","+sign1+")",
+        "prk_opening(y1,y2,x1,x2,"+str(k)+",wi,wa,d,"+sign1+","+sign2+")"
+    )
+
+
+def getInsetVariables(rnd):
+    x0, y0 = rnd.uniform(-10., 10.), rnd.uniform(-10., 10.)
+    x1, y1 = x0 + rnd.uniform(1., 5.), y0 + rnd.uniform(-5., 5.)
+    x2, y2 = x1 + rnd.uniform(-5., 5.), y1 + rnd.uniform(1., 5.)
+    return dict(
+        x=x1, y=y1, x0=x0, x1=x1, x2=x2, y0=y0, y1=y1, y2=y2,
+        d1=math.hypot(x1-x0, y1-y0), d2=math.hypot(x2-x1, y2-y1),
+        w1=rnd.uniform(0.1, 0.5), w2=rnd.uniform(0.1, 0.5)
+    )
+
+
+def getAttachedVariables(rnd):
+    o1x, o1y = rnd.uniform(-10., 10.), rnd.uniform(-10., 10.)
+    o2x, o2y = o1x + rnd.uniform(1., 5.), o1y + rnd.uniform(1., 5.)
+    return dict(
+        o1x=o1x, o1y=o1y, o2x=o2x, o2y=o2y,
+        e1x=o1x - 3., e1y=o1y + rnd.uniform(-1., 1.), e2x=o1x + 3., e2y=o1y + rnd.uniform(-1., 1.),
+        w=rnd.uniform(0.1, 0.5), do=math.hypot(o2x-o1x, o2y-o1y)
+    )
+
+
+def getOpeningVariables(rnd):
+    x1, y1 = rnd.uniform(-10., 10.), rnd.uniform(-10., 10.)
+    x2, y2 = x1 + rnd.uniform(-5., 5.), y1 + rnd.uniform(1., 5.)
+    return dict(
+        x1=x1, y1=y1, x2=x2, y2=y2,
+        wi=rnd.uniform(0.5, 1.5), wa=rnd.uniform(0.1, 0.5), d=math.hypot(x2-x1, y2-y1)
+    )
+
+
+def getDrivers(numDrivers, rnd):
+    """
+    Returns a list of tuples (old expression, new expression, variables) for <numDrivers> drivers
+    """
+    drivers = []
+    while len(drivers) < numDrivers:
+        left = rnd.random() < 0.5
+        variables = getInsetVariables(rnd)
+        drivers.extend(
+            (old, new, variables) for old, new in zip(oldInsetExpressions(left), newInsetExpressions(left))
+        )
+        sign = "+" if left else "-"
+        variables = getAttachedVariables(rnd)
+        drivers.extend(
+            (old, new, variables) for old, new in zip(oldAttachedExpressions(sign), newAttachedExpressions(sign))
+        )
+        k = rnd.uniform(0.2, 0.8)
+        variables = getOpeningVariables(rnd)
+        drivers.extend(
+            (old, new, variables) for old, new in zip(oldOpeningExpressions(k, left), newOpeningExpressions(k, left))
+        )
+    return drivers[:numDrivers]
+
+
+def test_driver_functions():
+    rnd = random.Random(1)
+    for old, new, variables in getDrivers(3000, rnd):
+        assert eval(new, dict(functions), variables) == pytest.approx(eval(old, {}, variables), abs=1e-9)
+
+
+def test_inset_collinear_segments():
+    # the guard for the collinear wall segments is the same as in the old expression
+    variables = dict(x=1., y=0., x0=0., x1=1., x2=2., y0=0., y1=0., y2=0., d1=1., d2=1., w1=0.3, w2=0.3)
+    for old, new in zip(oldInsetExpressions(True), newInsetExpressions(True)):
+        assert eval(new, dict(functions), variables) == pytest.approx(eval(old, {}, variables))
+
+
+def test_benchmark_driver_evaluation():
+    numDrivers = 5000
+    numUpdates = 10
+    drivers = getDrivers(numDrivers, random.Random(2))
+    
+    def evaluate(index, namespace):
+        # Blender compiles the expression of a driver once and evaluates the bytecode on each update
+        compiled = [(compile(d[index], "<driver>", "eval"), d[2]) for d in drivers]
+        start = time.perf_counter()
+        for _ in range(numUpdates):
+            for code, variables in compiled:
+                eval(code, namespace, variables)
+        return (time.perf_counter() - start)/numUpdates
+    
+    oldTime = evaluate(0, {})
+    newTime = evaluate(1, dict(functions))
+    print("\n%s drivers per scene update: %.2f ms for the string expressions, %.2f ms for the shared functions" %
+        (numDrivers, 1000.*oldTime, 1000.*newTime)
+    )
+
+
+def test_benchmark_scene_update(context):
+    """
+    Driver evaluation time per scene update for a wall with many internal corners
+    (each of them has two drivers calling <prk_inset_x> and <prk_inset_y>)
+    """
+    from item.wall import Wall
+    from kernel.plan import makePolyline
+    from conftest import Op
+    
+    numSegments = 200
+    polyline = makePolyline([(i*2., (i % 2)*1.) for i in range(numSegments+1)])
+    Wall(context, Op()).createFromPolylines([polyline])
+    scene = context.scene
+    scene.update()
+    numDrivers = sum(
+        len(o.animation_data.drivers) for o in scene.objects if o.animation_data
+    )
+    # moving a corner EMPTY invalidates the drivers depending on it
+    corners = [o for o in scene.objects if o.get("t") == "wc" and not o.animation_data]
+    numUpdates = 20
+    start = time.perf_counter()
+    for i in range(numUpdates):
+        corners[len(corners)//2].location.x += 0.01
+        scene.update()
+    duration = (time.perf_counter() - start)/numUpdates
+    print("\n%s drivers: %.2f ms per scene update" % (numDrivers, 1000.*duration))
+    assert numDrivers >= 2*(numSegments-1)
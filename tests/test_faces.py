@@ -0,0 +1,68 @@
+import time
+from kernel.faces import findFaces
+
+
+def getGrid(numX, numY, size=1.):
+    """
+    A synthetic floor plan: a grid of <numX> by <numY> square rooms
+
+    Each side of a room gives a half-edge directed counterclockwise around the room,
+    so an internal wall gives two half-edges in the opposite directions
+    and an external wall gives only one half-edge.
+
+    Returns:
+        A tuple (points, edges) as expected by <findFaces(..)>
+    """
+    points = [(i*size, j*size) for j in range(numY+1) for i in range(numX+1)]
+    def index(i, j):
+        return j*(numX+1) + i
+    edges = []
+    for j in range(numY):
+        for i in range(numX):
+            edges.extend((
+                (index(i, j), index(i+1, j)),
+                (index(i+1, j), index(i+1, j+1)),
+                (index(i+1, j+1), index(i, j+1)),
+                (index(i, j+1), index(i, j))
+            ))
+    return points, edges
+
+
+def test_grid():
+    points, edges = getGrid(2, 2)
+    faces = findFaces(points, edges)
+    assert len(faces) == 4
+    assert all(abs(area - 1.) < 1e-9 and len(nodes) == 4 for nodes, area in faces)
+    # each face is a room of the grid
+    assert sorted(sorted(nodes) for nodes, _ in faces) == [[0, 1, 3, 4], [1, 2, 4, 5], [3, 4, 6, 7], [4, 5, 7, 8]]
+
+
+def test_wall_body():
+    # a room with the inner sides of the walls and the outer sides directed clockwise around
+    # the wall bodies, so the only face is the room
+    inner = [(0., 0.), (4., 0.), (4., 3.), (0., 3.)]
+    outer = [(-0.3, -0.3), (4.3, -0.3), (4.3, 3.3), (-0.3, 3.3)]
+    points = inner + outer
+    edges = [(i, (i+1) % 4) for i in range(4)] + [(4 + (i+1) % 4, 4 + i) for i in range(4)]
+    faces = findFaces(points, edges)
+    assert len(faces) == 1
+    nodes, area = faces[0]
+    assert sorted(nodes) == [0, 1, 2, 3] and abs(area - 12.) < 1e-9
+
+
+def test_wrong_direction():
+    # the face would go along the edge 2-1 in the direction opposite to the given one
+    points = [(0., 0.), (1., 0.), (1., 1.), (0., 1.)]
+    edges = [(0, 1), (2, 1), (2, 3), (3, 0)]
+    assert findFaces(points, edges) == []
+
+
+def test_benchmark_grid():
+    points, edges = getGrid(60, 60)
+    numWalls = len(set((a, b) if a < b else (b, a) for a, b in edges))
+    start = time.perf_counter()
+    faces = findFaces(points, edges)
+    duration = time.perf_counter() - start
+    print("\n%s wall segments, %s rooms: %.3f s" % (numWalls, len(faces), duration))
+    assert len(faces) == 3600
+    assert duration < 1.
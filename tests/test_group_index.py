@@ -0,0 +1,69 @@
+"""
+Micro-benchmark of <util.blender.GroupIndex> against a scan of all vertices for each vertex group
+on a mesh like a merged window mesh with hundreds of "e_*" vertex groups.
+Blender with the add-on enabled is needed, see the fixture <context> in conftest.py
+"""
+import time
+
+
+# the number of nodes and the number of edges from each node
+numNodes = 50
+numEdgesPerNode = 4
+# the number of vertices of the open edge loop for each "e_*" vertex group
+numLoopVerts = 8
+
+
+def createMergedObject(context):
+    """
+    Create a mesh object with the "e_<vid1>_<vid2>" vertex group for each edge of each node
+    """
+    import bmesh
+    from util.blender import createMeshObject, assignGroupToVerts
+    o = createMeshObject("merged")
+    bm = bmesh.new()
+    layer = bm.verts.layers.deform.new()
+    for vid1 in range(numNodes):
+        for k in range(numEdgesPerNode):
+            vid2 = (vid1 + k + 1) % numNodes
+            verts = [bm.verts.new((vid1, k, i)) for i in range(numLoopVerts)]
+            for i in range(numLoopVerts-1):
+                bm.edges.new((verts[i], verts[i+1]))
+            assignGroupToVerts(o, layer, "e_%s_%s" % (vid1, vid2), *verts)
+    bm.to_mesh(o.data)
+    bm.free()
+    return o
+
+
+def getVertsByScan(o, bm, group):
+    """
+    The vertices of the vertex group as <util.blender.getVertsForVertexGroup(..)> found them
+    before <GroupIndex>
+    """
+    layer = bm.verts.layers.deform[0]
+    groupIndex = o.vertex_groups[group].index
+    return [v for v in bm.verts if groupIndex in v[layer]]
+
+
+def test_benchmark_group_index(context):
+    from util.blender import getBmesh, GroupIndex
+    o = createMergedObject(context)
+    bm = getBmesh(o)
+    groups = [g.name for g in o.vertex_groups if g.name.startswith("e_")]
+
+    start = time.perf_counter()
+    scanned = [getVertsByScan(o, bm, g) for g in groups]
+    scanTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = GroupIndex(bm, o, [o.vertex_groups[g].index for g in groups])
+    indexed = [index.get(g) for g in groups]
+    indexTime = time.perf_counter() - start
+
+    print("\n%s \"e_*\" vertex groups, %s vertices: %.2f ms with a scan for each group, %.2f ms with GroupIndex" %
+        (len(groups), len(bm.verts), 1000.*scanTime, 1000.*indexTime)
+    )
+    bm.free()
+    assert len(groups) == numNodes*numEdgesPerNode
+    assert all(len(verts) == numLoopVerts for verts in indexed)
+    assert indexed == scanned
+    assert indexTime < scanTime
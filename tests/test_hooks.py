@@ -0,0 +1,73 @@
+"""
+Regression test for <util.blender.addHookModifiers(..)>: the HOOK modifiers created without
+switching to the EDIT mode must deform the vertices in the same way as the ones
+reset by <bpy.ops.object.hook_reset(..)>.
+Blender with the add-on enabled is needed, see the fixture <context> in conftest.py
+"""
+import math
+
+
+def createObject(context, name, parent):
+    from util.blender import createMeshObject, assignGroupToVerts, getBmesh, parent_set
+    o = createMeshObject(name, (1., -2., 0.5))
+    o.rotation_euler = (0.1, 0.2, math.radians(30.))
+    o.scale = (1., 2., 0.5)
+    bm = getBmesh(o)
+    layer = bm.verts.layers.deform.new()
+    verts = [bm.verts.new(co) for co in ((0., 0., 0.), (1., 0., 0.), (1., 1., 0.), (0., 1., 1.))]
+    bm.faces.new(verts)
+    # the vertex group for the HOOK modifier
+    assignGroupToVerts(o, layer, "g", verts[2], verts[3])
+    bm.to_mesh(o.data)
+    bm.free()
+    parent_set(parent, o)
+    return o
+
+
+def getDeformedVerts(context, o):
+    import bpy
+    mesh = o.to_mesh(context.scene, True, 'PREVIEW')
+    coords = [o.matrix_world * v.co for v in mesh.vertices]
+    bpy.data.meshes.remove(mesh)
+    return coords
+
+
+def test_hook_matrix_inverse(context):
+    import bpy
+    from util.blender import createEmptyObject, addHookModifiers, parent_set
+    
+    parent = createEmptyObject("parent", (3., 1., 0.), False)
+    parent.rotation_euler = (0., 0., math.radians(-45.))
+    hookParent = createEmptyObject("hook_parent", (-1., 0., 2.), False)
+    hookParent.scale = (2., 2., 2.)
+    hookObj = createEmptyObject("hook", (0.5, 0.5, 0.), False)
+    hookObj.rotation_euler = (0., math.radians(20.), 0.)
+    parent_set(hookParent, hookObj)
+    
+    # no scene update is needed for addHookModifiers(..)
+    o1 = createObject(context, "o1", parent)
+    addHookModifiers(o1, (("g", hookObj, "g"),))
+    
+    # the reference: the HOOK modifier reset with the operator in the EDIT mode
+    o2 = createObject(context, "o2", parent)
+    m = o2.modifiers.new(name="g", type='HOOK')
+    m.vertex_group = "g"
+    m.object = hookObj
+    context.scene.update()
+    context.scene.objects.active = o2
+    bpy.ops.object.mode_set(mode='EDIT')
+    bpy.ops.object.hook_reset(modifier="g")
+    bpy.ops.object.mode_set(mode='OBJECT')
+    
+    def compare():
+        context.scene.update()
+        for v1, v2 in zip(getDeformedVerts(context, o1), getDeformedVerts(context, o2)):
+            assert (v1 - v2).length < 1e-5
+    
+    # the vertices aren't moved right after the HOOK modifiers are created
+    compare()
+    # move the hook object and its parent
+    hookObj.location = (1., -0.5, 0.3)
+    hookObj.rotation_euler = (0.3, 0., math.radians(60.))
+    hookParent.location.z += 1.
+    compare()
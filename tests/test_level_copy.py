@@ -0,0 +1,48 @@
+"""
+Tests for the operator <gui.levels.CopyLevel>: the tops of the walls of the copied levels must be
+hooked to the level parent above each level.
+Blender with the add-on enabled is needed, see the fixture <context> in conftest.py
+"""
+from kernel.plan import makePolyline
+from conftest import Op
+
+
+def getTopZ(context, o):
+    import bpy
+    mesh = o.to_mesh(context.scene, True, 'PREVIEW')
+    z = max((o.matrix_world * v.co).z for v in mesh.vertices)
+    bpy.data.meshes.remove(mesh)
+    return z
+
+
+def test_copy_top_level(context):
+    import bpy
+    from base import getModelParent, getLevelIndex, getLevelObjects, registry
+    from item.level import getLevelParent
+    from item.wall import Wall
+    numCopies = 2
+    # the walls are created on the only level, so their tops are hooked to the EMPTY for the total height
+    polyline = makePolyline([(0., 0.), (4., 0.), (4., 3.), (0., 3.)], closed=True)
+    Wall(context, Op()).createFromPolylines([polyline])
+    prk = context.scene.prk
+    prk.numNewLevels = numCopies
+    assert bpy.ops.prk.level_copy('INVOKE_DEFAULT') == {'FINISHED'}
+    context.scene.update()
+
+    assert len(prk.levels) == numCopies + 1
+    modelParent = getModelParent(context)
+    hEmpty = registry.getChild(modelParent, "h")
+    index = getLevelIndex(context)
+    for position in range(numCopies+1):
+        levelParent = getLevelParent(context, modelParent, position)
+        nextLevelParent = getLevelParent(context, modelParent, position+1)
+        # only the top level keeps the EMPTY for the total height
+        assert (nextLevelParent == hEmpty) == (position == numCopies)
+        walls = [
+            o for o in getLevelObjects(context, levelParent)
+            if o.type == 'MESH' and "t" in o.modifiers
+        ]
+        assert walls
+        for o in walls:
+            assert o.modifiers["t"].object == nextLevelParent
+            assert abs(getTopZ(context, o) - index.getZ(position+1)) < 0.0001
@@ -0,0 +1,108 @@
+import time
+from kernel.levels import getElevations, getChangedOffsets
+
+
+def test_elevations():
+    assert getElevations([3., 2.5, 4.]) == [0., 3., 5.5, 9.5]
+    assert getElevations([]) == [0.]
+
+
+def test_changed_offsets():
+    current = [0., 3., 6., 9.]
+    # the height of the second level is changed
+    elevations = getElevations([3., 3.5, 3.])
+    assert getChangedOffsets(current, elevations) == [(2, 6.5), (3, 9.5)]
+    # the missing elevations are skipped
+    assert getChangedOffsets([None, 3., None, 9.], elevations) == [(3, 9.5)]
+    # nothing has been changed
+    assert getChangedOffsets(current, getElevations([3., 3., 3.])) == []
+
+
+def test_benchmark_restack():
+    numLevels = 100
+    numUpdates = 1000
+    heights = [3.]*numLevels
+    current = getElevations(heights)
+    start = time.perf_counter()
+    numChanged = 0
+    for i in range(numUpdates):
+        # change the height of a level in the upper half of the tower back and forth
+        heights[numLevels//2 + i % (numLevels//2)] += 0.5 if i % 2 == 0 else -0.5
+        elevations = getElevations(heights)
+        changed = getChangedOffsets(current, elevations)
+        for position, z in changed:
+            current[position] = z
+        numChanged += len(changed)
+    duration = time.perf_counter() - start
+    print("\n%s levels, %s height updates: %.2f ms per update, %.1f elevations changed per update" %
+        (numLevels, numUpdates, 1000.*duration/numUpdates, numChanged/numUpdates)
+    )
+    # only the elevations above the changed level are updated
+    assert numChanged < numUpdates*(numLevels//2 + 1)
+    assert current == elevations
+    assert duration/numUpdates < 0.001
+
+
+def test_benchmark_restack_scene(context):
+    from conftest import addLevels
+    from base import registry
+    from gui.levels import restackLevels
+    from item.level import getLevelParent
+    from item.wall import Wall
+    numLevels = 100
+    # the single level of the <context> and 99 levels in a second bundle
+    addLevels(context, numLevels-1)
+    bundles = context.scene.prk.levelBundles
+    modelParent = Wall(context, None).createModelParent((0., 0., 0.))
+    # the level parents and the EMPTY for the total height
+    for position in range(numLevels+1):
+        getLevelParent(context, modelParent, position)
+    assert restackLevels(context) == 0
+
+    start = time.perf_counter()
+    # the update callback <gui.levels.updateHeight(..)> calls <restackLevels(..)>
+    bundles[1].height = 3.5
+    duration = time.perf_counter() - start
+    print("\n%s levels restacked in %.2f ms" % (numLevels, 1000.*duration))
+    h = registry.getChild(modelParent, "h")
+    assert abs(h.location.z - (3. + 3.5*(numLevels-1))) < 0.0001
+    # the level parents are already in their positions
+    assert restackLevels(context) == 0
+
+
+def test_level_index_bundle(context):
+    from conftest import addLevels
+    from base import getLevelIndex
+    addLevels(context, 2, 4.)
+    levels = context.scene.prk.levels
+    assert getLevelIndex(context).getTotalHeight() == 11.
+    # the index is invalidated by the update callback of the bundle of a level
+    levels[1].bundle = 0
+    index = getLevelIndex(context)
+    assert index.getHeight(1) == 3. and index.getTotalHeight() == 10.
+
+
+def test_level_objects_reparent(context):
+    from conftest import addLevels
+    from base import getLevelObjects
+    from item.level import getLevelParent
+    from item.wall import Wall
+    from util.blender import createEmptyObject, parent_set
+    addLevels(context, 1)
+    modelParent = Wall(context, None).createModelParent((0., 0., 0.))
+    level0 = getLevelParent(context, modelParent, 0)
+    level1 = getLevelParent(context, modelParent, 1)
+    o = createEmptyObject("test", (0., 0., 0.), True)
+    parent_set(level0, o)
+    assert o in getLevelObjects(context, level0)
+    # reparenting with <parent_set(..)> invalidates the lists
+    parent_set(level1, o)
+    assert not o in getLevelObjects(context, level0)
+    assert o in getLevelObjects(context, level1)
+    # reparenting without <parent_set(..)>, e.g. in the GUI, is detected by the handler
+    # for <scene_update_post>; the list of the new level parent is queried first,
+    # since it doesn't contain <o> and can't be validated on access
+    o.parent = level0
+    context.scene.update()
+    assert o in getLevelObjects(context, level0)
+    assert not o in getLevelObjects(context, level1)
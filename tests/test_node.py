@@ -0,0 +1,104 @@
+import math
+import pytest
+from kernel.node import getAngles, getNeighborEdges, getEdgeIndex
+
+try:
+    from mathutils import Vector
+except ImportError:
+    class Vector(tuple):
+        """
+        A minimal stand-in for <mathutils.Vector> under plain CPython
+        """
+        def dot(self, other):
+            return sum(a*b for a, b in zip(self, other))
+
+        def cross(self, other):
+            return Vector((
+                self[1]*other[2] - self[2]*other[1],
+                self[2]*other[0] - self[0]*other[2],
+                self[0]*other[1] - self[1]*other[0]
+            ))
+
+
+# the normal to the template vertex
+n = Vector((0., 0., 1.))
+
+
+def getVector(degrees):
+    angle = math.radians(degrees)
+    return Vector((math.cos(angle), math.sin(angle), 0.))
+
+
+def getEdges(*degrees):
+    """
+    Stub entries for the edges of a node as in <workshop.node.Node.edges>
+    with the unit vector along the edge and the edge position instead of the opposite BMVert
+    """
+    return [[getVector(d), i] for i, d in enumerate(degrees)]
+
+
+# the polar angles of the edges counted counterclockwise from the base edge for each node type;
+# the base edge isn't aligned with the x-axis to have the angles relative to the base edge
+nodes = {
+    "L": (30., 120.),
+    "L concave": (30., 300.),
+    "T": (30., 120., 210.),
+    "Y": (30., 150., 270.),
+    "cross": (30., 120., 210., 300.),
+    "X": (30., 90., 210., 270.)
+}
+
+
+@pytest.mark.parametrize("name", sorted(nodes))
+def test_angles(name):
+    degrees = nodes[name]
+    angles = getAngles(n, getEdges(*degrees))
+    assert angles[0] == 0.
+    for angle, d in zip(angles, degrees):
+        assert abs(math.degrees(angle) - (d - degrees[0])) < 1e-9
+    # the angles increase monotonically
+    assert all(a1 < a2 for a1, a2 in zip(angles, angles[1:]))
+
+
+@pytest.mark.parametrize("name", sorted(nodes))
+def test_neighbor_edges(name):
+    degrees = nodes[name]
+    edges = getEdges(*degrees)
+    angles = getAngles(n, edges)
+    numEdges = len(edges)
+    for i in range(numEdges):
+        # the bisector between the edges <i> and <i+1>, the last one is
+        # the wrap-around between the last edge and the base edge
+        d1 = degrees[i]
+        d2 = degrees[i+1] if i+1 < numEdges else degrees[0] + 360.
+        e1, e2 = getNeighborEdges(n, edges, angles, getVector((d1+d2)/2.))
+        assert e1 is edges[i] and e2 is edges[(i+1) % numEdges]
+    # a vector exactly along an edge is located between the edge and the next one
+    for i, d in enumerate(degrees):
+        e1, e2 = getNeighborEdges(n, edges, angles, edges[i][0])
+        assert e1 is edges[i] and e2 is edges[(i+1) % numEdges]
+    # a vector just before the base edge going counterclockwise
+    e1, e2 = getNeighborEdges(n, edges, angles, getVector(degrees[0] - 0.001))
+    assert e1 is edges[-1] and e2 is edges[0]
+    # the vectors don't have to be normalized
+    vec = Vector([3.*c for c in getVector((degrees[0] + degrees[1])/2.)])
+    e1, e2 = getNeighborEdges(n, edges, angles, vec)
+    assert e1 is edges[0] and e2 is edges[1]
+
+
+@pytest.mark.parametrize("name", sorted(nodes))
+def test_edge_index(name):
+    degrees = nodes[name]
+    edges = getEdges(*degrees)
+    angles = getAngles(n, edges)
+    # the exact match
+    for i, d in enumerate(degrees):
+        assert getEdgeIndex(n, edges, angles, getVector(d)) == i
+    # a match within the tolerance on both sides of each edge, including the base edge
+    # approached from the other side, i.e. the wrap-around
+    for i, d in enumerate(degrees):
+        assert getEdgeIndex(n, edges, angles, getVector(d - 0.1)) == i
+        assert getEdgeIndex(n, edges, angles, getVector(d + 0.1)) == i
+    # no match between the edges
+    for i, d in enumerate(degrees):
+        assert getEdgeIndex(n, edges, angles, getVector(d + 5.)) is None
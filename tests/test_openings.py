@@ -0,0 +1,177 @@
+"""
+Tests for cutting the wall parts with the openings: the single cutter mesh of <item.cutter.Cutter>
+and the holes inserted directly into the wall mesh by <item.cutout.Cutouts>.
+Blender with the add-on enabled is needed, see the fixture <context> in conftest.py
+"""
+from kernel.plan import makePolyline
+from conftest import Op
+
+
+# the length of the wall segment
+length = 6.
+# the size of the openings
+width = 1.
+height = 1.
+# the z-coordinate of the openings
+z = 0.75
+
+
+def createWall(context):
+    """
+    Create a wall with a single wall segment along the x-axis
+
+    Returns:
+        A tuple with the wall and the corner EMPTY ending the wall segment
+    """
+    from item.wall import Wall, getWallFromEmpty
+    op = Op()
+    Wall(context, op).createFromPolylines([makePolyline([(0., 0.), (length, 0.)])])
+    context.scene.update()
+    ws = next(o for o in context.scene.objects if o.get("t") == "ws")
+    wall = getWallFromEmpty(context, op, ws)
+    return wall, wall.getCornerEmpty(ws)
+
+
+def createOpening(context, name):
+    """
+    Create a window with a box envelope like the one of a window asset.
+    The vertices of the envelope at the end of the window are controlled by the EMPTY for its width.
+    """
+    import bmesh
+    from util.blender import createMeshObject, createEmptyObject, assignGroupToVerts, addHookModifiers, parent_set
+    obj = createEmptyObject(name, (0., 0., 0.))
+    obj["t"] = "window"
+    widthEmpty = createEmptyObject(name + "_width", (width, 0., 0.), True)
+    widthEmpty["t"] = "width"
+    intEmpty = createEmptyObject(name + "_int", (0., 0., 0.), True)
+    intEmpty["t"] = "int"
+    extEmpty = createEmptyObject(name + "_ext", (0., 0., 0.), True)
+    extEmpty["t"] = "ext"
+    env = createMeshObject(name + "_env")
+    env["t"] = "env"
+    bm = bmesh.new()
+    layer = bm.verts.layers.deform.new()
+    # the envelope is thicker than the wall
+    verts = [bm.verts.new((x, y, _z)) for x in (0., width) for y in (-1., 1.) for _z in (0., height)]
+    bmesh.ops.convex_hull(bm, input=verts)
+    assignGroupToVerts(env, layer, "width", *[v for v in verts if v.co.x > 0.])
+    bm.to_mesh(env.data)
+    bm.free()
+    parent_set(obj, widthEmpty, intEmpty, extEmpty, env)
+    context.scene.update()
+    addHookModifiers(env, (("width", widthEmpty, "width"),))
+    return obj
+
+
+def insertOpening(context, wall, o2, name, k):
+    """
+    Insert a window into the wall segment ending with the corner EMPTY <o2>
+    at the ratio <k> of the length of the wall segment
+    """
+    from item.window import Window
+    obj = createOpening(context, name)
+    wall.inheritLevelFrom = None
+    wall.insert(o2, obj, Window, k=k, z=z)
+    context.scene.update()
+    item = Window(context, Op())
+    item.init(obj)
+    return item
+
+
+def getCoords(context, o):
+    """
+    Returns the sorted world coordinates of the vertices of the evaluated mesh of <o>
+    """
+    import bpy
+    mesh = o.to_mesh(context.scene, True, 'PREVIEW')
+    coords = sorted(tuple(round(c, 4) for c in o.matrix_world * v.co) for v in mesh.vertices)
+    bpy.data.meshes.remove(mesh)
+    return coords
+
+
+def getCutter(wall):
+    from item.cutter import Cutter
+    return Cutter(wall.mesh, False).cutter
+
+
+def test_cutter_follows_opening(context):
+    context.scene.prk.cutoutOpenings = False
+    wall, o2 = createWall(context)
+    item = insertOpening(context, wall, o2, "window", 0.5)
+    cutter = getCutter(wall)
+    assert cutter
+    assert getCoords(context, cutter) == getCoords(context, item.envelope)
+    # move the opening up
+    item.obj.location.z += 0.3
+    context.scene.update()
+    assert getCoords(context, cutter) == getCoords(context, item.envelope)
+    # resize the opening
+    item.width.location.x += 0.5
+    context.scene.update()
+    coords = getCoords(context, cutter)
+    assert coords == getCoords(context, item.envelope)
+    assert abs(max(c[0] for c in coords) - min(c[0] for c in coords) - width - 0.5) < 0.001
+
+
+def test_cutter_cleanup(context):
+    context.scene.prk.cutoutOpenings = False
+    wall, o2 = createWall(context)
+    item1 = insertOpening(context, wall, o2, "window1", 0.3)
+    item2 = insertOpening(context, wall, o2, "window2", 0.7)
+    cutter = getCutter(wall)
+    name = item1.envelope.name
+    # delete the first opening
+    for o in (item1.obj,) + tuple(item1.obj.children):
+        context.scene.objects.unlink(o)
+    context.scene.update()
+    # the envelope of the deleted opening is removed from the cutter by the handler for <scene_update_post>
+    assert not any(g.name.split("#")[0] == name for g in cutter.vertex_groups)
+    assert not any(m.name.split("#")[0] == name for m in cutter.modifiers)
+    assert getCoords(context, cutter) == getCoords(context, item2.envelope)
+
+
+def test_cutout_holes_order(context):
+    from mathutils import Vector
+    import bpy
+    context.scene.prk.cutoutOpenings = True
+    wall, o2 = createWall(context)
+    # the openings are inserted not in the order along the wall segment
+    items = [insertOpening(context, wall, o2, "window%s" % i, k) for i, k in enumerate((0.75, 0.2, 0.45))]
+    assert all("cutout" in item.obj for item in items)
+    assert not getCutter(wall)
+    obj = wall.mesh
+    mesh = obj.to_mesh(context.scene, True, 'PREVIEW')
+    zs = [v.co.z for v in mesh.vertices]
+    wallHeight = max(zs) - min(zs)
+    # the middle of the wall
+    center = sum((v.co for v in mesh.vertices), Vector((0., 0., 0.)))/len(mesh.vertices)
+    sideArea = 0.
+    for p in mesh.polygons:
+        if abs(p.normal.y) > 0.99:
+            # the faces of the sides of the wall segment must face outwards,
+            # a hole out of order gives a face between the holes turned inside out
+            assert (p.center.y - center.y)*p.normal.y > 0.
+            sideArea += p.area
+    bpy.data.meshes.remove(mesh)
+    # overlapping faces between the holes would give a larger area
+    assert abs(sideArea - 2.*(length*wallHeight - len(items)*width*height)) < 0.001
+
+
+def test_cutout_fallback(context):
+    context.scene.prk.cutoutOpenings = True
+    wall, o2 = createWall(context)
+    item1 = insertOpening(context, wall, o2, "window1", 0.5)
+    assert "cutout" in item1.obj
+    # an opening overlapping with the hole of <item1>
+    item2 = insertOpening(context, wall, o2, "window2", 0.55)
+    # an opening out of the wall segment
+    item3 = insertOpening(context, wall, o2, "window3", 0.)
+    # exactly one of the overlapping openings keeps its hole
+    assert ("cutout" in item1.obj) != ("cutout" in item2.obj)
+    assert not "cutout" in item3.obj
+    # the other openings are cut by the cutter
+    cutter = getCutter(wall)
+    assert cutter
+    groups = set(g.name for g in cutter.vertex_groups)
+    for item in (item1, item2, item3):
+        assert (item.envelope.name in groups) != ("cutout" in item.obj)
@@ -0,0 +1,75 @@
+import json
+from kernel.plan import makePolyline, readPolylines, getOpeningPositions
+
+
+def test_make_polyline_closed():
+    polyline = makePolyline([(0, 0), (4, 0), (4, 3), (0, 0)], [0.3, 0.2, 0.1, None])
+    assert polyline["closed"]
+    assert polyline["points"] == [(0., 0.), (4., 0.), (4., 3.)]
+    # a width for each wall segment of the closed polyline
+    assert polyline["widths"] == [0.3, 0.2, 0.1]
+
+
+def test_make_polyline_missing_width():
+    # the default width is used for all wall segments if a width is missing
+    assert makePolyline([(0, 0), (4, 0), (4, 3)], [0.3, None, 0.2])["widths"] is None
+
+
+def test_read_csv(tmp_path):
+    filepath = tmp_path / "plan.csv"
+    filepath.write_text(
+        "id,x,y,width\n"
+        "a,0,0,0.3\n"
+        "a,5,0,0.2\n"
+        "a,5,4,\n"
+        "# a comment\n"
+        "b,0,0\n"
+        "b,3,0\n"
+        "b,3,3\n"
+        "b,0,0\n"
+    )
+    a, b = readPolylines(str(filepath))
+    assert a == {"points": [(0., 0.), (5., 0.), (5., 4.)], "widths": [0.3, 0.2], "closed": False}
+    assert b["closed"] and len(b["points"]) == 3 and b["widths"] is None
+
+
+def test_read_json(tmp_path):
+    filepath = tmp_path / "plan.json"
+    filepath.write_text(json.dumps({"walls": [
+        [[0, 0], [2, 0]],
+        {"points": [[0, 0], [1, 0], [1, 1]], "closed": True, "width": 0.25}
+    ]}))
+    a, b = readPolylines(str(filepath))
+    assert not a["closed"] and a["widths"] is None
+    assert b["closed"] and b["widths"] == [0.25]*3
+
+
+def test_opening_positions():
+    # 3 openings centered on the wall segment
+    assert getOpeningPositions(10., 1., 3., margin=0.5) == [2., 5., 8.]
+
+
+def test_opening_positions_occupied():
+    # the opening in the middle overlaps with the occupied interval
+    assert getOpeningPositions(10., 1., 3., [(4.5, 5.5)], 0.5) == [2., 8.]
+    # the opening at 8. is exactly at the margin from the occupied interval
+    assert getOpeningPositions(10., 1., 3., [(6.2, 7.)], 0.5) == [2., 5., 8.]
+    # the opening at 8. is closer than the margin to the occupied interval
+    assert getOpeningPositions(10., 1., 3., [(6., 7.1)], 0.5) == [2., 5.]
+
+
+def test_opening_positions_short_segment():
+    # no place for the opening with the margins from both ends of the wall segment
+    assert getOpeningPositions(1.5, 1., 3., margin=0.5) == []
+    # exactly one opening fits
+    assert getOpeningPositions(2., 1., 3., margin=0.5) == [1.]
+
+
+def test_opening_positions_small_spacing():
+    width = 1.
+    margin = 0.5
+    positions = getOpeningPositions(10., width, 0.1, margin=margin)
+    # the spacing is increased to <width> + <margin>
+    assert len(positions) == 6
+    assert all(abs(p2 - p1 - width - margin) < 1e-9 for p1, p2 in zip(positions, positions[1:]))
+    assert positions[0] - width/2. >= margin and positions[-1] + width/2. <= 10. - margin
@@ -0,0 +1,73 @@
+import time
+import numpy
+from kernel.projection import TransverseMercator
+
+
+def getPoints(numPoints, lat, lon, extent=0.05):
+    """
+    Random geographic points within <extent> degrees from (<lat>, <lon>)
+
+    Returns:
+        A tuple of NumPy arrays (lat, lon)
+    """
+    rng = numpy.random.RandomState(0)
+    return (
+        lat + extent*(2.*rng.random_sample(numPoints) - 1.),
+        lon + extent*(2.*rng.random_sample(numPoints) - 1.)
+    )
+
+
+def test_array_matches_scalar():
+    projection = TransverseMercator(lat=52.52, lon=13.405)
+    lat, lon = getPoints(100, projection.lat, projection.lon)
+    x, y = projection.fromGeographicArray(lat, lon)
+    for i in range(len(lat)):
+        _x, _y = projection.fromGeographic(lat[i], lon[i])
+        assert abs(x[i] - _x) < 1e-6 and abs(y[i] - _y) < 1e-6
+    _lat, _lon = projection.toGeographicArray(x, y)
+    for i in range(len(lat)):
+        lat_, lon_ = projection.toGeographic(x[i], y[i])
+        assert abs(_lat[i] - lat_) < 1e-12 and abs(_lon[i] - lon_) < 1e-12
+
+
+def test_round_trip():
+    for lat, lon in ((0., 0.), (52.52, 13.405), (-33.87, 151.21), (64.15, -21.94)):
+        projection = TransverseMercator(lat=lat, lon=lon)
+        _lat, _lon = getPoints(1000, lat, lon)
+        x, y = projection.fromGeographicArray(_lat, _lon)
+        lat_, lon_ = projection.toGeographicArray(x, y)
+        # 1e-9 degrees is about 0.1 mm
+        assert numpy.abs(lat_ - _lat).max() < 1e-9
+        assert numpy.abs(lon_ - _lon).max() < 1e-9
+
+
+def test_origin():
+    projection = TransverseMercator(lat=52.52, lon=13.405)
+    x, y = projection.fromGeographicArray(numpy.array([52.52]), numpy.array([13.405]))
+    assert abs(x[0]) < 1e-6 and abs(y[0]) < 1e-6
+
+
+def test_benchmark_throughput():
+    numPoints = 1000000
+    projection = TransverseMercator(lat=52.52, lon=13.405)
+    lat, lon = getPoints(numPoints, projection.lat, projection.lon)
+
+    start = time.perf_counter()
+    x, y = projection.fromGeographicArray(lat, lon)
+    durationFrom = time.perf_counter() - start
+
+    start = time.perf_counter()
+    projection.toGeographicArray(x, y)
+    durationTo = time.perf_counter() - start
+
+    # the scalar version on a part of the points for the comparison
+    numScalar = 20000
+    start = time.perf_counter()
+    for i in range(numScalar):
+        projection.fromGeographic(lat[i], lon[i])
+    durationScalar = (time.perf_counter() - start)*numPoints/numScalar
+
+    print("\nfromGeographicArray: %.2e points/s, toGeographicArray: %.2e points/s, fromGeographic: %.2e points/s" %
+        (numPoints/durationFrom, numPoints/durationTo, numPoints/durationScalar)
+    )
+    assert durationFrom < durationScalar
@@ -0,0 +1,40 @@
+"""
+Tests for the invalidation of <base.registry.Registry>.
+Blender with the add-on enabled is needed, see the fixture <context> in conftest.py
+"""
+
+
+def createTypedEmpty(name, t):
+    from util.blender import createEmptyObject
+    o = createEmptyObject(name, (0., 0., 0.), True)
+    o["t"] = t
+    return o
+
+
+def test_add_after_unknown_objects(context):
+    from base import registry
+    # build the registry
+    registry.getObjects("window")
+    # a Blender object created without <registry.add(..)>, e.g. a linked duplicate
+    window = createTypedEmpty("window", "window")
+    # <registry.add(..)> mustn't mark the registry as up to date because of <window>
+    cutter = createTypedEmpty("cutter", "cutter")
+    registry.add(cutter)
+    assert window in registry.getObjects("window")
+    assert cutter in registry.getObjects("cutter")
+
+
+def test_remove_and_add(context):
+    import bpy
+    from base import registry
+    door = createTypedEmpty("door", "door")
+    assert registry.getObjects("door") == [door]
+    # remove a Blender object and add another one without <registry.add(..)>,
+    # so the number of Blender objects stays the same
+    context.scene.objects.unlink(door)
+    bpy.data.objects.remove(door)
+    window = createTypedEmpty("window", "window")
+    # the new Blender object is detected by the handler for <scene_update_post>
+    context.scene.update()
+    assert registry.getObjects("window") == [window]
+    assert not registry.getObjects("door")
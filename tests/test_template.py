@@ -0,0 +1,68 @@
+"""
+Benchmark of the index of vertex ids of <workshop.template.Template> against
+the lookup of the vertex group for each call of <Template.getVid(..)>.
+Blender with the add-on enabled is needed, see the fixture <context> in conftest.py
+"""
+import time
+
+
+numX = 20
+numY = 10
+numCalls = 20
+
+
+def createTemplateObject(context):
+    """
+    Create a mesh object with <numX>*<numY> vertices, each vertex has its own vertex group
+    """
+    import bmesh
+    from util.blender import createMeshObject, createEmptyObject, assignGroupToVerts, parent_set
+    p = createEmptyObject("template_parent", (0., 0., 0.))
+    p["vert_counter"] = numX*numY + 1
+    o = createMeshObject("template")
+    bm = bmesh.new()
+    layer = bm.verts.layers.deform.new()
+    verts = [bm.verts.new((i, j, 0.)) for j in range(numY) for i in range(numX)]
+    for j in range(numY-1):
+        for i in range(numX-1):
+            bm.faces.new((
+                verts[j*numX+i], verts[j*numX+i+1], verts[(j+1)*numX+i+1], verts[(j+1)*numX+i]
+            ))
+    for i, v in enumerate(verts):
+        assignGroupToVerts(o, layer, str(i+1), v)
+    bm.to_mesh(o.data)
+    bm.free()
+    parent_set(p, o)
+    return o
+
+
+def getVidFromGroup(template, v):
+    """
+    The vertex id out of the vertex group as <Template.getVid(..)> did before the index of vertex ids
+    """
+    template.setVid(v)
+    groupIndex = v[template.layer].keys()[0]
+    return template.o.vertex_groups[groupIndex].name
+
+
+def test_benchmark_vid_index(context):
+    from workshop.template import Template
+    o = createTemplateObject(context)
+
+    start = time.perf_counter()
+    template = Template(o, skipInit=True)
+    verts = list(template.bm.verts)
+    for _ in range(numCalls):
+        vids = [template.getVid(v) for v in verts]
+    indexTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(numCalls):
+        _vids = [getVidFromGroup(template, v) for v in verts]
+    groupTime = time.perf_counter() - start
+
+    print("\n%s vertices, %s calls of getVid(..) for each vertex: %.2f ms with the index, %.2f ms without it" %
+        (len(verts), numCalls, 1000.*indexTime, 1000.*groupTime)
+    )
+    assert vids == _vids == [str(i+1) for i in range(numX*numY)]
+    assert indexTime < groupTime
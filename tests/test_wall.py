@@ -0,0 +1,152 @@
+import math, time
+import numpy
+import pytest
+from kernel.wall import WallGraph
+
+
+def normalized(x, y):
+    l = math.hypot(x, y)
+    return x/l, y/l
+
+
+def cornerInset(pPrev, p, pNext, d1, d2):
+    """
+    The same inset as <util.inset.Corner(p, pVert=pPrev, nVert=pNext, evenInset=False).inset(d2, d1, 0.)>
+    written for 2D tuples, since <util.inset> can't be imported without Blender
+    """
+    vec1 = normalized(p[0]-pPrev[0], p[1]-pPrev[1])
+    vec2 = normalized(pNext[0]-p[0], pNext[1]-p[1])
+    # <cross> is positive for a convex corner, so it's equal to the signed <sin> from <Corner>
+    sin = vec1[0]*vec2[1] - vec1[1]*vec2[0]
+    cos = -(vec1[0]*vec2[0] + vec1[1]*vec2[1])
+    # normal = vec1.cross(zAxis)
+    normal = (vec1[1], -vec1[0])
+    k = (d2 + d1*cos)/sin
+    return (p[0] - d1*normal[0] - k*vec1[0], p[1] - d1*normal[1] - k*vec1[1])
+
+
+def endInset(p, pOther, d, start):
+    """
+    The inset for an open end of a wall part, it's located on the normal to the only wall segment
+    """
+    vec = normalized(pOther[0]-p[0], pOther[1]-p[1]) if start else normalized(p[0]-pOther[0], p[1]-pOther[1])
+    return (p[0] - d*vec[1], p[1] + d*vec[0])
+
+
+def assertPoints(actual, expected):
+    numpy.testing.assert_allclose(numpy.asarray(actual), numpy.asarray(expected), atol=1e-9)
+
+
+def test_closed_outline():
+    # a counterclockwise square, the wall is at the right from the control points, i.e. outside
+    points = [(0., 0.), (4., 0.), (4., 3.), (0., 3.)]
+    w = 0.3
+    graph = WallGraph()
+    graph.addWall(points, w, closed=True, atRight=True)
+    (control, opposite, closed), = graph.getOutlines()
+    assert closed
+    assertPoints(control, points)
+    assertPoints(opposite, [(-w, -w), (4.+w, -w), (4.+w, 3.+w), (-w, 3.+w)])
+    # the same result from the inset math of <util.inset.Corner>
+    n = len(points)
+    assertPoints(
+        opposite,
+        [cornerInset(points[i-1], points[i], points[(i+1)%n], -w, -w) for i in range(n)]
+    )
+
+
+def test_closed_outline_concave_corner():
+    # an L-shaped counterclockwise polygon with the concave corner at (2., 2.)
+    points = [(0., 0.), (4., 0.), (4., 2.), (2., 2.), (2., 4.), (0., 4.)]
+    widths = [0.2, 0.3, 0.25, 0.35, 0.15, 0.4]
+    graph = WallGraph()
+    graph.addWall(points, widths, closed=True, atRight=False)
+    (control, opposite, closed), = graph.getOutlines()
+    n = len(points)
+    # the wall is at the left from the control points, so the insets are positive
+    expected = [
+        cornerInset(points[i-1], points[i], points[(i+1)%n], widths[i-1], widths[i])
+        for i in range(n)
+    ]
+    assertPoints(opposite, expected)
+    # the wall is inside the polygon, the concave corner moves outside of it
+    assert opposite[3][0] < 2. and opposite[3][1] < 2.
+
+
+def test_open_outline():
+    points = [(0., 0.), (4., 0.), (4., 3.), (7., 7.)]
+    widths = [0.2, 0.4, 0.3]
+    graph = WallGraph()
+    graph.addWall(points, widths, closed=False, atRight=True)
+    (control, opposite, closed), = graph.getOutlines()
+    assert not closed
+    assertPoints(control, points)
+    d = [-w for w in widths]
+    expected = [endInset(points[0], points[1], d[0], True)]
+    expected.extend(
+        cornerInset(points[i-1], points[i], points[i+1], d[i-1], d[i]) for i in (1, 2)
+    )
+    # the open end takes the width of the last wall segment
+    expected.append(endInset(points[3], points[2], d[2], False))
+    assertPoints(opposite, expected)
+    # the start of a straight wall part is offset by the width at the right
+    assertPoints(opposite[0], (0., -0.2))
+
+
+def test_footprint():
+    graph = WallGraph()
+    graph.addWall([(0., 0.), (5., 0.)], 0.25, atRight=False)
+    assertPoints(graph.getFootprint(0), [(0., 0.), (5., 0.), (5., 0.25), (0., 0.25)])
+
+
+def test_attached_outline():
+    graph = WallGraph()
+    host = graph.addWall([(0., 0.), (6., 0.), (6., 4.)], 0.3, atRight=True)
+    w = 0.2
+    # the start of the wall part isn't exactly on the host wall segment yet
+    wall = graph.addWall([(2.4, 0.5), (4.5, 4.)], w, atRight=True)
+    graph.attach(wall, False, host, 0, 2.5)
+    points, opposite = graph.compute()
+    outlines = graph.getOutlines((points, opposite))
+    control, _opposite, _ = outlines[wall]
+    # the attached corner node is moved to the host wall segment
+    assertPoints(control[0], (2.5, 0.))
+    # the neighbor of the attached corner node is located on the host wall segment too
+    assert abs(_opposite[0][1]) < 1e-9
+    # and it's located at the distance <w> from the control line of the attached wall
+    vec = normalized(control[1][0]-control[0][0], control[1][1]-control[0][1])
+    dx, dy = _opposite[0][0]-control[0][0], _opposite[0][1]-control[0][1]
+    assert abs(abs(vec[0]*dy - vec[1]*dx) - w) < 1e-9
+    # the wall is at the right from the control points
+    assert vec[0]*dy - vec[1]*dx < 0.
+    # the other end of the attached wall part is an ordinary open end
+    assertPoints(_opposite[1], endInset(control[1], control[0], -w, False))
+    # the host wall part isn't affected
+    assertPoints(
+        outlines[host][1][1],
+        cornerInset((0., 0.), (6., 0.), (6., 4.), -0.3, -0.3)
+    )
+
+
+def test_attached_closed_wall():
+    graph = WallGraph()
+    wall = graph.addWall([(0., 0.), (1., 0.), (1., 1.)], 0.1, closed=True)
+    # a closed wall part must not be attached
+    with pytest.raises(ValueError):
+        graph.attach(wall, False, wall, 0, 0.5)
+
+
+def test_benchmark_outlines():
+    # 100 parallel open wall parts with 2,000 wall segments in total
+    graph = WallGraph()
+    for i in range(100):
+        graph.addWall([(i*3., j*3. + (i % 3)*0.1) for j in range(21)], 0.2, atRight=bool(i % 2))
+    graph.build()
+    numSegments = sum(count if closed else count-1 for _, count, closed in graph.parts)
+    assert numSegments == 2000
+    start = time.perf_counter()
+    for _ in range(10):
+        graph.compute()
+    duration = (time.perf_counter() - start)/10.
+    print("\n%s wall segments: %.2f ms per vectorized pass" % (numSegments, 1000.*duration))
+    assert duration < 0.1
@@ -0,0 +1,37 @@
+"""
+Benchmark of the batch import of walls against repeated extension of a wall
+(i.e. the operator <prk.wall_extend> called for each wall segment).
+Blender with the add-on enabled is needed, see the fixture <context> in conftest.py
+"""
+import time
+from kernel.plan import makePolyline
+from conftest import Op
+
+
+numSegments = 50
+
+
+def test_benchmark_import(context):
+    from item.wall import Wall, getWallFromEmpty
+    op = Op()
+    
+    start = time.perf_counter()
+    wall = Wall(context, op)
+    wall.create()
+    empty = context.scene.objects.active
+    for _ in range(numSegments-1):
+        wall = getWallFromEmpty(context, op, empty, True)
+        empty = wall.extend(empty)
+    extendTime = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    polyline = makePolyline([(10., i*op.length) for i in range(numSegments+1)])
+    Wall(context, op).createFromPolylines([polyline])
+    importTime = time.perf_counter() - start
+    
+    print("\n%s wall segments: %.3f s with WallExtend, %.3f s with the batch import" %
+        (numSegments, extendTime, importTime)
+    )
+    # both ways create a pair of corner EMPTYs for each of <numSegments+1> corners
+    assert sum(1 for o in context.scene.objects if o.get("t") == "wc") == 4*(numSegments+1)
+    assert importTime < extendTime
@@ -1,4 +1,5 @@
 import bpy, bmesh
+from base.levels import invalidateLevelObjects
 
 
 def makeActiveSelected(context, o):
@@ -95,20 +96,52 @@ def getBmesh(obj):
 
 
 def setBmesh(obj, bm):
+    # the mesh could be shared with other Blender objects, e.g. with the copies of a level
+    makeSingleUser(obj)
     bm.to_mesh(obj.data)
     bm.free()
 
 
+def makeSingleUser(o):
+    """
+    Give the Blender object <o> its own copy of the data if the data is shared with other objects
+    """
+    if o.data.users > 1:
+        o.data = o.data.copy()
+
+
+def getMatrixWorld(o):
+    """
+    Calculates the world matrix of the Blender object <o> out of its local matrix and
+    the world matrix of its parent, so no scene update is needed after parenting
+    """
+    matrix = o.matrix_basis
+    if o.parent:
+        matrix = getMatrixWorld(o.parent) * o.matrix_parent_inverse * matrix
+    return matrix
+
+
 def addHookModifier(obj, name, hookObj, vertexGroup):
-    m = obj.modifiers.new(name=name, type='HOOK')
-    m.vertex_group = vertexGroup
-    m.object = hookObj
-    # starting from 2.76 we have to execute the following lines to get the correct offset of vertices
-    bpy.context.scene.objects.active = obj
-    bpy.ops.object.mode_set(mode="EDIT")
-    bpy.ops.object.hook_reset(modifier=name)
-    bpy.ops.object.mode_set(mode="OBJECT")
-    return m
+    return addHookModifiers(obj, ((name, hookObj, vertexGroup),))[0]
+
+
+def addHookModifiers(obj, hooks):
+    """
+    Add a HOOK modifier for each entry (name, hookObj, vertexGroup) of <hooks>
+    
+    The inverse matrix of each modifier is calculated in the same way as <bpy.ops.object.hook_reset(..)> does,
+    i.e. the inverted world matrix of the hook object multiplied by the world matrix of <obj>.
+    So switching to the EDIT mode and back isn't needed.
+    """
+    matrix = getMatrixWorld(obj)
+    modifiers = []
+    for name, hookObj, vertexGroup in hooks:
+        m = obj.modifiers.new(name=name, type='HOOK')
+        m.vertex_group = vertexGroup
+        m.object = hookObj
+        m.matrix_inverse = getMatrixWorld(hookObj).inverted() * matrix
+        modifiers.append(m)
+    return modifiers
 
 
 def addBooleanModifier(obj, name, operand, operation="DIFFERENCE"):
@@ -162,20 +195,132 @@ def assignGroupToVerts(obj, layer, groupName, *verts):
     return groupIndex
 
 
+class GroupIndex:
+    """
+    An inverted index of the vertex groups of a BMesh built in a single pass over its deform layer
+    
+    The index maps the index of a vertex group to the list of BMVerts belonging to the vertex group,
+    so the vertices of any number of vertex groups are found without scanning all vertices for each group.
+    The index isn't updated if vertex groups are assigned to the vertices after its creation.
+    """
+    
+    def __init__(self, bm, obj, groups=None):
+        """
+        Args:
+            bm (bmesh.types.BMesh): BMesh of the Blender object <obj>
+            obj: Blender object with the vertex groups
+            groups: An optional iterable with the indices or the names of the vertex groups to be indexed,
+                all vertex groups are indexed if it isn't given
+        """
+        self.obj = obj
+        # key: the index of a vertex group; value: the list of BMVerts
+        verts = {}
+        self.verts = verts
+        layer = bm.verts.layers.deform.active
+        if not layer:
+            return
+        if groups is None:
+            for v in bm.verts:
+                for i in v[layer].keys():
+                    if i in verts:
+                        verts[i].append(v)
+                    else:
+                        verts[i] = [v]
+        else:
+            groupIndices = set(self.getGroupIndex(g) for g in groups)
+            for i in groupIndices:
+                verts[i] = []
+            for v in bm.verts:
+                for i in v[layer].keys():
+                    if i in groupIndices:
+                        verts[i].append(v)
+    
+    def getGroupIndex(self, group):
+        return self.obj.vertex_groups[group].index if isinstance(group, str) else group
+    
+    def get(self, group):
+        """
+        Returns the list of BMVerts for the vertex group <group> given by its index or its name
+        """
+        return self.verts.get(self.getGroupIndex(group), [])
+
+
 def getVertsForVertexGroup(obj, bm, group):
-    verts = []
     # All vertex groups are in the deform layer.
     # There can be only one deform layer
-    layer = bm.verts.layers.deform[0]
-    for v in bm.verts:
-        if obj.vertex_groups[group].index in v[layer]:
-            verts.append(v)
-    return verts
+    return GroupIndex(bm, obj, (group,)).get(group)
+
+
+def duplicateHierarchy(o):
+    """
+    Make a linked duplicate of the Blender object <o> and all its descendants without any operator.
+    The duplicates share their data (e.g. meshes) with the original objects.
+    The references to the objects of the hierarchy in the parent relations, modifiers and
+    driver variables of the duplicates are replaced with the references to the related duplicates.
+    
+    Returns:
+        The duplicate of <o>
+    """
+    objects = []
+    def collect(o):
+        objects.append(o)
+        for c in o.children:
+            collect(c)
+    collect(o)
+    return duplicateObjects(objects)[o.name]
+
+
+def duplicateObjects(objects, mapping=None):
+    """
+    Make a linked duplicate of each Blender object from the list <objects> without any operator.
+    The duplicates share their data (e.g. meshes) with the original objects.
+    The references to the objects from <objects> in the parent relations, modifiers and
+    driver variables of the duplicates are replaced with the references to the related duplicates.
+    
+    Args:
+        objects (list): Blender objects to be duplicated
+        mapping (dict): An optional dictionary with the name of a Blender object not included in <objects>
+            as the key and a Blender object as the value to replace the references to the former one
+    
+    Returns:
+        A dictionary with the name of an original object as the key and its duplicate as the value
+    """
+    sceneObjects = bpy.context.scene.objects
+    # key: the name of an original object; value: its duplicate
+    duplicates = dict(mapping) if mapping else {}
+    for o in objects:
+        _o = o.copy()
+        sceneObjects.link(_o)
+        duplicates[o.name] = _o
+    
+    def remap(o):
+        return duplicates.get(o.name, o) if isinstance(o, bpy.types.Object) else o
+    
+    for o in objects:
+        _o = duplicates[o.name]
+        if _o.parent:
+            # <matrix_parent_inverse> is kept
+            _o.parent = remap(_o.parent)
+        for m in _o.modifiers:
+            if hasattr(m, "object") and m.object:
+                m.object = remap(m.object)
+        if _o.animation_data:
+            for d in _o.animation_data.drivers:
+                for v in d.driver.variables:
+                    for t in v.targets:
+                        if t.id:
+                            t.id = remap(t.id)
+    if mapping:
+        for name in mapping:
+            del duplicates[name]
+    return duplicates
 
 
 def parent_set(parent, *objects):
     for obj in objects:
         obj.parent = parent
+    # the Blender objects may have been moved to another level
+    invalidateLevelObjects()
 
 
 def cursor_2d_to_location_3d(context, event):
@@ -199,6 +344,8 @@ def hide(o, value):
 
 
 def modifier_apply(o, modifierName):
+    # a modifier can't be applied to multi-user data
+    makeSingleUser(o)
     bpy.context.scene.objects.active = o
     bpy.ops.object.modifier_apply(modifier=modifierName)
 
@@ -63,15 +63,18 @@ class Corner:
         return inset
     
     def getDriverExpressions(self, x0, z0, w1, w2):
+        """
+        Returns the expressions for the drivers of X and Z coordinates of the inset
+        that depend on the variable <fw>, the frame width
+        
+        The inset is linear in <fw>, so its coefficients are calculated here
+        """
         # exchange the values of <w1> and <w2>
         w1, w2 = w2, w1
-        n = self.normal
-        vec1 = self.vec1
-        d1 = str(w1)+"*fw"
-        d2 = str(w2)+"*fw"
-        cos = str(self.cos)
-        sin = str(self.sin)
-        strPart = "-("+d2 + "+" + d1 + "*" +cos + ")/" + sin + "*"
-        driverExpressionX = str(x0) + "-" + d1 + "*" + str(n.x) + strPart + str(vec1.x)
-        driverExpressionZ = str(z0) + "-" + d1 + "*" + str(n.z) + strPart + str(vec1.z)
-        return driverExpressionX, driverExpressionZ
\ No newline at end of file
+        # d1 = w1*fw, d2 = w2*fw
+        k = (w2 + w1*self.cos)/self.sin
+        # inset = vert - d1*normal - (d2+d1*cos)/sin*vec1
+        multiplier = -w1*self.normal - k*self.vec1
+        driverExpressionX = str(x0) + "+(" + str(multiplier.x) + ")*fw"
+        driverExpressionZ = str(z0) + "+(" + str(multiplier.z) + ")*fw"
+        return driverExpressionX, driverExpressionZ
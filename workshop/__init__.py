@@ -1,6 +1,7 @@
 import bpy
 from base import pContext
 from .ops import *
+from .template import resetAssetCache, resetMeshCache
 
 
 class PanelWorkshop(bpy.types.Panel):
@@ -26,6 +27,12 @@ class PanelWorkshop(bpy.types.Panel):
 
 def register():
     bpy.utils.register_module(__name__)
+    for handler in (resetAssetCache, resetMeshCache):
+        if not handler in bpy.app.handlers.load_post:
+            bpy.app.handlers.load_post.append(handler)
 
 def unregister():
-    bpy.utils.unregister_module(__name__)
\ No newline at end of file
+    bpy.utils.unregister_module(__name__)
+    for handler in (resetAssetCache, resetMeshCache):
+        if handler in bpy.app.handlers.load_post:
+            bpy.app.handlers.load_post.remove(handler)
\ No newline at end of file
@@ -0,0 +1,141 @@
+import bmesh
+from util.blender import setBmesh, addHookModifiers
+
+
+class MeshCompiler:
+    """
+    Merges the meshes of the nodes set for the vertices of a template into a single BMesh in memory
+
+    The mesh of each node is transformed in its own BMesh (see <workshop.node.Node.transform(..)>)
+    and appended to <self.bm>, so no copy of the node Blender object is created and
+    neither <bpy.ops.transform.rotate(..)> nor <bpy.ops.object.join(..)> is called for a node.
+    The resulting mesh is written to the Blender object of the item only once in <self.write(..)>.
+    The vertex groups, shape keys, UV maps and materials of the nodes are merged by their names
+    in the same way as <bpy.ops.object.join(..)> does.
+    """
+
+    def __init__(self):
+        bm = bmesh.new()
+        self.bm = bm
+        self.layer = bm.verts.layers.deform.new()
+        # names of the vertex groups in the order of their indices in <self.layer>
+        self.groups = []
+        # key: the name of a vertex group; value: its index in <self.layer>
+        self.groupIndices = {}
+        self.materials = []
+        # entries (name, hookObj, vertexGroup) for HOOK modifiers
+        self.hooks = []
+
+    def getGroupIndex(self, name):
+        groupIndices = self.groupIndices
+        if not name in groupIndices:
+            groupIndices[name] = len(self.groups)
+            self.groups.append(name)
+        return groupIndices[name]
+
+    def getShapeLayer(self, name):
+        layers = self.bm.verts.layers.shape
+        layer = layers.get(name)
+        if not layer:
+            layer = layers.new(name)
+            # the shape key for the vertices added before is equal to their basis coordinates
+            for v in self.bm.verts:
+                v[layer] = v.co
+        return layer
+
+    def getUvLayer(self, name):
+        layers = self.bm.loops.layers.uv
+        return layers.get(name) or layers.new(name)
+
+    def getMaterialIndex(self, material):
+        materials = self.materials
+        for i,m in enumerate(materials):
+            if m == material:
+                return i
+        materials.append(material)
+        return len(materials)-1
+
+    def add(self, bm, groups, materials, matrix, group=None):
+        """
+        Transform the BMesh <bm> of a node with <matrix> and append it to <self.bm>
+
+        Args:
+            bm (bmesh.types.BMesh): BMesh of the node, it isn't changed
+            groups (list): Names of the vertex groups of the node in the order of their indices
+            materials: Materials of the node mesh
+            matrix (mathutils.Matrix): A 4x4 matrix to transform the node
+            group (str): If given, the name of an extra vertex group for all vertices of the node
+        """
+        _bm = self.bm
+        _layer = self.layer
+        # the indices of the vertex groups of the node in <self.layer>
+        groupIndices = [self.getGroupIndex(name) for name in groups]
+        extraGroupIndex = self.getGroupIndex(group) if group else None
+        layer = bm.verts.layers.deform.active
+        # pairs of shape layers of <bm> and <self.bm>
+        shapeLayers = [(l, self.getShapeLayer(name)) for name,l in bm.verts.layers.shape.items()]
+        # the shape keys of <self.bm> that the node doesn't have
+        missingShapeLayers = [l for name,l in _bm.verts.layers.shape.items() if not name in bm.verts.layers.shape]
+        uvLayers = [(l, self.getUvLayer(name)) for name,l in bm.loops.layers.uv.items()]
+        materialIndices = [self.getMaterialIndex(m) for m in materials]
+
+        verts = []
+        for v in bm.verts:
+            _v = _bm.verts.new(matrix * v.co)
+            if layer:
+                for i,w in v[layer].items():
+                    _v[_layer][groupIndices[i]] = w
+            if not extraGroupIndex is None:
+                _v[_layer][extraGroupIndex] = 1.
+            for l,_l in shapeLayers:
+                _v[_l] = matrix * v[l]
+            for _l in missingShapeLayers:
+                _v[_l] = _v.co
+            verts.append(_v)
+        bm.verts.index_update()
+
+        for e in bm.edges:
+            _e = _bm.edges.new( (verts[e.verts[0].index], verts[e.verts[1].index]) )
+            _e.smooth = e.smooth
+            _e.seam = e.seam
+
+        for f in bm.faces:
+            _f = _bm.faces.new([verts[v.index] for v in f.verts])
+            _f.smooth = f.smooth
+            if f.material_index < len(materialIndices):
+                _f.material_index = materialIndices[f.material_index]
+            if uvLayers:
+                # the loops of <_f> start from the same vertex as the ones of <f>
+                for loop,_loop in zip(f.loops, _f.loops):
+                    for l,_l in uvLayers:
+                        _loop[_l].uv = loop[l].uv
+
+    def addHook(self, group, hookObj):
+        """
+        Add a HOOK modifier with the EMPTY <hookObj> for the vertex group <group> in <self.write(..)>
+        """
+        self.hooks.append((group, hookObj, group))
+
+    def write(self, o):
+        """
+        Write the merged mesh to the Blender object <o> together with its vertex groups,
+        materials, shape keys and HOOK modifiers. <o> must not have any vertex groups.
+        """
+        bm = self.bm
+        bm.normal_update()
+        # coordinates for each shape key, since <bm.to_mesh(..)> doesn't create them for a new mesh
+        shapeKeys = [
+            ( name, [c for v in bm.verts for c in v[l]] )
+            for name,l in bm.verts.layers.shape.items()
+        ]
+        # the indices of the vertex groups must be the same as in <self.layer>
+        for name in self.groups:
+            o.vertex_groups.new(name)
+        for m in self.materials:
+            o.data.materials.append(m)
+        setBmesh(o, bm)
+        for name, coords in shapeKeys:
+            # the first shape key becomes the basis one
+            o.shape_key_add(name=name, from_mix=False).data.foreach_set("co", coords)
+        if self.hooks:
+            addHookModifiers(o, self.hooks)
@@ -1,8 +1,23 @@
 import math
-import bpy, bmesh, mathutils
+import bmesh, mathutils
+from kernel.node import getAngles, getNeighborEdges, getEdgeIndex
 from base import zero2, zeroVector
 from util import acos, is90degrees, is180degrees
-from util.blender import getBmesh, setBmesh, getVertsForVertexGroup
+from util.blender import getBmesh, GroupIndex
+
+
+def moveShapeKeys(bm, verts, coords):
+    """
+    Move the shape keys of <verts> by the displacement of <verts> from their original
+    coordinates <coords>, the same way as <bm.to_mesh(..)> does it for a mesh with shape keys
+    """
+    layers = bm.verts.layers.shape.values()
+    if not layers:
+        return
+    for v, co in zip(verts, coords):
+        offset = v.co - co
+        for l in layers:
+            v[l] = v[l] + offset
 
 
 # value of the shape key offset for the shape key value equal to 1.
@@ -21,6 +36,8 @@ class Node:
         (1) Opposite vertex (BMVert) of the edge
         (2) Boolean variable that defines in which circle half the edge is located (not available for LNode)
         (3) Cosine of the angle between the edge and the base edge (not available for LNode)
+    self.angles (list): Polar angles in radians of the edges from <self.edges> counted
+        counterclockwise from the base edge, so they increase monotonically in the range [0, 2*pi)
     """
     
     def __init__(self, v, edges):
@@ -29,6 +46,7 @@ class Node:
         # normal to the vertex
         self.n = v.normal
         self.edges = self.arrangeEdges(edges)
+        self.angles = self.getAngles() if self.edges else None
     
     def setBlenderObject(self, o):
         """
@@ -61,26 +79,19 @@ class Node:
         edges = []
         bm = getBmesh(o)
         layer = bm.verts.layers.deform[0]
-        # Iterate through vertices
-        for v in bm.verts:
-            edge = None
-            for i in groupIndices:
-                if i in v[layer]:
-                    # now find the vertex that doesn't have the group with the index <i>
-                    loop = v.link_loops[0]
-                    _v = (loop.link_loop_prev if i in loop.link_loop_next.vert[layer] else loop.link_loop_next).vert
-                    edge = (v.co - _v.co).normalized()
-                    # store also the group index
-                    edges.append([ edge, i ])
-                    # we found the vertex belonging to the group with the index <i>,
-                    # we don't need to continue iteration through groupIndices
-                    break
-            if edge:
-                # we'll skip the other vertices belonging to the group with the index <i>
-                groupIndices.remove(i)
-            if not groupIndices:
-                # nothing is left to search for
-                break
+        # the vertices of all vertex groups from <groupIndices> are found in a single pass
+        index = GroupIndex(bm, o, groupIndices)
+        for i in groupIndices:
+            verts = index.get(i)
+            if not verts:
+                continue
+            # a single vertex belonging to the group with the index <i> is enough
+            v = verts[0]
+            # now find the vertex that doesn't have the group with the index <i>
+            loop = v.link_loops[0]
+            _v = (loop.link_loop_prev if i in loop.link_loop_next.vert[layer] else loop.link_loop_next).vert
+            # store also the group index
+            edges.append([ (v.co - _v.co).normalized(), i ])
         bm.free()
         return edges
     
@@ -128,12 +139,44 @@ class Node:
                 edges[i][3] = -edges[i][3]
         return edges
     
-    def transform(self, o):
+    def transform(self, bm, groups):
         """
-        Transform the Blender object <o> as a node, e.g. rotate and shear it appropriately
+        Transform the BMesh <bm> of the Blender object serving as a node, e.g. rotate and shear it appropriately
+        
+        Args:
+            bm (bmesh.types.BMesh): BMesh of the Blender object serving as a node
+            groups (list): Names of the vertex groups of the Blender object in the order of their indices
         
         Returns:
-            The resulting matrix for the transformation
+            The rotation matrix to be applied to the whole node or None if no rotation is needed
+        """
+        matrix = self.getMatrix()
+        self.transformMesh(bm, groups)
+        return matrix
+    
+    def getTransformKey(self):
+        """
+        Returns a hashable key for the transformation performed by <self.transformMesh(..)>.
+        The nodes with the same Blender object and the same key get the same transformed mesh.
+        """
+        # <self.rotate(..)> and <self.shear(..)> don't do anything
+        return ()
+    
+    def transformMesh(self, bm, groups):
+        """
+        Transform the BMesh <bm> of the Blender object serving as a node in its own coordinate system,
+        i.e. without the rotation returned by <self.getMatrix()>
+        """
+        # the vertices of all vertex groups are found in a single pass
+        index = GroupIndex(bm, None)
+        
+        angle = self.rotate(bm, groups, index)
+        
+        self.shear(bm, groups, angle, index)
+    
+    def getMatrix(self):
+        """
+        Returns the rotation matrix to be applied to the whole node or None if no rotation is needed
         """
         matrix = None
         # calculate rotation angle
@@ -146,22 +189,20 @@ class Node:
             angle = acos(dot)
             if self.n.dot( _baseEdge.cross(baseEdge) ) < 0.:
                 angle = -angle
-            bpy.ops.transform.rotate(value = angle, axis=self.n)
             matrix = mathutils.Matrix.Rotation(angle, 4, self.n)
         
-        angle = self.rotate(o)
-        
-        self.shear(o, angle)
-        
         # remember the transformation matrix
         self.matrix = matrix
         
         return matrix
     
-    def rotate(self, o):
+    def rotate(self, bm, groups, index):
         """
         Rotate a group vertices with the name <i_?> which are located
-        at an open end of the Blender object <o> serving as a node for the template vertex <self.v>
+        at an open end of the BMesh <bm> serving as a node for the template vertex <self.v>
+        
+        Args:
+            index (util.blender.GroupIndex): The index of the vertex groups of <bm>
         
         Returns:
             float: Angle between edges in radians, if rotation is needed, None otherwise
@@ -169,9 +210,9 @@ class Node:
         """
         pass
     
-    def shear(self, o, angle):
+    def shear(self, bm, groups, angle, index):
         """
-        Perform a shear transformation of the central part of the Blender object <o>
+        Perform a shear transformation of the central part of the BMesh <bm>
         serving as a node for the template vertex <self.v>
         
         The central part to shear is defined by a group of vertices with the name <c>
@@ -181,22 +222,29 @@ class Node:
         """
         pass
     
-    def updateVertexGroupNames(self, o, template):
-        # update the names of the vertex groups that define the open ends of the node <o>
+    def updateVertexGroupNames(self, groups, template):
+        # update the names in the list <groups> of the vertex groups that define the open ends of the node
         # store the correspondence of the old and new names in the dictionary <ends> 
         ends = {}
         self.ends = ends
         for i in range(len(self.edges)):
-            group = o.vertex_groups[ self._edges[i][1] ]
+            groupIndex = self._edges[i][1]
             _vid = template.getVid(self.edges[i][1])
             # vertices with vids <self.vid> and <_vid> define an edge
-            ends[group.name] = (self.vid, _vid)
-            group.name = "e_" + self.vid + "_" + _vid
+            ends[groups[groupIndex]] = (self.vid, _vid)
+            groups[groupIndex] = "e_" + self.vid + "_" + _vid
         # update the names of vertex groups that define a surface
-        for i,g in enumerate(o.vertex_groups):
-            if g.name[0] == "s":
+        for i,name in enumerate(groups):
+            if name[0] == "s":
                 # append <self.vid>
-                g.name += "_" + self.vid
+                groups[i] = name + "_" + self.vid
+    
+    def getAngles(self):
+        """
+        Calculate the polar angles of <self.edges> for the binary search in
+        <self.getNeighborEdges(..)> and <self.getEdgeIndex(..)>
+        """
+        return getAngles(self.n, self.edges)
     
     def getNeighborEdges(self, vec):
         """
@@ -204,45 +252,19 @@ class Node:
         
         Args:
             vec (mathutils.Vector): A vector that starts at the template vertex 
-        """
-        # get the normalized version of <vec>
-        vec = vec.normalized()
-        edges = self.edges
-        # normal to the plane where the template vertex and its <edges> are located
-        n = self.v.normal
-        
-        baseVec = edges[0][0]
-        cos = baseVec.dot(vec)
-        firstCircleHalf = n.dot( baseVec.cross(vec)) > 0.
-        
-        # treat the special case for only two edges
-        if len(edges) == 2:
-            e1, e2 = edges
-            _cos = baseVec.dot(edges[1][0])
-            return e1,e2 if firstCircleHalf and cos < _cos else e2,e1
         
-        if firstCircleHalf:
-            for i in range(len(edges)):
-                e1, e2 = edges[i], edges[i+1]
-                if e2[3] < cos < e1[3]:
-                    return e1, e2
-        else:
-            e1 = edges[0]
-            for i in range(len(edges)-1, -1, -1):
-                e2 = e1
-                e1 = edges[i]
-                # remember <cos> is negated for firstCircleHalf == False
-                if e1[3] < cos < e2[3]:
-                    return e1, e2
+        Returns:
+            A tuple of two edges, <vec> is located between them going counterclockwise
+            from the first edge to the second one
+        """
+        return getNeighborEdges(self.n, self.edges, self.angles, vec)
     
     def getEdgeIndex(self, edgeVector):
         """
         Get <index> of <self.edges> for which <self.edges[index][0] == edgeVector>.
         <edgeVector> must be normalized!
         """
-        for i, e in enumerate(self.edges):
-            if abs( 1.-edgeVector.dot(e[0]) ) < zero2:
-                return i
+        return getEdgeIndex(self.n, self.edges, self.angles, edgeVector)
 
 
 class LNode(Node):
@@ -282,7 +304,20 @@ class LNode(Node):
         edges[1].extend(( edges[0][0].dot(edges[1][0]), convex))
         return edges
     
-    def rotate(self, o):
+    def getTransformKey(self):
+        """
+        Realization of <Node.getTransformKey(..)>
+        
+        The rotation of the open end and the shear angle are defined by the normal to the template vertex,
+        the cosine of the angle between the edges and the convexity of the angle
+        """
+        return (
+            tuple(round(c, 5) for c in self.n),
+            round(self.edges[1][2], 5),
+            self.edges[1][3]
+        )
+    
+    def rotate(self, bm, groups, index):
         """
         Realization of <Node.rotate(..)>
         """
@@ -294,7 +329,8 @@ class LNode(Node):
         
         angle = acos(cos)
         
-        bm = getBmesh(o)
+        verts = index.get(self._edges[1][1])
+        coords = [v.co.copy() for v in verts]
         bmesh.ops.rotate(
             bm,
             cent = zeroVector,
@@ -303,23 +339,22 @@ class LNode(Node):
                 3,
                 self.n
             ),
-            verts = getVertsForVertexGroup(o, bm, o.vertex_groups[ self._edges[1][1] ].name)
+            verts = verts
         )
-        setBmesh(o, bm)
+        moveShapeKeys(bm, verts, coords)
         
         return angle
     
-    def shear(self, o, angle):
+    def shear(self, bm, groups, angle, index):
         """
         Realization of <Node.shear(..)>
         """
-        if angle is None or not "c" in o.vertex_groups:
+        if angle is None or not "c" in groups:
             return
         
         _edges = self._edges
         
         convex = self.edges[1][3]
-        bm = getBmesh(o)
         shearFactor = 1./math.tan(angle/2.)
         if convex:
             shearFactor = shearFactor - 1.
@@ -342,37 +377,31 @@ class LNode(Node):
         else:
             spaceMatrix = mathutils.Matrix.Identity(4)
         
+        verts = index.get(groups.index("c"))
+        coords = [v.co.copy() for v in verts]
         bmesh.ops.transform(
             bm,
             matrix = mathutils.Matrix.Shear('XY', 4, (shearFactor, 0.)),
-            verts = getVertsForVertexGroup(o, bm, "c"),
+            verts = verts,
             space = spaceMatrix
         )
-        # Set BMesh here to get the correct result in the next section
-        # of the code related to the shape key update
-        setBmesh(o, bm)
+        moveShapeKeys(bm, verts, coords)
         
         # update shape key data (if available) for the vertices of the vertex group <c>
-        shape_keys = o.data.shape_keys
-        if shape_keys:
-            if shape_keys.key_blocks.get("frame_width", None):
-                bm = getBmesh(o)
-                
-                shapeKey = bm.verts.layers.shape.get("frame_width")
-                # the bisector of the edges after the shear transformation
-                bisector = mathutils.Matrix.Rotation(
-                    angle/2. - math.pi/4. if convex else 0.75*math.pi - angle/2.,
-                    3,
-                    self.n
-                ) * bisector
-                # offset vector for the shape key
-                offset = shapeKeyOffset / math.sin(angle/2.) * bisector
-                for v in getVertsForVertexGroup(o, bm, "c"):
-                    # check if the vertex changes its location for the shape key
-                    if ( (v[shapeKey] - v.co).length > zero2):
-                        v[shapeKey] = v.co + offset
-                
-                setBmesh(o, bm)
+        shapeKey = bm.verts.layers.shape.get("frame_width")
+        if shapeKey:
+            # the bisector of the edges after the shear transformation
+            bisector = mathutils.Matrix.Rotation(
+                angle/2. - math.pi/4. if convex else 0.75*math.pi - angle/2.,
+                3,
+                self.n
+            ) * bisector
+            # offset vector for the shape key
+            offset = shapeKeyOffset / math.sin(angle/2.) * bisector
+            for v in verts:
+                # check if the vertex changes its location for the shape key
+                if ( (v[shapeKey] - v.co).length > zero2):
+                    v[shapeKey] = v.co + offset
 
 
 class TNode(Node):
@@ -1,6 +1,6 @@
 import os, bpy
 from base import zeroVector, zero2, pContext
-from util.blender import createEmptyObject, makeActiveSelected, appendFromFile, parent_set, showWired,\
+from util.blender import createEmptyObject, makeActiveSelected, parent_set, showWired,\
     getBmesh
 from .template import Template
 
@@ -120,12 +120,18 @@ class WorkshopMakeItem(bpy.types.Operator):
         parent = context.object
         # reset the cache of nodes
         Template.nodeCache.reset()
+        assetCache = Template.assetCache
+        hits, misses = assetCache.hits, assetCache.misses
         # getting the parent template (i.e. it doesn't contain the custom attribute <p>)
         for o in parent.children:
             if not "p" in o:
                 self.makeParts(Template(o), context)
                 makeActiveSelected(context, parent)
                 break
+        if assetCache.hits > hits or assetCache.misses > misses:
+            self.report({'INFO'}, "Assets: %s placed from the cache, %s loaded from files" %
+                (assetCache.hits - hits, assetCache.misses - misses)
+            )
         return {'FINISHED'}
     
     def makeParts(self, template, context):
@@ -306,7 +312,7 @@ class WorkshopAssignAsset(bpy.types.Operator):
                 v = (v[1], v[0])
         
         # <a> is for asset
-        a = appendFromFile(context, self.filepath)
+        a = Template.assetCache.get(self.filepath)
         a.location = verts[0] + self.relativePosition*(verts[1]-verts[0])/100.
         parent_set(o, a)
         a["t"] = "asset"
@@ -323,6 +329,8 @@ class WorkshopAssignAsset(bpy.types.Operator):
             a["slr"] = props.assetSideLr
         showWired(a)
         
+        # only <a> must be moved by <bpy.ops.transform.translate()>
+        bpy.ops.object.select_all(action='DESELECT')
         makeActiveSelected(context, a)
         # Without bpy.ops.transform.translate() some complex stuff (some modifiers)
         # may not be initialized correctly
@@ -1,4 +1,7 @@
 import os, mathutils, bpy, bmesh
+from collections import OrderedDict
+from bpy.app.handlers import persistent
+import numpy
 from base import zero2, zeroVector
 from util import is0degrees
 from util.blender import *
@@ -90,17 +93,17 @@ class SurfaceVerts:
         if not groupIndices:
             return
         
-        layer = bm.verts.layers.deform[0]
-        for v in bm.verts:
-            for i in groupIndices:
-                if i in v[layer]:
-                    name = o.vertex_groups[i].name
-                    sl = name[:name.find("_")]
-                    vid = name[name.find("_")+1:]
-                    if not vid in sverts[sl]:
-                        sverts[sl][vid] = []
-                    sverts[sl][vid].append(v)
-                    self.numVerts += 1
+        # the vertices of all surface vertex groups are found in a single pass
+        index = GroupIndex(bm, o, groupIndices)
+        for i in groupIndices:
+            name = o.vertex_groups[i].name
+            sl = name[:name.find("_")]
+            vid = name[name.find("_")+1:]
+            for v in index.get(i):
+                if not vid in sverts[sl]:
+                    sverts[sl][vid] = []
+                sverts[sl][vid].append(v)
+                self.numVerts += 1
     
     def pop(self, tv=None, vec1=None, vec2=None):
         # tv stands for template vertex
@@ -252,6 +255,9 @@ class NodeCacheEntry:
     A wrapper for actual Blender object used as a node for a template
     """
     def __init__(self, o):
+        self.o = o
+        # a key for the mesh of <o> in <NodeMeshCache>, calculated on demand
+        self._meshKey = None
         self.offsets = []
         self.assets = {}
         # scan Blender object o for offsets and asset placeholders
@@ -261,6 +267,180 @@ class NodeCacheEntry:
                 self.offsets.append(e.location)
             elif t == "asset":
                 self.assets[e["t2"]] = e
+    
+    def getMeshKey(self):
+        """
+        Returns a key that changes if the mesh of the node Blender object is edited,
+        including its shape keys (e.g. <frame_width>) and the weights of its vertex groups
+        """
+        if not self._meshKey:
+            mesh = self.o.data
+            numVerts = len(mesh.vertices)
+            coords = numpy.empty(3*numVerts)
+            mesh.vertices.foreach_get("co", coords)
+            # the coordinates of the shape keys
+            shapeKeys = []
+            if mesh.shape_keys:
+                for kb in mesh.shape_keys.key_blocks:
+                    _coords = numpy.empty(3*numVerts)
+                    kb.data.foreach_get("co", _coords)
+                    shapeKeys.append( (kb.name, hash(_coords.tobytes())) )
+            self._meshKey = (
+                self.o.name,
+                numVerts,
+                len(mesh.edges),
+                len(mesh.polygons),
+                tuple(g.name for g in self.o.vertex_groups),
+                hash(coords.tobytes()),
+                tuple(shapeKeys),
+                # the vertex group indices and weights of each vertex
+                hash(tuple( (g.group, g.weight) for v in mesh.vertices for g in v.groups ))
+            )
+        return self._meshKey
+
+
+class NodeMeshCache:
+    """
+    LRU cache of transformed meshes (BMesh) of the Blender objects used as nodes
+    
+    The key of a cache entry is composed of the key for the node Blender object
+    (see <NodeCacheEntry.getMeshKey()>) and the key for the transformation of its mesh
+    (see <workshop.node.Node.getTransformKey()>). So identical items or a template with repeated
+    nodes at the vertices with the same edge configuration reuse the transformed mesh.
+    The cache is kept between the calls of <workshop.ops.WorkshopMakeItem>.
+    """
+    
+    def __init__(self, maxSize=64):
+        self.maxSize = maxSize
+        # key: a tuple (mesh key, transform key); value: BMesh
+        self.meshes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, node, nw, groups):
+        """
+        Returns transformed BMesh for the node Blender object.
+        The BMesh belongs to the cache, it must not be changed or freed.
+        
+        Args:
+            node (NodeCacheEntry): A wrapper for the node Blender object
+            nw (workshop.node.Node): The node wrapper for the template vertex
+            groups (list): Names of the vertex groups of the node Blender object in the order of their indices
+        """
+        meshes = self.meshes
+        key = (node.getMeshKey(), nw.getTransformKey())
+        bm = meshes.get(key)
+        if not bm is None:
+            self.hits += 1
+            meshes.move_to_end(key)
+            return bm
+        self.misses += 1
+        bm = getBmesh(node.o)
+        nw.transformMesh(bm, groups)
+        meshes[key] = bm
+        if len(meshes) > self.maxSize:
+            # evict the least recently used entry
+            meshes.popitem(last=False)[1].free()
+        return bm
+    
+    def clear(self):
+        for bm in self.meshes.values():
+            bm.free()
+        self.meshes.clear()
+
+
+class AssetCache:
+    """
+    Cache of the Blender objects appended from the .blend files of assets (e.g. handles or hinges)
+    
+    The objects of an asset file are appended only once, i.e. <bpy.data.libraries.load(..)>
+    is called only for the first placement of the asset. They aren't linked to the scene
+    and serve as the source for the placements: each placement is a linked duplicate
+    of the hierarchy of the appended objects (see <util.blender.duplicateObjects(..)>),
+    so it shares meshes and materials with the source.
+    The key of a cache entry is the path to the asset file, the modification time of the file
+    is stored in the entry, so an edited asset file is appended again.
+    The names of the source Blender objects are stored rather than the objects themselves,
+    since the Python references to Blender objects become invalid after undo.
+    A source Blender object is marked with the custom property <self.sourceKey> holding the path
+    to the asset file, since a placement may get the name of a removed source Blender object.
+    """
+    
+    # the name of the custom property marking the source Blender objects
+    sourceKey = "asset_source"
+    
+    def __init__(self):
+        # key: the path to an asset file;
+        # value: a tuple (modification time, the names of the source Blender objects)
+        # the first name is the one of the parent Blender object
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, filepath):
+        """
+        Place a new instance of the asset from the file <filepath> to the scene
+        
+        Returns:
+            The parent Blender object of the new instance
+        """
+        filepath = os.path.normpath(bpy.path.abspath(filepath))
+        mtime = os.path.getmtime(filepath)
+        entry = self.entries.get(filepath)
+        objects = None
+        if entry and entry[0] == mtime:
+            objects = [bpy.data.objects.get(name) for name in entry[1]]
+            if not all(o and o.get(self.sourceKey) == filepath for o in objects):
+                # some source Blender objects have been removed
+                objects = None
+        if objects:
+            self.hits += 1
+        else:
+            self.misses += 1
+            objects = self.load(filepath)
+            self.entries[filepath] = (mtime, [o.name for o in objects])
+        duplicates = duplicateObjects(objects)
+        for o in duplicates.values():
+            o.select = False
+            # the custom properties are copied to the duplicates
+            del o[self.sourceKey]
+        return duplicates[objects[0].name]
+    
+    def load(self, filepath):
+        """
+        Append the Blender objects from the file <filepath> without linking them to the scene
+        
+        Returns:
+            A list with the root Blender objects followed by their descendants. The first root is
+            the parent Blender object of the asset, the other roots are placed too as
+            <util.blender.appendFromFile(..)> does, so they don't become orphans.
+        """
+        with bpy.data.libraries.load(filepath) as (data_from, data_to):
+            data_to.objects = data_from.objects
+        objects = [o for o in data_to.objects if not o.parent]
+        # append the descendants of the roots to <objects>
+        for o in objects:
+            objects.extend(o.children)
+        for o in objects:
+            o[self.sourceKey] = filepath
+        return objects
+    
+    def reset(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+@persistent
+def resetAssetCache(*args):
+    # the names of the source Blender objects don't make sense for another .blend file
+    Template.assetCache.reset()
+
+
+@persistent
+def resetMeshCache(*args):
+    # the node Blender objects of another .blend file may have the same names
+    Template.meshCache.clear()
 
 
 class Template:
@@ -270,6 +450,12 @@ class Template:
     # static variable and accessable by all templates
     nodeCache = NodeCache()
     
+    # static variable for the transformed node meshes
+    meshCache = NodeMeshCache()
+    
+    # static variable for the Blender objects appended from the asset files
+    assetCache = AssetCache()
+    
     def __init__(self, o, parentTemplate=None, **kwargs):
         self.o = o
         self.parentTemplate = parentTemplate
@@ -281,15 +467,36 @@ class Template:
         # create a layer for vertex groups if necessary
         deform = bm.verts.layers.deform
         self.layer = deform[0] if deform else deform.new()
+        self.buildVidIndex()
         
         if not kwargs.get("skipInit"):
             self.nodes = {}
             self.childOffsets = ChildOffsets(self)
     
+    def buildVidIndex(self):
+        """
+        Build the index of vertex ids in a single pass over the vertices of <self.bm>
+        
+        <self.vids> maps a BMVert to its vertex id.
+        Only the vertices with exactly one vertex group are indexed here,
+        the other ones get their vertex ids in <self.setVid(..)> that keeps the index valid.
+        """
+        layer = self.layer
+        groups = [g.name for g in self.o.vertex_groups]
+        vids = {}
+        for v in self.bm.verts:
+            groupIndices = v[layer].keys()
+            if len(groupIndices) == 1:
+                vid = groups[groupIndices[0]]
+                vids[v] = vid
+        self.vids = vids
+    
     def setVid(self, v):
         """
         Set vertex id as a vertex group
         """
+        if v in self.vids:
+            return
         p = self.p
         layer = self.layer
         # If the number of group vertices is greater than 1,
@@ -297,18 +504,24 @@ class Template:
         # during the loop cut or similar operation
         if not v[layer] or len(v[layer])>1:
             v[layer].clear()
-            assignGroupToVerts(self.o, layer, str(p["vert_counter"]), v)
+            vid = str(p["vert_counter"])
+            assignGroupToVerts(self.o, layer, vid, v)
             p["vert_counter"] += 1
+        else:
+            vid = self.o.vertex_groups[v[layer].keys()[0]].name
+        self.vids[v] = vid
     
     def getVid(self, v):
         """
-        Get vertex id from the related vertex group
+        Get vertex id from the index of vertex ids, the vertex id is set if necessary
         
         Returns a string
         """
-        self.setVid(v)
-        groupIndex = v[self.layer].keys()[0]
-        return self.o.vertex_groups[groupIndex].name
+        vid = self.vids.get(v)
+        if vid is None:
+            self.setVid(v)
+            vid = self.vids[v]
+        return vid
     
     def complete(self):
         setBmesh(self.o, self.bm)
@@ -403,9 +616,12 @@ class Template:
                 children.append(Template(o, self))
         return children
     
-    def setNode(self, v, n, parent, context, **kwargs):
+    def setNode(self, v, n, compiler, context, **kwargs):
         """
         Set a node Blender object <n> for the template vertex <v>
+        
+        The mesh of <n> is transformed and added to <compiler> (an instance of
+        <workshop.compiler.MeshCompiler>), no Blender object is created for it
         """
         from .node import shapeKeyOffset
         from util.inset import Corner
@@ -544,21 +760,13 @@ class Template:
         # keep the node wrapper <nw> in the dictionary <self.nodes>
         self.nodes[vid] = nw
         
-        # create a copy of <n> at the location of the vertex <v>
+        # the location of the node at the template vertex <v>
         loc = v.co.copy()
         loc += self.getOffset(v, vid)
-        _n = n
-        n = createMeshObject(n.name, loc, _n.data.copy())
-        # copy vertex groups
-        for g in _n.vertex_groups:
-            n.vertex_groups.new(g.name)
-            
+        
         if hooksForNodes:
-            # create a vertex group to be controlled by the HOOK modifier
+            # a vertex group to be controlled by the HOOK modifier
             group = "n_"+vid
-            bm = getBmesh(n)
-            assignGroupToVerts(n, bm.verts.layers.deform[0], group, *bm.verts)
-            setBmesh(n, bm)
             # create an EMPTY object and use it in the HOOK modifier
             hookObj = createEmptyObject(group, loc, False, empty_draw_size=0.01)
             dataPath = "data.shape_keys.key_blocks[\"frame_width\"].value"
@@ -578,27 +786,25 @@ class Template:
                 normal = v.normal.cross(_vec)
                 x.driver.expression = str(loc.x) + "+" + str(w*normal.x) + "*fw"
                 z.driver.expression = str(loc.z) + "+" + str(w*normal.z) + "*fw"
-        context.scene.update()
-        parent_set(parent, n)
-        if hooksForNodes:
-            parent_set(parent.parent, hookObj)
-        context.scene.update()
+            parent_set(self.meshParent, hookObj)
+            compiler.addHook(group, hookObj)
+        else:
+            group = None
         
-        nw.updateVertexGroupNames(n, self)
+        # names of the vertex groups of <n> in the order of their indices
+        groups = [g.name for g in n.vertex_groups]
+        # the mesh of <n> transformed in memory, e.g. rotated and sheared, is taken from the cache
+        bm = self.meshCache.get(node, nw, groups)
+        matrix = nw.getMatrix()
         
-        # select the Blender object <o>, so we can transform it, e.g. rotate it
-        n.select = True
-        matrix = nw.transform(n)
+        nw.updateVertexGroupNames(groups, self)
         
         self.processOffsets(vid, node, matrix)
-        # <parent> is also the current Blender active object
-        parent.select = True
-        bpy.ops.object.join()
-        
-        if hooksForNodes:
-            addHookModifier(parent, group, hookObj, group)
         
-        parent.select = False
+        _matrix = mathutils.Matrix.Translation(loc)
+        if matrix:
+            _matrix = _matrix * matrix
+        compiler.add(bm, groups, n.data.materials, _matrix, group)
     
     def getNodeWrapper(self, v):
         from .node import LNode, TNode, YNode, CrossNode, XNode
@@ -617,12 +823,16 @@ class Template:
     
     def bridgeOrExtendNodes(self, o, bm, dissolveEndEdges):
         nodes = self.nodes
+        # The vertices of all "e_*" vertex groups are found in a single pass for all bridges and extensions.
+        # The vertices removed by <bmesh.ops.dissolve_edges(..)> in <self.bridgeNodes(..)> belong only
+        # to the vertex groups that have been already bridged, so the index stays valid.
+        index = GroupIndex(bm, o, [g.index for g in o.vertex_groups if g.name.startswith("e_")])
         # iterate through the edges of the template
         for e in self.bm.edges:
             vid1 = self.getVid(e.verts[0])
             vid2 = self.getVid(e.verts[1])
             if vid1 in nodes and vid2 in nodes:
-                self.bridgeNodes(vid1, vid2, o, bm, dissolveEndEdges)
+                self.bridgeNodes(vid1, vid2, o, bm, dissolveEndEdges, index)
             elif not vid1 in nodes and not vid2 in nodes:
                 # nothing to do here
                 continue
@@ -633,11 +843,14 @@ class Template:
                 # assume the node was set for the template vertex <vid1>
                 if vid2 in nodes:
                     v1, v2 = v2, v1
-                self.extendNode(v1, v2, o, bm)
+                self.extendNode(v1, v2, o, bm, index)
     
-    def bridgeNodes(self, vid1, vid2, o, bm, dissolveEndEdges):
+    def bridgeNodes(self, vid1, vid2, o, bm, dissolveEndEdges, index):
         """
         Bridge open edge loops from the nodes set for the template vertices <vid1> and <vid2>
+        
+        Args:
+            index (util.blender.GroupIndex): The index of the "e_*" vertex groups of <o>
         """
         layer = bm.verts.layers.deform[0]
         groupIndices = set( (o.vertex_groups["e_" + vid1 + "_" +vid2].index, o.vertex_groups["e_" + vid2 + "_" +vid1].index) )
@@ -647,17 +860,10 @@ class Template:
         # For each vertex group index in <groupIndices> get a single vertex belonging
         # to the related vertex group
         verts = {}
-        for _v in bm.verts:
-            vert = None
-            for i in groupIndices:
-                if i in _v[layer]:
-                    vert = _v
-                    break
-            if vert:
-                verts[i] = vert
-                groupIndices.remove(i)
-                if not groupIndices:
-                    break
+        for i in groupIndices:
+            _verts = index.get(i)
+            if _verts:
+                verts[i] = _verts[0]
         # for each key in <verts> (the key is actually a vertex group index) get edges to bridge
         edges = []
         for i in verts:
@@ -712,14 +918,17 @@ class Template:
             for _edges in edges:
                 bmesh.ops.dissolve_edges(bm, edges=_edges, use_verts=True, use_face_split=False)
     
-    def extendNode(self, vert, toVert, o, bm):
+    def extendNode(self, vert, toVert, o, bm, index):
         """
         Extend the open edge loop from the node set for the template vertex <vert> towards the template vertex <toVert>
+        
+        Args:
+            index (util.blender.GroupIndex): The index of the "e_*" vertex groups of <o>
         """
         vid = self.getVid(vert)
         toVid = self.getVid(toVert)
         
-        verts = getVertsForVertexGroup(o, bm, o.vertex_groups["e_" + vid + "_" +toVid].name)
+        verts = index.get("e_" + vid + "_" +toVid)
         
         # perform translation of <verts> along the vector defined by the vertices <vid> and <toVid>
         
@@ -731,7 +940,7 @@ class Template:
         # the vertices <vert> and <toVert> to calculate the offset relative to the vertex <vert>
         bmesh.ops.translate(
             bm,
-            verts=getVertsForVertexGroup(o, bm, o.vertex_groups["e_" + vid + "_" +toVid].name),
+            verts=verts,
             vec=toVert.co - vert.co - projectOntoLine(verts[0].co - vert.co, e)
         )
     
@@ -924,17 +1133,21 @@ class Template:
         nodeCache = self.nodeCache
         
         # scan the template for assets
-        for a in o.children:
-            if a.get("t") != "asset":
-                continue
+        assets = [a for a in o.children if a.get("t") == "asset"]
+        if not assets:
+            return
+        bm = getBmesh(o)
+        # the vertices for the vids of all assets are found in a single pass
+        index = GroupIndex(bm, o)
+        for a in assets:
             vid1 = a["vid1"]
             vid2 = a["vid2"]
             
-            bm = getBmesh(o)
-            vert1 = getVertsForVertexGroup(o, bm, vid1)[0]
-            vert2 = getVertsForVertexGroup(o, bm, vid2)[0]
-            v1 = vert1.co
-            v2 = vert2.co
+            vert1 = index.get(vid1)[0]
+            vert2 = index.get(vid2)[0]
+            # the copies of the coordinates are changed below
+            v1 = vert1.co.copy()
+            v2 = vert2.co.copy()
             
             # get the edge connecting two vertices <v1> and <v2>
             for edge in vert1.link_edges:
@@ -1006,11 +1219,11 @@ class Template:
             if tOffset:
                 tOffset = matrix*tOffset.location if matrix else tOffset.location.copy()
                 location += projectOntoPlane(tOffset, (v2 - v1).normalized())
-            bm.free()
             # parent object for the hierarchy of assets
             p = createEmptyObject("test", location, True, empty_draw_size=0.01)
             parent_set(self.meshObject.parent, p)
             # import asset
-            a = appendFromFile(context, os.path.join(context.scene.prk.baseDirectory, a["path"]))
+            a = self.assetCache.get(os.path.join(context.scene.prk.baseDirectory, a["path"]))
             a.location = zeroVector.copy()
-            parent_set(p, a)
\ No newline at end of file
+            parent_set(p, a)
+        bm.free()
\ No newline at end of file